@@ -0,0 +1,288 @@
+"""
+Offline stand-ins for the benchmark suite: synthetic pricing/docs pages, a local
+HTTP server for them and for the GitHub issues API, a fake `praw.Reddit`, and a
+generator for large `community_signals` tables. Everything is seeded, so two
+runs with the same arguments do the same work.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import threading
+import time
+import types
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+from urllib.parse import parse_qs, urlencode, urlparse
+
+WORDS = (
+    "model context tokens request plan team workspace usage account billing seat api "
+    "latency window reply message project upload file image voice code agent tool"
+).split()
+FILLER = [
+    "The new release handles long {w} better than before.",
+    "Support answered within a day about my {w}.",
+    "Anyone else seeing slow {w} since this morning?",
+    "Switched our {w} over last week and it works fine.",
+    "Docs for the {w} endpoint are finally clearer.",
+]
+TIERS = ["Free", "Plus", "Pro", "Team", "Max", "Enterprise"]
+
+
+def keyword_pool(keywords_config: Dict[str, Any]) -> List[tuple[str, str]]:
+    """(category, keyword) pairs from config/keywords.yaml."""
+    return [(cat, str(kw)) for cat, words in keywords_config.items() if isinstance(words, list) for kw in words]
+
+
+def synthetic_post(rng: random.Random, pool: List[tuple[str, str]], hit_rate: float = 0.6) -> tuple[str, List[str]]:
+    """A short forum-style post; with probability `hit_rate` it mentions one or two keywords."""
+    lines = [rng.choice(FILLER).format(w=rng.choice(WORDS)) for _ in range(rng.randint(2, 6))]
+    hits: List[str] = []
+    if pool and rng.random() < hit_rate:
+        for _, kw in rng.sample(pool, k=rng.randint(1, 2)):
+            lines.insert(rng.randrange(len(lines) + 1), f"Honestly the {kw} thing is what bothers me.")
+            hits.append(kw.lower())
+    return " ".join(lines), sorted(set(hits))
+
+
+def synthetic_page(index: int, version: int = 0, kind: str = "pricing", size_kb: int = 60) -> str:
+    """
+    A pricing or docs page of roughly `size_kb` with the noise real pages carry
+    (scripts, styles, nav, build hashes). Bumping `version` edits a few prices
+    and paragraphs, so consecutive versions hash differently and diff small.
+    """
+    rng = random.Random(f"{kind}-{index}")
+    build = hashlib.sha1(f"{kind}{index}{version}".encode()).hexdigest()[:12]
+    head = (
+        f"<html><head><title>{kind.title()} {index}</title>"
+        f"<style>.tier{{padding:4px}} .b{build}{{color:#333}}</style>"
+        f'<script src="/static/app.{build}.js"></script>'
+        '<script>window.__DATA__ = {"flags": [1, 2, 3]};</script></head><body>'
+        '<nav><a href="/">Home</a> <a href="/pricing">Pricing</a> <a href="/docs">Docs</a></nav>'
+    )
+    rows = []
+    for tier in TIERS:
+        price = rng.choice([0, 8, 20, 25, 30, 60, 100, 200]) + (version if tier in ("Pro", "Max") else 0)
+        rows.append(f'<tr class="tier"><td>{tier}</td><td>${price}/month</td><td>{rng.randint(10, 500)} msgs</td></tr>')
+    body = [f"<h1>{kind.title()} page {index}</h1><table>{''.join(rows)}</table>"]
+    paragraph = 0
+    while sum(len(part) for part in body) < size_kb * 1024:
+        edited = paragraph % 40 == version % 40 and version > 0
+        text = " ".join(rng.choice(WORDS) for _ in range(60))
+        body.append(f"<h2>Section {paragraph}</h2><p>{'Updated: ' if edited else ''}{text}</p>")
+        paragraph += 1
+    return head + "".join(body) + f'<footer data-build="{build}">&copy; Example</footer></body></html>'
+
+
+def synthetic_issues(repo: str, count: int, pool: List[tuple[str, str]], seed: int = 0) -> List[Dict[str, Any]]:
+    """GitHub issue payloads (with a few PRs mixed in), updated over the last 20 hours."""
+    rng = random.Random(f"{repo}-{seed}")
+    now = datetime.now(timezone.utc)
+    issues = []
+    for number in range(1, count + 1):
+        text, _ = synthetic_post(rng, pool)
+        updated = now - timedelta(seconds=(count - number) * 72000 / max(count, 1))
+        issue = {
+            "number": number,
+            "title": text[:80],
+            "body": text,
+            "html_url": f"https://github.com/{repo}/issues/{number}",
+            "updated_at": updated.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "comments": rng.randint(0, 40),
+            "reactions": {"total_count": rng.randint(0, 100)},
+        }
+        if number % 10 == 0:
+            issue["pull_request"] = {"url": issue["html_url"]}
+        issues.append(issue)
+    return issues
+
+
+class FixtureServer:
+    """
+    Local HTTP server on an ephemeral port:
+
+    - `/pages/<kind>/<n>` serves page n (recorded pages if given, else synthetic
+      at the current `version`), with ETags so conditional GETs return 304.
+    - `/github/repos/<owner>/<repo>/issues` mimics the GitHub issues listing:
+      `since` filter, oldest-first paging with `Link: rel="next"`, rate-limit header.
+    """
+
+    def __init__(self, recorded: List[str] | None = None, page_kb: int = 60, latency: float = 0.0):
+        self.recorded = recorded or []
+        self.page_kb = page_kb
+        self.latency = latency
+        self.version = 0
+        self.issues: Dict[str, List[Dict[str, Any]]] = {}
+        self.requests = 0
+        self.bytes_sent = 0
+        self._cache: Dict[tuple[str, int, int], bytes] = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page_url(self, kind: str, index: int) -> str:
+        return f"{self.base_url}/pages/{kind}/{index}"
+
+    def page_body(self, kind: str, index: int) -> bytes:
+        key = (kind, index, self.version)
+        with self._lock:
+            if key not in self._cache:
+                if self.recorded:
+                    html = self.recorded[index % len(self.recorded)]
+                else:
+                    html = synthetic_page(index, self.version, kind, self.page_kb)
+                self._cache[key] = html.encode("utf-8")
+            return self._cache[key]
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b"", headers: Dict[str, str] | None = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.requests += 1
+                    server.bytes_sent += len(body)
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                url = urlparse(self.path)
+                parts = url.path.strip("/").split("/")
+                if parts[0] == "pages" and len(parts) == 3:
+                    body = server.page_body(parts[1], int(parts[2]))
+                    etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                    if self.headers.get("If-None-Match") == etag:
+                        return self._send(304, headers={"ETag": etag})
+                    return self._send(200, body, {"Content-Type": "text/html; charset=utf-8", "ETag": etag})
+                if parts[0] == "github" and parts[1:2] == ["repos"] and parts[-1] == "issues":
+                    return self._issues("/".join(parts[2:-1]), parse_qs(url.query), url.path)
+                self._send(404)
+
+            def _issues(self, repo: str, query: Dict[str, List[str]], path: str):
+                since = query.get("since", [""])[0]
+                page = int(query.get("page", ["1"])[0])
+                per_page = int(query.get("per_page", ["30"])[0])
+                matching = [issue for issue in server.issues.get(repo, []) if issue["updated_at"] >= since]
+                chunk = matching[(page - 1) * per_page : page * per_page]
+                headers = {"Content-Type": "application/json", "X-RateLimit-Remaining": "5000"}
+                if page * per_page < len(matching):
+                    params = urlencode({"since": since, "page": page + 1, "per_page": per_page})
+                    headers["Link"] = f'<{server.base_url}{path}?{params}>; rel="next"'
+                self._send(200, json.dumps(chunk).encode("utf-8"), headers)
+
+        return Handler
+
+
+def install_fake_reddit(posts_per_subreddit: int, pool: List[tuple[str, str]], seed: int = 0):
+    """Replace `praw.Reddit` with an offline fake whose `/new` listings hold synthetic posts."""
+    import praw
+
+    now = time.time()
+
+    class FakeSubreddit:
+        def __init__(self, name: str):
+            self.name = name
+
+        def new(self, limit: int | None = 100, params=None) -> Iterator[types.SimpleNamespace]:
+            rng = random.Random(f"{self.name}-{seed}")
+            for i in range(min(limit or posts_per_subreddit, posts_per_subreddit)):
+                text, _ = synthetic_post(rng, pool)
+                yield types.SimpleNamespace(
+                    id=f"{self.name}{i}",
+                    title=text[:80],
+                    selftext=text,
+                    created_utc=now - i * 72000 / posts_per_subreddit,
+                    url=f"https://reddit.com/r/{self.name}/comments/{i}",
+                    score=rng.randint(0, 500),
+                    num_comments=rng.randint(0, 80),
+                )
+
+    class FakeReddit:
+        def __init__(self, **kwargs):
+            pass
+
+        def subreddit(self, name: str) -> FakeSubreddit:
+            return FakeSubreddit(name)
+
+    praw.Reddit = FakeReddit
+
+
+def generate_signals(
+    db_path: Path,
+    rows: int,
+    companies: List[str],
+    keywords_config: Dict[str, Any],
+    days: int = 365,
+    seed: int = 0,
+    batch_size: int = 10_000,
+) -> int:
+    """
+    Fill `community_signals` with `rows` synthetic reddit/github signals spread
+    over the last `days` days, then rebuild the daily rollups from them.
+    Rows go in with executemany batches (the FTS triggers still fire).
+    """
+    from sqlalchemy import insert
+
+    from ai_sub_monitor.analyzers.keywords import KeywordMatcher
+    from ai_sub_monitor.db import CommunitySignal, Company, rebuild_rollups, session_scope
+
+    rng = random.Random(seed)
+    pool = keyword_pool(keywords_config)
+    matcher = KeywordMatcher.from_config(keywords_config)
+    now = datetime.utcnow()
+    with session_scope(db_path) as session:
+        for cid in companies:
+            session.merge(Company(id=cid, name=cid.title()))
+        for start in range(0, rows, batch_size):
+            batch = []
+            for n in range(start, min(start + batch_size, rows)):
+                text, hits = synthetic_post(rng, pool, hit_rate=1.0)
+                source = "reddit" if n % 4 else "github"
+                batch.append(
+                    {
+                        "id": str(uuid.uuid4()),
+                        "company_id": companies[n % len(companies)],
+                        "source": source,
+                        "source_id": f"bench-{n}",
+                        "captured_at": now - timedelta(seconds=rng.uniform(0, days * 86400)),
+                        "content": text,
+                        "url": f"https://example.com/{source}/{n}",
+                        "sentiment": round(rng.uniform(-1, 1), 3),
+                        "keywords_matched": hits,
+                        "keyword_categories": matcher.categories(hits),
+                        "score": rng.randint(0, 500),
+                        "comment_count": rng.randint(0, 80),
+                    }
+                )
+            session.execute(insert(CommunitySignal), batch)
+        rebuild_rollups(session)
+    return rows
@@ -0,0 +1,91 @@
+"""
+Compare HTML parser backends on archived pricing/docs pages.
+
+Reads legacy `data/snapshots/*.html` archives and page bodies from the blob
+store, then times parse + normalize for every installed backend and checks
+that each produces the same normalized text (and so the same content hash)
+as the html.parser baseline.
+
+    python benchmarks/html_backends.py [--repeat 5] [--json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from ai_sub_monitor.config import data_root
+from ai_sub_monitor.utils.blobs import BlobStore
+from ai_sub_monitor.utils.html import available_backends, hash_text, parse_page
+
+
+def load_pages(data_root: Path) -> List[str]:
+    pages = [p.read_text(encoding="utf-8", errors="replace") for p in sorted(data_root.glob("snapshots/*.html"))]
+    store = BlobStore(data_root / "blobs")
+    for key in sorted(set(store.keys())):  # full and delta-stored blobs alike
+        text = store.get(key)
+        if not text.startswith("--- "):  # skip stored diffs
+            pages.append(text)
+    return pages
+
+
+def bench(pages: List[str], backend: str, repeat: int) -> Dict[str, float]:
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for html in pages:
+            parse_page(html, backend).normalized()
+        runs.append(time.perf_counter() - started)
+    best = min(runs)
+    return {
+        "seconds_best": best,
+        "seconds_median": statistics.median(runs),
+        "ms_per_page": best / len(pages) * 1000,
+        "pages_per_second": len(pages) / best if best else float("inf"),
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--data", type=Path, default=data_root(), help="Data root to read pages from.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable results.")
+    args = parser.parse_args(argv)
+
+    pages = load_pages(args.data)
+    if not pages:
+        print(f"No archived pages under {args.data}/snapshots or {args.data}/blobs", file=sys.stderr)
+        return 1
+
+    backends = available_backends()
+    baseline = {i: hash_text(parse_page(html, "html.parser").normalized()) for i, html in enumerate(pages)}
+    results: Dict[str, Dict[str, float]] = {}
+    for backend in backends:
+        stats = bench(pages, backend, args.repeat)
+        agree = sum(
+            hash_text(parse_page(html, backend).normalized()) == baseline[i] for i, html in enumerate(pages)
+        )
+        stats["hash_agreement"] = agree / len(pages)
+        results[backend] = stats
+
+    if args.json:
+        print(json.dumps({"pages": len(pages), "results": results}, indent=2))
+        return 0
+
+    base = results["html.parser"]["seconds_best"]
+    print(f"{len(pages)} pages, best of {args.repeat}")
+    print(f"{'backend':<12} {'ms/page':>9} {'pages/s':>9} {'speedup':>8} {'same hash':>10}")
+    for backend, stats in results.items():
+        print(
+            f"{backend:<12} {stats['ms_per_page']:>9.2f} {stats['pages_per_second']:>9.1f} "
+            f"{base / stats['seconds_best']:>7.1f}x {stats['hash_agreement']:>9.0%}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
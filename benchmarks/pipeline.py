@@ -0,0 +1,241 @@
+"""
+Time every stage of the collect/report/update-models pipeline offline.
+
+Pricing/docs pages (synthetic, or archived ones with --recorded) and the GitHub
+issues API are served from a local HTTP server, Reddit is a fake `praw`, and
+`community_signals` is filled with --signals synthetic rows (10k to 1M) before
+the report stages. Everything runs in a throwaway data directory
+(AI_SUB_MONITOR_DATA_DIR), so the real data/ is never touched.
+
+Stages: fetch, parse, hash, diff, sentiment, db_write, the four collectors end
+to end (pricing cold / unchanged / changed), signal generation, weekly report
+render (one week and a range) and the XLSX update.
+
+    python benchmarks/pipeline.py [--pages 40] [--signals 100000] [--json] [--output results.json]
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from fixtures import (
+    FixtureServer,
+    generate_signals,
+    install_fake_reddit,
+    keyword_pool,
+    synthetic_issues,
+    synthetic_post,
+)
+
+from ai_sub_monitor.config import DATA_DIR_ENV_VAR, load_sources_and_keywords, repo_root
+
+
+class Stages:
+    def __init__(self, quiet: bool):
+        self.quiet = quiet
+        self.results: Dict[str, Dict[str, float]] = {}
+
+    def run(self, name: str, items: int | Callable[[Any], int], fn: Callable[[], Any], **extra: float) -> Any:
+        # collectors report progress through rich; keep it out of the timings' output
+        out = io.StringIO() if self.quiet else sys.stdout
+        with contextlib.redirect_stdout(out):
+            started = time.perf_counter()
+            value = fn()
+            elapsed = time.perf_counter() - started
+        if callable(items):
+            items = items(value)
+        self.results[name] = {
+            "seconds": elapsed,
+            "items": items,
+            "per_second": items / elapsed if elapsed else float("inf"),
+            **extra,
+        }
+        print(f"{name:<26} {elapsed:>9.3f}s {items:>9} items", file=sys.stderr)
+        return value
+
+
+def bench_sources(server: FixtureServer, companies: int, pages: int, subreddits: int, repos: int) -> Dict[str, Any]:
+    config: Dict[str, Any] = {
+        "companies": {},
+        "http": {"max_concurrency": 8, "per_host_concurrency": 8},
+        "github": {"api_url": f"{server.base_url}/github", "max_concurrency": 4, "max_pages_per_repo": 50},
+        "reddit": {"max_workers": 4},
+    }
+    for c in range(companies):
+        config["companies"][f"company{c}"] = {
+            "name": f"Company {c}",
+            "pricing_urls": [server.page_url("pricing", i) for i in range(c, pages, companies)],
+            "docs_urls": [server.page_url("docs", i) for i in range(c, pages, companies)],
+            "subreddits": [f"sub{c}_{s}" for s in range(subreddits)],
+            "github_repos": [f"org{c}/repo{r}" for r in range(repos)],
+        }
+    return config
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=40, help="Pricing pages (and as many docs pages).")
+    parser.add_argument("--page-kb", type=int, default=60, help="Size of each synthetic page.")
+    parser.add_argument("--recorded", action="store_true", help="Serve archived pages from data/ instead.")
+    parser.add_argument("--companies", type=int, default=2)
+    parser.add_argument("--posts", type=int, default=500, help="Reddit posts per subreddit.")
+    parser.add_argument("--issues", type=int, default=500, help="GitHub issues per repo.")
+    parser.add_argument("--texts", type=int, default=5000, help="Texts for the sentiment and db_write stages.")
+    parser.add_argument("--signals", type=int, default=100_000, help="Rows generated for the report stages.")
+    parser.add_argument("--days", type=int, default=365, help="History the generated signals span.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every HTTP response.")
+    parser.add_argument("--workdir", type=Path, help="Data directory to use (kept); default is a temp dir.")
+    parser.add_argument("--verbose", action="store_true", help="Show collector output.")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results.")
+    parser.add_argument("--output", type=Path, help="Also write the JSON results here.")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="ai-sub-monitor-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    os.environ[DATA_DIR_ENV_VAR] = str(workdir)
+    os.environ.setdefault("REDDIT_CLIENT_ID", "bench")
+    os.environ.setdefault("REDDIT_CLIENT_SECRET", "bench")
+    os.environ.setdefault("GITHUB_TOKEN", "bench")
+
+    # imported after the data dir is set; the helpers resolve paths on each call anyway
+    from ai_sub_monitor.analyzers import sentiment
+    from ai_sub_monitor.analyzers.diff import unified_diff
+    from ai_sub_monitor.analyzers.keywords import KeywordMatcher
+    from ai_sub_monitor.collectors import docs, github, pricing, reddit
+    from ai_sub_monitor.db import Company, dispose_engines, init_db, insert_signals, session_scope
+    from ai_sub_monitor.reporters.weekly import generate_weekly_report, generate_weekly_reports
+    from ai_sub_monitor.utils.html import default_backend, hash_text, parse_page
+    from ai_sub_monitor.utils.http import fetch_all
+    from ai_sub_monitor.utils.models import update_models
+
+    _, keywords = load_sources_and_keywords()
+    pool = keyword_pool(keywords)
+    recorded = None
+    if args.recorded:
+        from html_backends import load_pages
+
+        recorded = load_pages(repo_root() / "data")
+        if not recorded:
+            print("No archived pages under data/snapshots or data/blobs", file=sys.stderr)
+            return 1
+
+    db_path = workdir / "monitor.db"
+    stages = Stages(quiet=not args.verbose)
+    try:
+        with FixtureServer(recorded, page_kb=args.page_kb, latency=args.latency_ms / 1000) as server:
+            sources = bench_sources(server, args.companies, args.pages, subreddits=2, repos=2)
+            for info in sources["companies"].values():
+                for repo in info["github_repos"]:
+                    server.issues[repo] = synthetic_issues(repo, args.issues, pool)
+            init_db(db_path)
+            with session_scope(db_path) as session:
+                for cid, info in sources["companies"].items():
+                    session.merge(Company(id=cid, name=info["name"]))
+
+            # -- page pipeline, stage by stage ------------------------------------------------
+            urls = [url for info in sources["companies"].values() for url in info["pricing_urls"]]
+            sent = server.bytes_sent
+            fetched = stages.run("fetch", len(urls), lambda: fetch_all(urls, max_concurrency=8, per_host_concurrency=8))
+            stages.results["fetch"]["bytes"] = server.bytes_sent - sent
+            bodies = [fetched[url].response.text for url in urls if fetched[url].response is not None]
+            parsed = stages.run("parse", len(bodies), lambda: [parse_page(html) for html in bodies])
+            before = stages.run("hash", len(parsed), lambda: [(p.normalized(), hash_text(p.normalized())) for p in parsed])
+            server.version += 1
+            changed = [parse_page(fetched.response.text).normalized() for fetched in fetch_all(urls).values()]
+            stages.run(
+                "diff", len(changed), lambda: [unified_diff(old, new) for (old, _), new in zip(before, changed)]
+            )
+            server.version = 0
+
+            # -- signal pipeline ----------------------------------------------------------------
+            rng = random.Random(0)
+            matcher = KeywordMatcher.from_config(keywords)
+            texts = [synthetic_post(rng, pool, hit_rate=1.0)[0] for _ in range(args.texts)]
+            sentiment._cache.clear()
+            scores = stages.run("sentiment", len(texts), lambda: sentiment.score_batch(texts))
+            rows = []
+            for n, (text, value) in enumerate(zip(texts, scores)):
+                hits = matcher.match(text)
+                rows.append(
+                    {
+                        "company_id": "company0",
+                        "source": "bench",
+                        "source_id": str(n),
+                        "content": text,
+                        "sentiment": value,
+                        "keywords_matched": hits,
+                        "keyword_categories": matcher.categories(hits),
+                    }
+                )
+
+            def write_rows():
+                with session_scope(db_path) as session:
+                    return insert_signals(session, rows)
+
+            stages.run("db_write", len(rows), write_rows)
+
+            # -- collectors end to end ----------------------------------------------------------
+            docs_urls = sum(len(info["docs_urls"]) for info in sources["companies"].values())
+            stages.run("collect.pricing.cold", len(urls), lambda: pricing.run(sources, db_path=db_path))
+            stages.run("collect.pricing.unchanged", len(urls), lambda: pricing.run(sources, db_path=db_path))
+            server.version += 1
+            stages.run("collect.pricing.changed", len(urls), lambda: pricing.run(sources, db_path=db_path))
+            stages.run("collect.docs.cold", docs_urls, lambda: docs.run(sources, db_path=db_path))
+            subs = sum(len(info["subreddits"]) for info in sources["companies"].values())
+            install_fake_reddit(args.posts, pool)
+            stages.run(
+                "collect.reddit", subs * args.posts, lambda: reddit.run(sources, keywords, db_path=db_path)
+            )
+            stages.run(
+                "collect.github",
+                sum(len(issues) for issues in server.issues.values()),
+                lambda: github.run(sources, keywords, db_path=db_path),
+            )
+
+            # -- history, reports, workbooks ----------------------------------------------------
+            stages.run(
+                "db_generate",
+                args.signals,
+                lambda: generate_signals(db_path, args.signals, list(sources["companies"]), keywords, days=args.days),
+            )
+            stages.run("report.week", 1, lambda: generate_weekly_report(date.today(), db_path=db_path))
+            first = date.today() - timedelta(days=args.days)
+            stages.run("report.range", len, lambda: generate_weekly_reports(first, date.today(), db_path=db_path))
+            stages.run("xlsx.update", 2, lambda: update_models(db_path=db_path))
+            stages.run("xlsx.update.unchanged", 2, lambda: update_models(db_path=db_path))
+    finally:
+        dispose_engines()
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    payload = {
+        "params": {key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "html_backend": default_backend(),
+        },
+        "stages": stages.results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    if args.json:
+        print(json.dumps(payload, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Guard CLI startup time against heavy imports creeping back in.
+
+Runs light commands (`--version`, `--help`, `sources`) in fresh interpreters,
+fails if any of them imported a heavy dependency (SQLAlchemy, the collectors,
+praw, httpx, bs4, openpyxl, VADER, numpy, pyarrow, ...) and reports the best wall time per
+command against a budget.
+
+    python benchmarks/startup.py [--repeat 5] [--budget-ms 300] [--json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+
+COMMANDS = [["--version"], ["--help"], ["sources"]]
+HEAVY_MODULES = [
+    "sqlalchemy",
+    "ai_sub_monitor.db",
+    "ai_sub_monitor.collectors.pricing",
+    "ai_sub_monitor.collectors.reddit",
+    "ai_sub_monitor.collectors.github",
+    "ai_sub_monitor.collectors.docs",
+    "ai_sub_monitor.collectors.snapshots",
+    "ai_sub_monitor.reporters.weekly",
+    "ai_sub_monitor.analyzers.anomaly",
+    "praw",
+    "httpx",
+    "bs4",
+    "lxml",
+    "selectolax",
+    "openpyxl",
+    "jinja2",
+    "vaderSentiment",
+    "numpy",
+    "pyarrow",
+]
+
+PROBE = """
+import contextlib, io, json, sys
+from ai_sub_monitor.cli import cli
+with contextlib.redirect_stdout(io.StringIO()):
+    try:
+        cli(sys.argv[1:], standalone_mode=False)
+    except SystemExit:
+        pass
+print(json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))
+"""
+
+
+def run_once(args: List[str]) -> tuple[float, List[str]]:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT / "src"), os.getenv("PYTHONPATH")]))}
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES), *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=ROOT,
+        check=True,
+    )
+    elapsed = time.perf_counter() - started
+    return elapsed, json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=300.0, help="Fail if a command's best run is slower.")
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable results.")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, object]] = {}
+    failed = False
+    for command in COMMANDS:
+        runs, leaked = [], set()
+        for _ in range(args.repeat):
+            elapsed, heavy = run_once(command)
+            runs.append(elapsed)
+            leaked.update(heavy)
+        best_ms = min(runs) * 1000
+        ok = not leaked and best_ms <= args.budget_ms
+        failed |= not ok
+        results[" ".join(command)] = {"ms_best": best_ms, "heavy_imports": sorted(leaked), "ok": ok}
+
+    if args.json:
+        print(json.dumps({"budget_ms": args.budget_ms, "results": results}, indent=2))
+        return 1 if failed else 0
+
+    print(f"{'command':<12} {'best ms':>8}  heavy imports")
+    for command, stats in results.items():
+        print(f"{command:<12} {stats['ms_best']:>8.1f}  {', '.join(stats['heavy_imports']) or '-'}")
+    if failed:
+        print(f"FAIL: heavy imports or slower than {args.budget_ms:g} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
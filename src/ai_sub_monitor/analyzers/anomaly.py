@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import datetime as dt
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from ..db import ALL_CATEGORIES, DailySignalRollup, session_scope
+
+# Trailing days that form the baseline for a day, and how many of them must have data.
+BASELINE_DAYS = 28
+MIN_BASELINE_DAYS = 14
+# |z| at or above this flags a day.
+Z_THRESHOLD = 3.5
+# Days after a candidate change-point that must confirm the new level.
+SHIFT_DAYS = 7
+SHIFT_THRESHOLD = 4.0
+MIN_SHIFT_RATIO = 0.5  # a level shift must move volume by at least half the old level
+# Quieter series are too noisy to judge: mean signals/day for volume, signals that day for sentiment.
+MIN_VOLUME = 2.0
+MIN_SENTIMENT_SIGNALS = 5
+SENTIMENT_STD_FLOOR = 0.05
+
+
+@dataclass
+class Anomaly:
+  day: dt.date
+  company_id: str
+  source: str
+  metric: str  # volume | sentiment
+  kind: str  # spike | drop | shift
+  value: float
+  baseline: float
+  score: float  # z-score, or the shift's t-statistic
+  description: str
+
+  def as_event(self) -> Dict[str, Any]:
+    event = asdict(self)
+    event["day"] = self.day.isoformat()
+    return event
+
+
+def _windowed(values: np.ndarray, mask: np.ndarray, starts: np.ndarray, stops: np.ndarray):
+  """Count, mean and std of `values` where `mask`, over [starts, stops) of every row, via prefix sums."""
+  pad = np.zeros((values.shape[0], 1))
+  v = np.where(mask, values, 0.0)
+  c1 = np.concatenate([pad, np.cumsum(v, axis=1)], axis=1)
+  c2 = np.concatenate([pad, np.cumsum(v * v, axis=1)], axis=1)
+  cn = np.concatenate([pad, np.cumsum(mask, axis=1)], axis=1)
+  n = cn[:, stops] - cn[:, starts]
+  with np.errstate(invalid="ignore", divide="ignore"):
+    mean = (c1[:, stops] - c1[:, starts]) / n
+    var = np.clip((c2[:, stops] - c2[:, starts]) / n - mean * mean, 0.0, None)
+  return n, mean, np.sqrt(var)
+
+
+def _local_max(score: np.ndarray, radius: int) -> np.ndarray:
+  """Where `score` is the largest within `radius` days either side (first one wins ties)."""
+  padded = np.pad(score, ((0, 0), (radius, radius)), constant_values=-np.inf)
+  windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1, axis=1)
+  return (score >= windows.max(axis=2)) & (windows.argmax(axis=2) == radius)
+
+
+def _load_series(
+  db_path: Path | None, until: dt.date | None, company: str | None
+) -> Tuple[List[Tuple[str, str]], dt.date | None, np.ndarray, np.ndarray, np.ndarray]:
+  """Daily signal count, sentiment sum and scored count per (company, source) as dense day arrays."""
+  query = select(
+    DailySignalRollup.company_id,
+    DailySignalRollup.source,
+    DailySignalRollup.day,
+    DailySignalRollup.signal_count,
+    DailySignalRollup.sentiment_sum,
+    DailySignalRollup.sentiment_count,
+  ).where(DailySignalRollup.category == ALL_CATEGORIES)
+  if until:
+    query = query.where(DailySignalRollup.day <= until)
+  if company:
+    query = query.where(DailySignalRollup.company_id == company)
+  with session_scope(db_path) as session:
+    rows = session.execute(query).all()
+  if not rows:
+    empty = np.zeros((0, 0))
+    return [], None, empty, empty, empty
+
+  keys = sorted({(row[0], row[1]) for row in rows})
+  index = {key: i for i, key in enumerate(keys)}
+  first = min(row[2] for row in rows)
+  days = (max(row[2] for row in rows) - first).days + 1
+  series = np.array([index[(row[0], row[1])] for row in rows])
+  offset = np.array([(row[2] - first).days for row in rows])
+  counts, sums, scored = (np.zeros((len(keys), days)) for _ in range(3))
+  counts[series, offset] = [row[3] for row in rows]
+  sums[series, offset] = [row[4] or 0.0 for row in rows]
+  scored[series, offset] = [row[5] or 0 for row in rows]
+  return keys, first, counts, sums, scored
+
+
+def detect_anomalies(
+  db_path: Path | None = None,
+  first: dt.date | None = None,
+  last: dt.date | None = None,
+  company: str | None = None,
+  z_threshold: float = Z_THRESHOLD,
+  baseline_days: int = BASELINE_DAYS,
+) -> List[Anomaly]:
+  """
+  Flag unusual days in every (company, source) signal series from the daily rollups.
+
+  Volume and mean sentiment are compared with the trailing `baseline_days`
+  (the day itself excluded): |z| >= `z_threshold` is a spike or drop. A level
+  shift is a day where the next SHIFT_DAYS differ from the baseline by a Welch
+  t-statistic of at least SHIFT_THRESHOLD, keeping only the strongest day
+  nearby. All series and days are scored at once with prefix sums, so the
+  cost grows with days x series, not with signal count.
+
+  A series counts from its first day with signals, so a newly added subreddit
+  or repo does not look like a spike. Only days in [first, last] are returned,
+  but the whole history before them feeds the baselines.
+  """
+  keys, origin, counts, sums, scored = _load_series(
+    db_path, last + dt.timedelta(days=SHIFT_DAYS) if last else None, company
+  )
+  if not keys:
+    return []
+  days = counts.shape[1]
+  t = np.arange(days)
+  born = np.argmax(counts > 0, axis=1)[:, None]
+  active = t[None, :] >= born
+  base_start = np.maximum(t - baseline_days, 0)
+
+  with np.errstate(invalid="ignore", divide="ignore"):
+    daily_sentiment = np.where(scored > 0, sums / scored, np.nan)
+
+  found: Dict[Tuple[int, int, str], Anomaly] = {}
+
+  def flag(metric: str, kind: str, s: int, d: int, value: float, baseline: float, score: float):
+    day = origin + dt.timedelta(days=int(d))
+    if (first and day < first) or (last and day > last) or (s, d, metric) in found:
+      return
+    company_id, source = keys[s]
+    who = f"{company_id} {source}"
+    if metric == "volume" and kind == "shift":
+      text = f"{who} volume shifted from ~{baseline:.1f}/day to ~{value:.1f}/day"
+    elif metric == "volume":
+      text = f"{who} volume {kind}: {value:.0f} signals vs ~{baseline:.1f}/day"
+    elif kind == "shift":
+      text = f"{who} sentiment shifted from {baseline:+.2f} to {value:+.2f}"
+    else:
+      text = f"{who} sentiment {kind}: {value:+.2f} vs {baseline:+.2f} baseline"
+    found[(s, d, metric)] = Anomaly(
+      day=day,
+      company_id=company_id,
+      source=source,
+      metric=metric,
+      kind=kind,
+      value=float(value),
+      baseline=float(baseline),
+      score=round(float(score), 2),
+      description=f"{day.isoformat()}: {text} ({'z' if kind != 'shift' else 't'}={score:+.1f})",
+    )
+
+  # today's rollup is still filling up: its volume would always read as a drop and its
+  # sentiment rests on whatever few signals came in first
+  complete = (t < (dt.datetime.utcnow().date() - origin).days)[None, :]
+  metrics = {
+    "volume": (counts, active, active & complete),
+    "sentiment": (
+      np.nan_to_num(daily_sentiment),
+      active & (scored > 0),
+      active & complete & (scored >= MIN_SENTIMENT_SIGNALS),
+    ),
+  }
+  for metric, (values, has_value, judged) in metrics.items():
+    n, mean, std = _windowed(values, has_value, base_start, t)
+    if metric == "volume":
+      std_eff = np.maximum(std, np.sqrt(np.maximum(mean, 1.0)))  # Poisson noise at least
+      eligible = judged & (mean >= MIN_VOLUME)
+    else:
+      std_eff = np.maximum(std, SENTIMENT_STD_FLOOR)
+      eligible = judged
+    eligible &= n >= MIN_BASELINE_DAYS
+
+    # level shifts first: the baseline window vs the SHIFT_DAYS starting at each day, where
+    # most of those days sit on the new side (so a single-day spike is not a shift)
+    stops = np.minimum(t + SHIFT_DAYS, days)
+    n_after, mean_after, std_after = _windowed(values, has_value & complete, t, stops)
+    ahead = np.lib.stride_tricks.sliding_window_view(
+      np.pad(np.where(has_value, values, np.nan), ((0, 0), (0, SHIFT_DAYS - 1)), constant_values=np.nan),
+      SHIFT_DAYS,
+      axis=1,
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+      side = np.sign(mean_after - mean)[:, :, None]
+      persistent = np.sum((ahead - mean[:, :, None]) * side > 0, axis=2) >= n_after - 1
+      if metric == "volume":
+        noise = np.maximum(std_eff**2, 1.0)
+        moved = np.abs(mean_after - mean) >= MIN_SHIFT_RATIO * np.maximum(mean, MIN_VOLUME)
+      else:
+        noise = np.maximum(std, SENTIMENT_STD_FLOOR) ** 2
+        moved = True
+      stat = (mean_after - mean) / np.sqrt(noise / n + np.maximum(std_after**2, noise) / n_after)
+    ok = eligible & (n_after >= SHIFT_DAYS - 1) & persistent & moved
+    stat = np.where(ok, np.nan_to_num(stat), 0.0)
+    peaks = _local_max(np.abs(stat), SHIFT_DAYS) & (np.abs(stat) >= SHIFT_THRESHOLD)
+    for s, d in zip(*np.nonzero(peaks)):
+      flag(metric, "shift", s, d, mean_after[s, d], mean[s, d], stat[s, d])
+
+    # until the baseline has caught up with a shift, days on its new side are not spikes
+    recent = np.zeros_like(values)
+    for direction in (1, -1):
+      marks = np.cumsum(peaks & (np.sign(stat) == direction), axis=1)
+      lagged = np.pad(marks, ((0, 0), (baseline_days, 0)))[:, :days]
+      recent = np.where(marks - lagged > 0, direction, recent)
+    with np.errstate(invalid="ignore", divide="ignore"):
+      z = np.where(eligible, (values - mean) / std_eff, 0.0)
+    z = np.where(np.sign(z) == recent, 0.0, z)
+    for s, d in zip(*np.nonzero(np.abs(z) >= z_threshold)):
+      kind = "spike" if z[s, d] > 0 else "drop"
+      flag(metric, kind, s, d, values[s, d], mean[s, d], z[s, d])
+
+  return sorted(found.values(), key=lambda a: (a.day, -abs(a.score)))
@@ -8,3 +8,11 @@ def diff_text(prev: Path, curr: Path) -> str:
   prev_lines = prev.read_text(encoding="utf-8").splitlines()
   curr_lines = curr.read_text(encoding="utf-8").splitlines()
   return "\n".join(difflib.unified_diff(prev_lines, curr_lines, fromfile=str(prev), tofile=str(curr)))
+
+
+def unified_diff(prev: str, curr: str, fromfile: str = "prev", tofile: str = "curr") -> str:
+  return "\n".join(
+    difflib.unified_diff(
+      prev.splitlines(), curr.splitlines(), fromfile=fromfile, tofile=tofile, lineterm=""
+    )
+  )
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Tuple
+
+
+def _keyword_regex(keyword: str) -> str:
+  # any run of whitespace in a phrase matches any run in the text ("rate  limit", "rate\nlimit")
+  return r"\s+".join(re.escape(part) for part in keyword.split())
+
+
+class KeywordMatcher:
+  """
+  Single-pass keyword matcher built once from config/keywords.yaml.
+
+  Every keyword is folded into one compiled, case-insensitive regex with
+  word boundaries, so a document is scanned once regardless of how many
+  keywords are configured. The pattern is wrapped in a lookahead so matches
+  that overlap ("hit limit" / "limit reached") are all reported.
+  """
+
+  def __init__(self, categories: Dict[str, List[str]]):
+    self.keyword_categories: Dict[str, Tuple[str, ...]] = {}
+    for category, words in categories.items():
+      for word in words:
+        kw = " ".join(str(word).lower().split())
+        if kw:
+          self.keyword_categories[kw] = self.keyword_categories.get(kw, ()) + (category,)
+    self.keywords: List[str] = sorted(self.keyword_categories)
+
+    # longest first, so at a given position the longest phrase wins
+    ordered = sorted(self.keywords, key=len, reverse=True)
+    self._pattern = (
+      re.compile(
+        r"(?=(?<!\w)(" + "|".join(_keyword_regex(kw) for kw in ordered) + r")(?!\w))",
+        re.IGNORECASE,
+      )
+      if ordered
+      else None
+    )
+    # a longer phrase that wins a position also implies the shorter keywords inside it
+    # ("cancelled my" -> "cancelled"), which the lookahead would otherwise never report
+    self._implied: Dict[str, Tuple[str, ...]] = {
+      kw: tuple(
+        other
+        for other in self.keywords
+        if other != kw and re.search(r"(?<!\w)" + _keyword_regex(other) + r"(?!\w)", kw)
+      )
+      for kw in self.keywords
+    }
+
+  @classmethod
+  def from_config(cls, keywords_config: Dict[str, Any]) -> "KeywordMatcher":
+    return cls({key: val for key, val in keywords_config.items() if isinstance(val, list)})
+
+  def match(self, text: str) -> List[str]:
+    """Return the sorted, lower-cased keywords found in `text`."""
+    if self._pattern is None:
+      return []
+    found: set[str] = set()
+    for m in self._pattern.finditer(text):
+      kw = " ".join(m.group(1).lower().split())
+      found.add(kw)
+      found.update(self._implied.get(kw, ()))
+    return sorted(found)
+
+  def categorize(self, hits: List[str]) -> Dict[str, List[str]]:
+    """Group matched keywords by the config category (rate_limits, pricing, ...) they came from."""
+    grouped: Dict[str, List[str]] = {}
+    for kw in hits:
+      for category in self.keyword_categories.get(kw, ()):
+        grouped.setdefault(category, []).append(kw)
+    return grouped
+
+  def categories(self, hits: List[str]) -> List[str]:
+    return sorted(self.categorize(hits))
@@ -1,10 +1,105 @@
 from __future__ import annotations
 
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, List
 
-analyzer = SentimentIntensityAnalyzer()
+# Bounded memo of compound scores keyed by text hash; cross-posts and re-ingested
+# items are scored once per process.
+CACHE_SIZE = 50_000
+# Below this many uncached texts, process-pool startup costs more than it saves.
+PARALLEL_THRESHOLD = 256
+
+_cache: "OrderedDict[str, float]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def get_analyzer():
+  """Build the VADER analyzer on first use rather than at import time."""
+  from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+  return SentimentIntensityAnalyzer()
+
+
+def _text_key(text: str) -> str:
+  return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def pool_context():
+  """
+  Start method for worker pools. Callers include the daemon's job threads, and forking
+  a multithreaded process (or one with an open DB cursor) can copy a lock another
+  thread holds (cache, logging, the HTTP loop), so workers start clean instead.
+  """
+  methods = multiprocessing.get_all_start_methods()
+  return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _score_chunk(texts: List[str]) -> List[float]:
+  analyzer = get_analyzer()
+  return [float(analyzer.polarity_scores(text)["compound"]) for text in texts]
 
 
 def score(text: str) -> float:
   """Return compound sentiment score in [-1, 1]."""
-  return float(analyzer.polarity_scores(text)["compound"])
+  return score_batch([text])[0]
+
+
+def scoring_pool(workers: int | None = None) -> ProcessPoolExecutor | None:
+  """
+  A process pool to pass to `score_batch` across many calls, so workers start
+  and load VADER once per run rather than once per batch. None for one worker.
+  """
+  workers = workers if workers is not None else (os.cpu_count() or 1)
+  if workers <= 1:
+    return None
+  return ProcessPoolExecutor(max_workers=workers, mp_context=pool_context())
+
+
+def score_batch(texts: Iterable[str], workers: int | None = None, executor: Executor | None = None) -> List[float]:
+  """
+  Score many texts at once, in input order. Cached texts are served from the
+  memo; large batches of new texts fan out over `executor` if given (see
+  `scoring_pool`), else over a process pool started for this call.
+  """
+  texts = list(texts)
+  keys = [_text_key(text) for text in texts]
+  scores: Dict[str, float] = {}
+  missing: Dict[str, str] = {}
+  with _cache_lock:
+    for key, text in zip(keys, texts):
+      if key in _cache:
+        _cache.move_to_end(key)
+        scores[key] = _cache[key]
+      else:
+        missing.setdefault(key, text)
+
+  if missing:
+    miss_keys = list(missing)
+    miss_texts = [missing[key] for key in miss_keys]
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    if workers > 1 and len(miss_texts) >= PARALLEL_THRESHOLD:
+      size = -(-len(miss_texts) // (workers * 4))  # a few chunks per worker evens out long posts
+      chunks = [miss_texts[i : i + size] for i in range(0, len(miss_texts), size)]
+      if executor is not None:
+        fresh = [value for part in executor.map(_score_chunk, chunks) for value in part]
+      else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as pool:
+          fresh = [value for part in pool.map(_score_chunk, chunks) for value in part]
+    else:
+      fresh = _score_chunk(miss_texts)
+
+    with _cache_lock:
+      for key, value in zip(miss_keys, fresh):
+        _cache[key] = value
+        scores[key] = value
+      while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+  return [scores[key] for key in keys]
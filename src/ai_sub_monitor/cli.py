@@ -3,29 +3,29 @@ from __future__ import annotations
 import shutil
 from datetime import date
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 import click
 from rich.console import Console
+from rich.markup import escape
 from rich.table import Table
 
 from . import __version__
-from .collectors import docs as docs_collector
-from .collectors import github as github_collector
-from .collectors import pricing as pricing_collector
-from .collectors import reddit as reddit_collector
-from .config import default_db_path, ensure_data_dirs, load_sources_and_keywords
-from .db import Company, FinancialEvent, init_db, session_scope
-from .reporters.weekly import generate_weekly_report
-from .utils.models import update_models
+from .config import data_root, default_db_path, ensure_data_dirs, load_sources_and_keywords
+
+# Command bodies import what they need, so `--version`, `sources` and friends
+# don't load SQLAlchemy, the collectors or their HTTP/parsing/sentiment stacks
+# (benchmarks/startup.py checks this).
 
 console = Console()
 
 
-def _seed_companies():
+def _seed_companies(db_path: Path | None = None):
+    from .db import Company, session_scope
+
     sources, _ = load_sources_and_keywords()
     companies = sources.get("companies", {})
-    with session_scope() as session:
+    with session_scope(db_path) as session:
         for cid, info in companies.items():
             if session.get(Company, cid):
                 continue
@@ -53,10 +53,12 @@ def cli(ctx: click.Context, db_path: Path):
 @click.pass_context
 def init(ctx: click.Context):
     """Initialize local folders, database, and seed company metadata."""
+    from .db import init_db
+
     db_path: Path = ctx.obj["db_path"]
     ensure_data_dirs()
     init_db(db_path)
-    _seed_companies()
+    _seed_companies(db_path)
 
     # copy spreadsheet templates into data/models for safe keeping
     root = Path(__file__).resolve().parents[2]
@@ -64,7 +66,7 @@ def init(ctx: click.Context):
         "subscription_economics.xlsx",
         "subscriber_mix_model.xlsx",
     }
-    dest_dir = root / "data" / "models"
+    dest_dir = data_root() / "models"
     dest_dir.mkdir(parents=True, exist_ok=True)
     for filename in src_files:
         src = root / filename
@@ -79,26 +81,31 @@ def init(ctx: click.Context):
 @cli.command()
 @click.option(
     "--source",
-    type=click.Choice(["all", "pricing", "reddit", "github", "docs"], case_sensitive=False),
     default="all",
-    help="Collector to run.",
+    help="Collector to run: all, pricing, reddit, github, docs, or an installed plugin.",
 )
 @click.pass_context
 def collect(ctx: click.Context, source: str):
     """Run one or more data collectors."""
+    from .collectors import available_collectors, run_collector
+    from .db import init_db
+    from .utils.locks import job_lock
+
     db_path: Path = ctx.obj["db_path"]
+    source = source.lower()
+    names = available_collectors()
+    if source != "all" and source not in names:
+        raise click.BadParameter(f"{source!r} is not one of all, {', '.join(names)}.", param_hint="'--source'")
     ensure_data_dirs()
     init_db(db_path)
 
     sources, keywords = load_sources_and_keywords()
-    if source in ("all", "pricing"):
-        pricing_collector.run(sources)
-    if source in ("all", "reddit"):
-        reddit_collector.run(sources, keywords)
-    if source in ("all", "github"):
-        github_collector.run(sources, keywords)
-    if source in ("all", "docs"):
-        docs_collector.run(sources)
+    for name in names if source == "all" else [source]:
+        with job_lock(name) as acquired:
+            if not acquired:
+                console.print(f"[yellow]Skipping {name}: already running in another process[/yellow]")
+                continue
+            run_collector(name, sources, keywords, db_path=db_path)
 
     console.print("[green]Collect step finished (see logs for details).[/green]")
 
@@ -106,18 +113,49 @@ def collect(ctx: click.Context, source: str):
 @cli.command("report")
 @click.option("--week", "week_start", type=click.DateTime(formats=["%Y-%m-%d"]), required=False)
 @click.option("--latest", is_flag=True, help="Generate for the most recent Monday.")
+@click.option(
+    "--from",
+    "range_from",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    required=False,
+    help="Generate every week from this date (use with --to; defaults to the --to week).",
+)
+@click.option(
+    "--to",
+    "range_to",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    required=False,
+    help="Last date of the range (defaults to today).",
+)
 @click.pass_context
-def report_cmd(ctx: click.Context, week_start, latest: bool):
-    """Generate a weekly markdown report."""
+def report_cmd(ctx: click.Context, week_start, latest: bool, range_from, range_to):
+    """Generate weekly markdown reports."""
+    from .db import init_db
+    from .reporters.weekly import generate_weekly_report, generate_weekly_reports
+    from .utils.locks import job_lock
+
     db_path: Path = ctx.obj["db_path"]
+    if (range_from or range_to) and (week_start or latest):
+        raise click.UsageError("--from/--to can't be combined with --week or --latest.")
     ensure_data_dirs()
     init_db(db_path)
-    week: Optional[date] = None
-    if latest:
-        week = date.today()
-    elif week_start:
-        week = week_start.date()
-    path = generate_weekly_report(week_start=week, db_path=db_path)
+    with job_lock("report") as acquired:
+        if not acquired:
+            raise click.ClickException("A report run is already going in another process.")
+        if range_from or range_to:
+            last = range_to.date() if range_to else date.today()
+            first = range_from.date() if range_from else last  # --to alone: just that week
+            if last < first:
+                raise click.UsageError("--to must not be before --from.")
+            paths = generate_weekly_reports(first, last, db_path=db_path)
+            console.print(f"[green]Generated {len(paths)} reports ({paths[0].name} to {paths[-1].name})[/green]")
+            return
+        week: Optional[date] = None
+        if latest:
+            week = date.today()
+        elif week_start:
+            week = week_start.date()
+        path = generate_weekly_report(week_start=week, db_path=db_path)
     console.print(f"[green]Report generated at {path}[/green]")
 
 
@@ -125,11 +163,22 @@ def report_cmd(ctx: click.Context, week_start, latest: bool):
 @click.pass_context
 def update_models_cmd(ctx: click.Context):
     """Update spreadsheet copies in data/models with latest pricing."""
+    from .db import init_db
+    from .utils.locks import job_lock
+    from .utils.models import update_models
+
     db_path: Path = ctx.obj["db_path"]
     ensure_data_dirs()
     init_db(db_path)
-    update_models(db_path=db_path)
-    console.print("[green]Updated spreadsheets in data/models/ (sheet: LatestPricing).[/green]")
+    with job_lock("update-models") as acquired:
+        if not acquired:
+            raise click.ClickException("update-models is already running in another process.")
+        written = update_models(db_path=db_path)
+    if not written:
+        console.print("[green]Latest pricing unchanged; spreadsheets in data/models/ left as they are.[/green]")
+        return
+    names = ", ".join(path.name for path in written)
+    console.print(f"[green]Updated {names} in data/models/ (sheet: LatestPricing).[/green]")
 
 
 @cli.command("add-event")
@@ -152,6 +201,8 @@ def add_event(
     notes: str | None,
 ):
     """Manually add a financial event."""
+    from .db import FinancialEvent, init_db, session_scope
+
     db_path: Path = ctx.obj["db_path"]
     ensure_data_dirs()
     init_db(db_path)
@@ -169,6 +220,506 @@ def add_event(
     console.print("[green]Financial event added.[/green]")
 
 
+@cli.command("show-snapshot")
+@click.argument("snapshot_id")
+@click.option("--diff", "show_diff", is_flag=True, help="Print the stored diff against the previous snapshot.")
+@click.pass_context
+def show_snapshot(ctx: click.Context, snapshot_id: str, show_diff: bool):
+    """Print an archived pricing/docs page (or its diff) from the blob store."""
+    from .db import DocumentationSnapshot, PricingSnapshot, init_db, session_scope
+    from .utils.blobs import BlobStore, snapshot_html
+
+    db_path: Path = ctx.obj["db_path"]
+    init_db(db_path)
+    with session_scope(db_path) as session:
+        snap = session.get(PricingSnapshot, snapshot_id) or session.get(DocumentationSnapshot, snapshot_id)
+        if snap is None:
+            raise click.ClickException(f"No snapshot with id {snapshot_id}")
+        if show_diff:
+            if not snap.diff_blob_id:
+                raise click.ClickException("Snapshot has no stored diff (first capture or legacy row).")
+            click.echo(BlobStore().get(snap.diff_blob_id))
+        else:
+            click.echo(snapshot_html(snap))
+
+
+@cli.command()
+@click.option(
+    "--daily-days",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Keep one snapshot per day for this many days (default from config).",
+)
+@click.option(
+    "--keyframe-every", type=click.IntRange(min=1), default=None, help="Store every Nth version of a page in full."
+)
+@click.option("--dry-run", is_flag=True, help="Report what would change without touching anything.")
+@click.option("--vacuum/--no-vacuum", default=True, help="VACUUM the database afterwards to return freed pages.")
+@click.pass_context
+def compact(ctx: click.Context, daily_days: int | None, keyframe_every: int | None, dry_run: bool, vacuum: bool):
+    """Apply snapshot retention and store page history as delta chains."""
+    from .db import init_db
+    from .utils.compaction import compact as compact_snapshots
+    from .utils.compaction import retention_options
+    from .utils.locks import job_lock
+
+    db_path: Path = ctx.obj["db_path"]
+    init_db(db_path)
+    sources, _ = load_sources_and_keywords()
+    try:
+        opts = retention_options(sources)
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+    # collectors put a page's blob before committing its row, so they must not run meanwhile
+    with job_lock("pricing") as pricing_free, job_lock("docs") as docs_free:
+        if not (pricing_free and docs_free):
+            raise click.ClickException("A pricing or docs collect is running; try compact again once it finishes.")
+        stats = compact_snapshots(
+            db_path,
+            daily_days=daily_days if daily_days is not None else opts["daily_days"],
+            keyframe_interval=keyframe_every if keyframe_every is not None else opts["keyframe_interval"],
+            dry_run=dry_run,
+        )
+    if vacuum and not dry_run:
+        with init_db(db_path).connect() as conn:
+            conn.exec_driver_sql("VACUUM")
+
+    table = Table(title="Compaction" + (" (dry run)" if dry_run else ""))
+    table.add_column("Step")
+    table.add_column("Count", justify="right")
+    table.add_row("Inline bodies moved to blobs", str(stats.legacy_rows_moved))
+    table.add_row("Legacy diffs linked to snapshots", str(stats.legacy_diffs_linked))
+    table.add_row("Legacy snapshot files removed", str(stats.legacy_files_removed))
+    table.add_row("Snapshots pruned by retention", str(stats.snapshots_pruned))
+    table.add_row("Keyframes", str(stats.keyframes))
+    table.add_row("Deltas", str(stats.deltas))
+    table.add_row("Unreferenced blobs removed", str(stats.blobs_removed))
+    console.print(table)
+    console.print(
+        f"[green]Blob store: {stats.bytes_before / 1024:.1f} KiB -> {stats.bytes_after / 1024:.1f} KiB[/green]"
+    )
+
+
+@cli.command()
+@click.option("--kind", type=click.Choice(["pricing", "docs", "all"]), default="all", show_default=True)
+@click.option("--company", type=str, required=False, help="Only this company id.")
+@click.option("--since", type=click.DateTime(formats=["%Y-%m-%d"]), required=False, help="First capture day to replay.")
+@click.option("--until", type=click.DateTime(formats=["%Y-%m-%d"]), required=False, help="Last capture day to replay.")
+@click.option("--workers", type=int, default=None, help="Worker processes (default: one per CPU).")
+@click.option("--batch-size", type=int, default=500, show_default=True, help="Rows per write-back batch.")
+@click.option("--dry-run", is_flag=True, help="Report what would change without writing anything.")
+@click.pass_context
+def replay(ctx: click.Context, kind: str, company, since, until, workers, batch_size: int, dry_run: bool):
+    """Re-run extraction, hashing and diffing over archived snapshots (no network)."""
+    from datetime import timedelta
+
+    from .db import init_db
+    from .utils.replay import replay as replay_snapshots
+
+    db_path: Path = ctx.obj["db_path"]
+    init_db(db_path)
+    sources, _ = load_sources_and_keywords()
+    stats = replay_snapshots(
+        sources,
+        db_path,
+        kinds=["pricing", "docs"] if kind == "all" else [kind],
+        company=company,
+        since=since,
+        until=until + timedelta(days=1) if until else None,
+        workers=workers,
+        batch_size=batch_size,
+        dry_run=dry_run,
+    )
+
+    table = Table(title="Replay" + (" (dry run)" if dry_run else ""))
+    table.add_column("Step")
+    table.add_column("Count", justify="right")
+    table.add_row("Pages", str(stats.pages))
+    table.add_row("Snapshots replayed", str(stats.snapshots))
+    table.add_row("Snapshots without an archived body", str(stats.missing))
+    table.add_row("Content hashes changed", str(stats.hashes_changed))
+    table.add_row("Extracted prices changed", str(stats.features_changed))
+    table.add_row("Change flags flipped", str(stats.changes_flipped))
+    table.add_row("Diffs changed", str(stats.diffs_changed))
+    table.add_row("Rows " + ("to update" if dry_run else "updated"), str(stats.rows_updated))
+    console.print(table)
+    rate = stats.snapshots / stats.seconds if stats.seconds else 0.0
+    console.print(f"[green]Replayed {stats.snapshots} snapshots in {stats.seconds:.1f}s ({rate:.0f}/s)[/green]")
+
+
+@cli.command()
+@click.option("--sentiment/--no-sentiment", default=True, show_default=True, help="Recompute sentiment scores.")
+@click.option("--keywords/--no-keywords", default=True, show_default=True, help="Re-match keywords and categories.")
+@click.option("--company", type=str, required=False, help="Only this company id.")
+@click.option("--source", type=str, required=False, help="Only this source (reddit, github, ...).")
+@click.option("--since", type=click.DateTime(formats=["%Y-%m-%d"]), required=False)
+@click.option("--until", type=click.DateTime(formats=["%Y-%m-%d"]), required=False)
+@click.option("--chunk-size", type=int, default=5000, show_default=True, help="Signals read and written per batch.")
+@click.option("--workers", type=int, default=None, help="Sentiment worker processes (default: one per CPU).")
+@click.option("--restart", is_flag=True, help="Ignore a saved checkpoint and start from the first signal.")
+@click.option("--dry-run", is_flag=True, help="Count what would change without writing anything.")
+@click.pass_context
+def rescore(
+    ctx: click.Context,
+    sentiment: bool,
+    keywords: bool,
+    company,
+    source,
+    since,
+    until,
+    chunk_size: int,
+    workers,
+    restart: bool,
+    dry_run: bool,
+):
+    """Recompute sentiment and keyword matches for stored community signals."""
+    from datetime import timedelta
+
+    from .db import init_db
+    from .utils.rescore import rescore as rescore_signals
+
+    if not sentiment and not keywords:
+        raise click.UsageError("Nothing to do: both --no-sentiment and --no-keywords given.")
+    db_path: Path = ctx.obj["db_path"]
+    init_db(db_path)
+    _, keywords_config = load_sources_and_keywords()
+    stats = rescore_signals(
+        keywords_config,
+        db_path,
+        sentiment=sentiment,
+        keywords=keywords,
+        company=company,
+        source=source,
+        since=since,
+        until=until + timedelta(days=1) if until else None,
+        chunk_size=chunk_size,
+        workers=workers,
+        restart=restart,
+        dry_run=dry_run,
+    )
+    if stats.resumed:
+        console.print("[yellow]Resumed from a saved checkpoint; counts cover this run only.[/yellow]")
+    rate = stats.scanned / stats.seconds if stats.seconds else 0.0
+    console.print(
+        f"[green]{'Would update' if dry_run else 'Updated'} {stats.rows_updated} of {stats.scanned} signals "
+        f"({stats.sentiment_changed} sentiment, {stats.keywords_changed} keyword changes) "
+        f"in {stats.seconds:.1f}s ({rate:.0f}/s)[/green]"
+    )
+
+
+@cli.command()
+@click.argument("query", required=False)
+@click.option("--company", type=str, required=False, help="Only this company id.")
+@click.option(
+    "--source",
+    type=click.Choice(["reddit", "github", "pricing", "docs"]),
+    required=False,
+    help="Only this source.",
+)
+@click.option("--since", type=click.DateTime(formats=["%Y-%m-%d"]), required=False)
+@click.option("--until", type=click.DateTime(formats=["%Y-%m-%d"]), required=False)
+@click.option("--limit", type=int, default=20, show_default=True)
+@click.option("--reindex", is_flag=True, help="Rebuild the full-text index (needed once for older snapshots).")
+@click.pass_context
+def search(ctx: click.Context, query: str | None, company, source, since, until, limit: int, reindex: bool):
+    """Full-text search over community signals and pricing/docs page text."""
+    from .db import init_db
+    from .utils.search import HIGHLIGHT_END, HIGHLIGHT_START, rebuild_search_index
+    from .utils.search import search as search_index
+
+    db_path: Path = ctx.obj["db_path"]
+    init_db(db_path)
+    if reindex:
+        sources, _ = load_sources_and_keywords()
+        count = rebuild_search_index(sources, db_path)
+        console.print(f"[green]Indexed {count} signals and snapshots.[/green]")
+    if not query:
+        if not reindex:
+            raise click.UsageError("Missing QUERY.")
+        return
+
+    hits = search_index(
+        query,
+        db_path,
+        company=company,
+        source=source,
+        since=since.date() if since else None,
+        until=until.date() if until else None,
+        limit=limit,
+    )
+    if not hits:
+        console.print("[yellow]No matches.[/yellow]")
+        return
+    for hit in hits:
+        snippet = escape(" ".join(hit.snippet.split()))
+        snippet = snippet.replace(HIGHLIGHT_START, "[bold yellow]").replace(HIGHLIGHT_END, "[/bold yellow]")
+        console.print(f"[cyan]{hit.captured_at[:16]}[/cyan] {hit.company_id}/{hit.source} [dim]{hit.ref_id}[/dim]")
+        if hit.url:
+            console.print(f"  {escape(hit.url)}")
+        console.print(f"  {snippet}")
+
+
+@cli.command()
+@click.pass_context
+def daemon(ctx: click.Context):
+    """Run collectors, models and reports on the cadences under `schedule:` in sources.yaml."""
+    import signal
+
+    from .analyzers.sentiment import get_analyzer
+    from .db import dispose_engines, init_db
+    from .utils.http import disable_warm_clients, enable_warm_clients
+    from .utils.scheduler import Scheduler
+
+    db_path: Path = ctx.obj["db_path"]
+    ensure_data_dirs()
+    init_db(db_path)
+    _seed_companies(db_path)
+    sources, _ = load_sources_and_keywords()
+    scheduler = Scheduler.from_config(sources, db_path)
+
+    # Everything below stays loaded for the life of the process.
+    enable_warm_clients()
+    get_analyzer()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: scheduler.stop())
+    table = Table(title="Scheduled jobs")
+    table.add_column("Job")
+    table.add_column("Every", justify="right")
+    table.add_column("Group")
+    for job in scheduler.jobs:
+        table.add_row(job.name, f"{job.interval / 3600:g}h", job.group)
+    console.print(table)
+    try:
+        scheduler.run()
+    finally:
+        disable_warm_clients()
+        dispose_engines()
+    console.print("[green]Daemon stopped.[/green]")
+
+
+@cli.command()
+@click.option("--collector", type=str, required=False, help="Only this collector.")
+@click.option("--runs", "run_limit", type=int, default=10, show_default=True, help="Recent runs to list.")
+@click.option("--days", type=int, default=7, show_default=True, help="Window for the stage and slowest-URL tables.")
+@click.option(
+    "--prometheus",
+    "textfile",
+    type=click.Path(path_type=Path),
+    required=False,
+    help="Also write the latest run of each collector to this Prometheus textfile.",
+)
+@click.pass_context
+def stats(ctx: click.Context, collector: str | None, run_limit: int, days: int, textfile: Path | None):
+    """Show recent collector runs, where their time went, and the slowest URLs and feeds."""
+    from datetime import datetime, timedelta
+
+    from .db import init_db
+    from .utils.metrics import recent_runs, slowest_targets, stage_totals, write_prometheus_textfile
+
+    db_path: Path = ctx.obj["db_path"]
+    init_db(db_path)
+    runs = recent_runs(db_path, collector=collector, limit=run_limit)
+    if not runs:
+        console.print("[yellow]No collector runs recorded yet.[/yellow]")
+        return
+
+    table = Table(title="Recent collector runs")
+    for column in ("Started (UTC)", "Collector", "Status"):
+        table.add_column(column)
+    for column in ("Seconds", "Fetched", "Inserted", "Skipped", "KiB", "Errors"):
+        table.add_column(column, justify="right")
+    colors = {"ok": "green", "error": "red"}
+    for run in runs:
+        color = colors.get(run.status, "yellow")
+        table.add_row(
+            f"{run.started_at:%m-%d %H:%M:%S}",
+            run.collector,
+            f"[{color}]{run.status}[/{color}]",
+            f"{run.duration_seconds:.2f}",
+            str(run.items_fetched),
+            str(run.rows_inserted),
+            str(run.rows_skipped),
+            f"{run.bytes_fetched / 1024:.0f}",
+            str(run.errors),
+        )
+    console.print(table)
+    for run in runs:
+        if run.error:
+            console.print(f"[red]{run.started_at:%Y-%m-%d %H:%M} {run.collector}: {escape(run.error)}[/red]")
+
+    since = datetime.utcnow() - timedelta(days=days)
+    totals = stage_totals(db_path, since=since, collector=collector)
+    per_collector: Dict[str, float] = {}
+    for row in totals:
+        per_collector[row["collector"]] = per_collector.get(row["collector"], 0.0) + row["seconds"]
+    table = Table(title=f"Time by stage, last {days} days")
+    table.add_column("Collector")
+    table.add_column("Stage")
+    for column in ("Runs", "Seconds", "Share", "Items"):
+        table.add_column(column, justify="right")
+    for row in totals:
+        share = row["seconds"] / per_collector[row["collector"]] if per_collector[row["collector"]] else 0.0
+        table.add_row(
+            row["collector"],
+            row["stage"],
+            str(row["runs"]),
+            f"{row['seconds']:.2f}",
+            f"{share:.0%}",
+            str(row["items"] or ""),
+        )
+    console.print(table)
+
+    table = Table(title=f"Slowest URLs and feeds, last {days} days")
+    table.add_column("Collector")
+    table.add_column("URL / feed")
+    for column in ("Fetches", "Mean s", "Max s", "Mean KiB", "Errors"):
+        table.add_column(column, justify="right")
+    for row in slowest_targets(db_path, since=since, collector=collector):
+        table.add_row(
+            row["collector"],
+            escape(row["target"]),
+            str(row["samples"]),
+            f"{row['mean_seconds']:.2f}",
+            f"{row['max_seconds']:.2f}",
+            f"{(row['mean_bytes'] or 0) / 1024:.0f}",
+            str(row["errors"]),
+        )
+    console.print(table)
+    console.print("[dim]Fetches run concurrently, so fetch seconds can exceed a run's wall time.[/dim]")
+
+    if textfile:
+        write_prometheus_textfile(textfile, db_path)
+        console.print(f"[green]Wrote Prometheus metrics to {textfile}[/green]")
+
+
+@cli.command()
+@click.argument("dataset", type=click.Choice(["signals", "pricing", "snapshots", "events"]))
+@click.argument("output", type=click.Path(dir_okay=False, path_type=Path))
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["parquet", "csv", "ndjson"]),
+    default=None,
+    help="Output format (default: from the file suffix, else parquet). .csv.gz / .ndjson.gz are compressed.",
+)
+@click.option("--company", type=str, required=False, help="Only this company id.")
+@click.option("--source", type=str, required=False, help="Signal source (reddit, github, ...) or snapshot kind.")
+@click.option("--since", type=click.DateTime(formats=["%Y-%m-%d"]), required=False)
+@click.option("--until", type=click.DateTime(formats=["%Y-%m-%d"]), required=False)
+@click.option("--columns", type=str, required=False, help="Comma-separated subset of columns to export.")
+@click.option("--batch-size", type=int, default=50000, show_default=True, help="Rows per record batch / row group.")
+@click.pass_context
+def export(ctx: click.Context, dataset: str, output: Path, fmt, company, source, since, until, columns, batch_size: int):
+    """Stream signals, extracted prices, snapshot metadata or financial events to a file."""
+    from datetime import timedelta
+
+    from .db import init_db
+    from .utils.export import export as export_dataset
+
+    db_path: Path = ctx.obj["db_path"]
+    init_db(db_path)
+    try:
+        stats = export_dataset(
+            dataset,
+            output,
+            db_path,
+            fmt=fmt,
+            company=company,
+            source=source,
+            since=since.date() if since else None,
+            until=(until + timedelta(days=1)).date() if until else None,
+            columns=[name.strip() for name in columns.split(",") if name.strip()] if columns else None,
+            batch_size=batch_size,
+        )
+    except (ValueError, RuntimeError) as exc:
+        raise click.ClickException(str(exc)) from exc
+    rate = stats.rows / stats.seconds if stats.seconds else 0.0
+    console.print(
+        f"[green]Exported {stats.rows} {dataset} rows to {output} ({stats.bytes / 1024:.1f} KiB) "
+        f"in {stats.seconds:.1f}s ({rate:.0f} rows/s)[/green]"
+    )
+
+
+@cli.command()
+@click.option("--since", type=click.DateTime(formats=["%Y-%m-%d"]), required=False, help="Default: 28 days ago.")
+@click.option("--until", type=click.DateTime(formats=["%Y-%m-%d"]), required=False)
+@click.option("--company", type=str, required=False, help="Only this company id.")
+@click.option("--threshold", type=float, default=3.5, show_default=True, help="|z| that flags a spike or drop.")
+@click.pass_context
+def anomalies(ctx: click.Context, since, until, company, threshold: float):
+    """List volume and sentiment spikes, drops and level shifts per company and source."""
+    from datetime import timedelta
+
+    from .analyzers.anomaly import detect_anomalies
+    from .db import init_db
+
+    db_path: Path = ctx.obj["db_path"]
+    init_db(db_path)
+    found = detect_anomalies(
+        db_path,
+        first=since.date() if since else date.today() - timedelta(days=28),
+        last=until.date() if until else None,
+        company=company,
+        z_threshold=threshold,
+    )
+    if not found:
+        console.print("[green]No anomalies.[/green]")
+        return
+    table = Table(title="Signal anomalies")
+    table.add_column("Day")
+    table.add_column("Company")
+    table.add_column("Source")
+    table.add_column("Metric")
+    table.add_column("Kind")
+    table.add_column("Value", justify="right")
+    table.add_column("Baseline", justify="right")
+    table.add_column("Score", justify="right")
+    for a in found:
+        fmt = "{:+.2f}" if a.metric == "sentiment" else "{:.1f}"
+        color = "red" if a.metric == "sentiment" and a.score < 0 else "yellow"
+        table.add_row(
+            a.day.isoformat(),
+            a.company_id,
+            a.source,
+            a.metric,
+            f"[{color}]{a.kind}[/{color}]",
+            fmt.format(a.value),
+            fmt.format(a.baseline),
+            f"{a.score:+.1f}",
+        )
+    console.print(table)
+
+
+@cli.command("rebuild-rollups")
+@click.pass_context
+def rebuild_rollups_cmd(ctx: click.Context):
+    """Recompute the daily rollup tables the weekly report reads from."""
+    from sqlalchemy import select, update
+
+    from .analyzers.keywords import KeywordMatcher
+    from .db import CommunitySignal, init_db, rebuild_rollups, session_scope
+
+    db_path: Path = ctx.obj["db_path"]
+    init_db(db_path)
+    _, keywords = load_sources_and_keywords()
+    matcher = KeywordMatcher.from_config(keywords)
+    with session_scope(db_path) as session:
+        # signals stored before categories were recorded get them from their matched keywords
+        untagged = session.execute(
+            select(CommunitySignal.id, CommunitySignal.keywords_matched).where(
+                CommunitySignal.keyword_categories.is_(None)
+            )
+        ).all()
+        if untagged:
+            session.execute(
+                update(CommunitySignal),
+                [{"id": sid, "keyword_categories": matcher.categories(hits or [])} for sid, hits in untagged],
+            )
+            console.print(f"[cyan]Tagged {len(untagged)} older signals with keyword categories[/cyan]")
+        rebuild_rollups(session)
+    console.print("[green]Daily rollups rebuilt.[/green]")
+
+
 @cli.command()
 @click.pass_context
 def sources(ctx: click.Context):
@@ -1 +1,71 @@
-"""Collector modules for different data sources."""
+"""
+Collector modules for different data sources.
+
+Collectors are looked up by name and imported only when one is run, so CLI
+commands that don't collect never load praw, httpx or the HTML parsers.
+Other packages can add a collector by declaring an entry point in the
+`ai_sub_monitor.collectors` group that resolves to a module (or callable) with
+
+    run(sources_config, [keywords_config,] db_path=None)
+
+Collectors that take `keywords_config` are passed config/keywords.yaml. Every
+run is recorded in `collector_runs`; a collector can add per-stage timings
+through `utils.metrics.current_run()`.
+"""
+from __future__ import annotations
+
+import importlib
+import inspect
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ENTRY_POINT_GROUP = "ai_sub_monitor.collectors"
+
+# Built-in collectors in the order `collect --source all` runs them.
+BUILTIN_COLLECTORS = {
+    "pricing": "ai_sub_monitor.collectors.pricing",
+    "reddit": "ai_sub_monitor.collectors.reddit",
+    "github": "ai_sub_monitor.collectors.github",
+    "docs": "ai_sub_monitor.collectors.docs",
+}
+
+
+@lru_cache(maxsize=1)
+def _entry_points() -> Dict[str, Any]:
+    from importlib.metadata import entry_points
+
+    return {ep.name: ep for ep in entry_points(group=ENTRY_POINT_GROUP)}
+
+
+def available_collectors() -> List[str]:
+    """Built-in collector names followed by any installed through entry points."""
+    plugins = sorted(name for name in _entry_points() if name not in BUILTIN_COLLECTORS)
+    return list(BUILTIN_COLLECTORS) + plugins
+
+
+def load_collector(name: str) -> Callable[..., Any]:
+    """Import the named collector and return its `run` function."""
+    if name in BUILTIN_COLLECTORS:
+        target = importlib.import_module(BUILTIN_COLLECTORS[name])
+    elif name in _entry_points():
+        target = _entry_points()[name].load()
+    else:
+        raise KeyError(f"Unknown collector {name!r}; choose from {available_collectors()}")
+    return getattr(target, "run", target)
+
+
+def run_collector(
+    name: str,
+    sources_config: Dict[str, Any],
+    keywords_config: Dict[str, Any],
+    db_path: Path | None = None,
+):
+    """Run a collector, recording its timings and counters in `collector_runs`."""
+    from ..utils.metrics import track_run
+
+    run = load_collector(name)
+    with track_run(name, db_path, sources_config):
+        if "keywords_config" in inspect.signature(run).parameters:
+            return run(sources_config, keywords_config, db_path=db_path)
+        return run(sources_config, db_path=db_path)
@@ -1,30 +1,41 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from typing import Any, Dict, List
 
-from github import Github
+import httpx
 from rich.console import Console
-from sqlalchemy import select
 
-from ..analyzers.sentiment import score as sentiment_score
-from ..db import CommunitySignal, session_scope
+from ..analyzers.keywords import KeywordMatcher
+from ..analyzers.sentiment import score_batch
+from ..db import CollectorCursor, insert_signals, known_signal_ids, load_cursors, save_cursor, session_scope
+from ..utils.http import async_client, run_async
+from ..utils.metrics import current_run
 
 console = Console()
 
+DEFAULT_API_URL = "https://api.github.com"
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_PAGES = 10
+# Stop paging once the hourly quota drops this low, leaving room for other tools.
+DEFAULT_MIN_RATE_REMAINING = 200
 
-def _keyword_hits(text: str, keywords: List[str]) -> List[str]:
-    text_l = text.lower()
-    return [kw for kw in keywords if kw in text_l]
 
-
-def _collect_keywords(keywords_config: Dict[str, Any]) -> List[str]:
-    kws: List[str] = []
-    for val in keywords_config.values():
-        if isinstance(val, list):
-            kws.extend(val)
-    return sorted(set(kw.lower() for kw in kws))
+@dataclass
+class RepoScan:
+    repo: str
+    issues: List[Dict[str, Any]] = field(default_factory=list)
+    since: str = ""
+    etag: str | None = None
+    not_modified: bool = False
+    error: Exception | None = None
+    elapsed: float = 0.0
+    bytes: int = 0
 
 
 def _map_repo_to_company(sources_config: Dict[str, Any]) -> Dict[str, str]:
@@ -35,69 +46,185 @@ def _map_repo_to_company(sources_config: Dict[str, Any]) -> Dict[str, str]:
     return mapping
 
 
-def run(sources_config: Dict[str, Any], keywords_config: Dict[str, Any], lookback_hours: int = 24):
+def _options(sources_config: Dict[str, Any]) -> Dict[str, Any]:
+    opts = sources_config.get("github", {}) or {}
+    return {
+        "api_url": str(opts.get("api_url", DEFAULT_API_URL)).rstrip("/"),
+        "max_concurrency": int(opts.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)),
+        "max_pages": int(opts.get("max_pages_per_repo", DEFAULT_MAX_PAGES)),
+        "min_rate_remaining": int(opts.get("min_rate_remaining", DEFAULT_MIN_RATE_REMAINING)),
+    }
+
+
+def _iso(ts: datetime) -> str:
+    return ts.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+async def _scan_repo(
+    client: httpx.AsyncClient,
+    gate: asyncio.Semaphore,
+    repo: str,
+    cursor: CollectorCursor | None,
+    default_since: str,
+    opts: Dict[str, Any],
+) -> RepoScan:
+    """
+    List issues updated since the repo's high-water mark, oldest first, so a run
+    cut short by the page budget still advances the cursor without gaps.
+    """
+    since = (cursor.position if cursor else None) or default_since
+    scan = RepoScan(repo=repo, since=since)
+    headers = {}
+    # GitHub doesn't charge quota for 304s; an ETag is only valid for the exact `since` it was issued for.
+    if cursor and cursor.etag and cursor.etag_position == since:
+        headers["If-None-Match"] = cursor.etag
+    url: str | None = f"{opts['api_url']}/repos/{repo}/issues"
+    params: Dict[str, Any] | None = {
+        "state": "all",
+        "since": since,
+        "sort": "updated",
+        "direction": "asc",
+        "per_page": 100,
+    }
+    async with gate:
+        started = time.perf_counter()
+        try:
+            pages = 0
+            while url and pages < opts["max_pages"]:
+                resp = await client.get(url, params=params, headers=headers)
+                if resp.status_code == 304:
+                    scan.not_modified = True
+                    scan.etag = cursor.etag if cursor else None
+                    break
+                resp.raise_for_status()
+                scan.bytes += len(resp.content)
+                if pages == 0:
+                    scan.etag = resp.headers.get("ETag")
+                scan.issues.extend(resp.json())
+                pages += 1
+                remaining = int(resp.headers.get("X-RateLimit-Remaining", opts["min_rate_remaining"] + 1))
+                if remaining <= opts["min_rate_remaining"]:
+                    console.print(f"[yellow]{repo}: stopping early, {remaining} API calls left this hour[/yellow]")
+                    break
+                # `next` links already carry the query string
+                url, params, headers = resp.links.get("next", {}).get("url"), None, {}
+        except Exception as exc:
+            scan.error = exc
+        scan.elapsed = time.perf_counter() - started
+    return scan
+
+
+async def _scan_all(
+    token: str, repos: List[str], cursors: Dict[str, CollectorCursor], default_since: str, opts: Dict[str, Any]
+) -> List[RepoScan]:
+    gate = asyncio.Semaphore(opts["max_concurrency"])
+    async with async_client("github", max_connections=opts["max_concurrency"]) as client:
+        client.headers.update(
+            {
+                "Authorization": f"Bearer {token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+            }
+        )
+        return await asyncio.gather(
+            *(_scan_repo(client, gate, repo, cursors.get(repo), default_since, opts) for repo in repos)
+        )
+
+
+def run(
+    sources_config: Dict[str, Any],
+    keywords_config: Dict[str, Any],
+    lookback_hours: int = 24,
+    db_path: Path | None = None,
+):
+    metrics = current_run()
     token = os.getenv("GITHUB_TOKEN")
     if not token:
         console.print("[yellow]Skipping GitHub collector: missing GITHUB_TOKEN env var.[/yellow]")
+        metrics.status = "skipped"
         return
 
-    gh = Github(token, per_page=50)
-    keywords = _collect_keywords(keywords_config)
+    matcher = KeywordMatcher.from_config(keywords_config)
     repo_map = _map_repo_to_company(sources_config)
     repos = sorted(repo_map.keys())
     if not repos:
         console.print("[yellow]No GitHub repos configured; skipping GitHub collector.[/yellow]")
+        metrics.status = "skipped"
         return
 
-    since_dt = datetime.now(timezone.utc) - timedelta(hours=lookback_hours)
-    new_signals = 0
-
-    with session_scope() as session:
-        for repo_full in repos:
-            try:
-                repo = gh.get_repo(repo_full)
-            except Exception as exc:
-                console.print(f"[red]Failed to access {repo_full}: {exc}[/red]")
+    opts = _options(sources_config)
+    # first run for a repo falls back to the lookback window
+    default_since = _iso(datetime.now(timezone.utc) - timedelta(hours=lookback_hours))
+    with session_scope(db_path) as session:
+        cursors = load_cursors(session, "github")
+        session.expunge_all()
+
+    console.print(f"[cyan]Scanning issues in {len(repos)} repos ({opts['max_concurrency']} at a time)[/cyan]")
+    scans = run_async(_scan_all(token, repos, cursors, default_since, opts))
+
+    candidates: List[Dict[str, Any]] = []
+    for scan in scans:
+        error = f"{type(scan.error).__name__}: {scan.error}" if scan.error is not None else None
+        metrics.record("fetch", scan.elapsed, target=scan.repo, count=len(scan.issues), bytes=scan.bytes, error=error)
+        metrics.count("items_fetched", len(scan.issues))
+        metrics.count("bytes_fetched", scan.bytes)
+        if scan.error is not None:
+            console.print(f"[red]Issue fetch failed for {scan.repo}: {scan.error}[/red]")
+            metrics.count("errors")
+            continue
+        if scan.not_modified:
+            console.print(f"[green]{scan.repo}: no updates since {scan.since} (304)[/green]")
+            continue
+        console.print(f"[cyan]{scan.repo}: {len(scan.issues)} issues updated since {scan.since}[/cyan]")
+        company_id = repo_map[scan.repo]
+        started = time.perf_counter()
+        for issue in scan.issues:
+            if issue.get("pull_request") is not None:
+                continue  # skip PRs
+            text = f"{issue.get('title') or ''}\n\n{issue.get('body') or ''}"
+            hits = matcher.match(text)
+            if not hits:
                 continue
-            console.print(f"[cyan]Scanning issues in {repo_full}[/cyan]")
-            try:
-                issues = repo.get_issues(state="all", since=since_dt)
-            except Exception as exc:
-                console.print(f"[red]Issue fetch failed for {repo_full}: {exc}[/red]")
+            candidates.append(
+                {
+                    "company_id": company_id,
+                    "source": "github",
+                    "source_id": f"{scan.repo}#{issue['number']}",
+                    "captured_at": datetime.fromisoformat(issue["updated_at"].replace("Z", "+00:00")),
+                    "content": text[:10000],
+                    "url": issue.get("html_url"),
+                    "keywords_matched": hits,
+                    "keyword_categories": matcher.categories(hits),
+                    "score": (issue.get("reactions") or {}).get("total_count"),
+                    "comment_count": issue.get("comments"),
+                }
+            )
+        metrics.record("match", time.perf_counter() - started, target=scan.repo, count=len(scan.issues))
+
+    with metrics.stage("db_write"), session_scope(db_path) as session:
+        known = known_signal_ids(session, "github", (c["source_id"] for c in candidates))
+        rows = [c for c in candidates if c["source_id"] not in known]
+        with metrics.stage("sentiment", count=len(rows)):
+            scores = score_batch(row["content"] for row in rows)
+        for row, sentiment in zip(rows, scores):
+            row["sentiment"] = sentiment
+        new_signals = insert_signals(session, rows)
+        metrics.count("rows_inserted", new_signals)
+        metrics.count("rows_skipped", len(candidates) - new_signals)
+
+        # Cursors move in the same transaction as the inserts, so a failed write is retried next run.
+        for scan in scans:
+            if scan.error is not None:
                 continue
-
-            for issue in issues:
-                if issue.pull_request is not None:
-                    continue  # skip PRs
-                text = f"{issue.title}\n\n{issue.body or ''}"
-                hits = _keyword_hits(text, keywords)
-                if not hits:
-                    continue
-                source_id = f"{repo_full}#{issue.number}"
-                exists = session.scalar(
-                    select(CommunitySignal).where(
-                        CommunitySignal.source == "github", CommunitySignal.source_id == source_id
-                    )
-                )
-                if exists:
-                    continue
-                company_id = repo_map.get(repo_full.lower())
-                if not company_id:
-                    continue
-                sentiment = sentiment_score(text)
-                signal = CommunitySignal(
-                    company_id=company_id,
-                    source="github",
-                    source_id=source_id,
-                    captured_at=issue.updated_at.replace(tzinfo=timezone.utc),
-                    content=text[:10000],
-                    url=issue.html_url,
-                    sentiment=sentiment,
-                    keywords_matched=hits,
-                    score=issue.reactions.total_count if hasattr(issue, "reactions") else None,
-                    comment_count=issue.comments,
-                )
-                session.add(signal)
-                new_signals += 1
+            # `since` is inclusive, so the newest issue is seen once more next run and deduped
+            position = max((issue["updated_at"] for issue in scan.issues), default=scan.since)
+            save_cursor(
+                session,
+                "github",
+                scan.repo,
+                position=position,
+                etag=scan.etag,
+                etag_position=scan.since,
+            )
 
     console.print(f"[green]GitHub collector complete. Added {new_signals} signals.[/green]")
@@ -2,31 +2,35 @@ from __future__ import annotations
 
 import os
 import time
-from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
 from typing import Any, Dict, List
 
 import praw
 from rich.console import Console
-from sqlalchemy import select
 
-from ..analyzers.sentiment import score as sentiment_score
-from ..db import CommunitySignal, session_scope
+from ..analyzers.keywords import KeywordMatcher
+from ..analyzers.sentiment import score_batch
+from ..db import insert_signals, known_signal_ids, load_cursors, save_cursor, session_scope
+from ..utils.metrics import current_run
 
 console = Console()
 
+DEFAULT_MAX_WORKERS = 4
+# Reddit listings stop at ~1000 items regardless of paging.
+DEFAULT_MAX_POSTS = 1000
 
-def _keyword_hits(text: str, keywords: List[str]) -> List[str]:
-    text_l = text.lower()
-    return [kw for kw in keywords if kw in text_l]
 
-
-def _collect_keywords(keywords_config: Dict[str, Any]) -> List[str]:
-    kws: List[str] = []
-    for val in keywords_config.values():
-        if isinstance(val, list):
-            kws.extend(val)
-    # de-duplicate, lower
-    return sorted(set(kw.lower() for kw in kws))
+@dataclass
+class SubredditScan:
+    subreddit: str
+    since_ts: float
+    posts: List[Dict[str, Any]] = field(default_factory=list)
+    newest_ts: float | None = None
+    error: Exception | None = None
+    elapsed: float = 0.0
 
 
 def _map_sub_to_company(sources_config: Dict[str, Any]) -> Dict[str, str]:
@@ -37,7 +41,59 @@ def _map_sub_to_company(sources_config: Dict[str, Any]) -> Dict[str, str]:
     return mapping
 
 
-def run(sources_config: Dict[str, Any], keywords_config: Dict[str, Any], lookback_hours: int = 24):
+def _general_subs(sources_config: Dict[str, Any]) -> List[str]:
+    general = sources_config.get("general", {}) or {}
+    return [sub.lower() for sub in general.get("subreddits", []) or []]
+
+
+def _company_matcher(sources_config: Dict[str, Any]) -> KeywordMatcher:
+    """Matches company aliases, so posts in shared subs can be attributed to one company."""
+    aliases: Dict[str, List[str]] = {}
+    for cid, info in sources_config.get("companies", {}).items():
+        aliases[cid] = info.get("aliases") or [cid, info.get("name", cid)]
+    return KeywordMatcher(aliases)
+
+
+def _scan_subreddit(
+    credentials: Dict[str, str], sub_name: str, since_ts: float, max_posts: int
+) -> SubredditScan:
+    """
+    Walk r/<sub>/new newest-first and stop at the first post older than the
+    cursor, instead of reading a fixed 100 items and discarding stale ones.
+    """
+    scan = SubredditScan(subreddit=sub_name, since_ts=since_ts)
+    started = time.perf_counter()
+    try:
+        # praw instances aren't thread-safe, so each worker gets its own
+        reddit = praw.Reddit(**credentials, check_for_async=False)
+        for submission in reddit.subreddit(sub_name).new(limit=max_posts):
+            if submission.created_utc < since_ts:
+                break
+            if scan.newest_ts is None or submission.created_utc > scan.newest_ts:
+                scan.newest_ts = submission.created_utc
+            scan.posts.append(
+                {
+                    "id": submission.id,
+                    "created_utc": submission.created_utc,
+                    "text": f"{submission.title}\n\n{submission.selftext or ''}",
+                    "url": submission.url,
+                    "score": submission.score,
+                    "num_comments": submission.num_comments,
+                }
+            )
+    except Exception as exc:
+        scan.error = exc
+    scan.elapsed = time.perf_counter() - started
+    return scan
+
+
+def run(
+    sources_config: Dict[str, Any],
+    keywords_config: Dict[str, Any],
+    lookback_hours: int = 24,
+    db_path: Path | None = None,
+):
+    metrics = current_run()
     client_id = os.getenv("REDDIT_CLIENT_ID")
     client_secret = os.getenv("REDDIT_CLIENT_SECRET")
     user_agent = os.getenv("REDDIT_USER_AGENT", "ai-sub-monitor/0.1")
@@ -45,62 +101,89 @@ def run(sources_config: Dict[str, Any], keywords_config: Dict[str, Any], lookbac
         console.print(
             "[yellow]Skipping Reddit collector: missing REDDIT_CLIENT_ID/SECRET env vars.[/yellow]"
         )
+        metrics.status = "skipped"
         return
+    credentials = {"client_id": client_id, "client_secret": client_secret, "user_agent": user_agent}
 
-    reddit = praw.Reddit(
-        client_id=client_id,
-        client_secret=client_secret,
-        user_agent=user_agent,
-        check_for_async=False,
-    )
-
-    keywords = _collect_keywords(keywords_config)
+    matcher = KeywordMatcher.from_config(keywords_config)
+    company_matcher = _company_matcher(sources_config)
     sub_map = _map_sub_to_company(sources_config)
-    subs = sorted(sub_map.keys())
+    # general subs (e.g. r/LocalLLaMA) aren't tied to a company; posts are attributed by alias
+    subs = sorted(set(sub_map) | set(_general_subs(sources_config)))
     if not subs:
         console.print("[yellow]No subreddits configured; skipping Reddit collector.[/yellow]")
+        metrics.status = "skipped"
         return
 
-    since_ts = time.time() - (lookback_hours * 3600)
-    new_signals = 0
-
-    with session_scope() as session:
-        for sub_name in subs:
-            subreddit = reddit.subreddit(sub_name)
-            console.print(f"[cyan]Scanning r/{sub_name}[/cyan]")
-            for submission in subreddit.new(limit=100):
-                if submission.created_utc < since_ts:
-                    continue
-                text = f"{submission.title}\n\n{submission.selftext or ''}"
-                hits = _keyword_hits(text, keywords)
-                if not hits:
-                    continue
-                source_id = submission.id
-                exists = session.scalar(
-                    select(CommunitySignal).where(
-                        CommunitySignal.source == "reddit", CommunitySignal.source_id == source_id
-                    )
-                )
-                if exists:
-                    continue
-                company_id = sub_map.get(sub_name.lower())
-                if not company_id:
-                    # Skip subs that aren't mapped to a company
-                    continue
-                sentiment = sentiment_score(text)
-                signal = CommunitySignal(
-                    company_id=company_id,
-                    source="reddit",
-                    source_id=source_id,
-                    captured_at=datetime.fromtimestamp(submission.created_utc, tz=timezone.utc),
-                    content=text[:10000],  # keep payload bounded
-                    url=submission.url,
-                    sentiment=sentiment,
-                    keywords_matched=hits,
-                    score=submission.score,
-                    comment_count=submission.num_comments,
-                )
-                session.add(signal)
-                new_signals += 1
+    opts = sources_config.get("reddit", {}) or {}
+    max_workers = int(opts.get("max_workers", DEFAULT_MAX_WORKERS))
+    max_posts = int(opts.get("max_posts_per_subreddit", DEFAULT_MAX_POSTS))
+    # first run for a subreddit falls back to the lookback window
+    default_since = time.time() - (lookback_hours * 3600)
+    with session_scope(db_path) as session:
+        cursors = {key: float(c.position) for key, c in load_cursors(session, "reddit").items() if c.position}
+
+    console.print(f"[cyan]Scanning {len(subs)} subreddits ({max_workers} at a time)[/cyan]")
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        scans = list(
+            pool.map(
+                lambda sub: _scan_subreddit(credentials, sub, cursors.get(sub, default_since), max_posts),
+                subs,
+            )
+        )
+
+    candidates: List[Dict[str, Any]] = []
+    for scan in scans:
+        error = f"{type(scan.error).__name__}: {scan.error}" if scan.error is not None else None
+        metrics.record("fetch", scan.elapsed, target=f"r/{scan.subreddit}", count=len(scan.posts), error=error)
+        metrics.count("items_fetched", len(scan.posts))
+        if scan.error is not None:
+            console.print(f"[red]Failed to scan r/{scan.subreddit}: {scan.error}[/red]")
+            metrics.count("errors")
+            continue
+        console.print(f"[cyan]r/{scan.subreddit}: {len(scan.posts)} new posts[/cyan]")
+        started = time.perf_counter()
+        for post in scan.posts:
+            hits = matcher.match(post["text"])
+            if not hits:
+                continue
+            company_id = sub_map.get(scan.subreddit)
+            if company_id is None:
+                companies = company_matcher.categories(company_matcher.match(post["text"]))
+                if len(companies) != 1:
+                    continue  # no company mentioned, or more than one
+                company_id = companies[0]
+            candidates.append(
+                {
+                    "company_id": company_id,
+                    "source": "reddit",
+                    "source_id": post["id"],
+                    "captured_at": datetime.fromtimestamp(post["created_utc"], tz=timezone.utc),
+                    "content": post["text"][:10000],  # keep payload bounded
+                    "url": post["url"],
+                    "keywords_matched": hits,
+                    "keyword_categories": matcher.categories(hits),
+                    "score": post["score"],
+                    "comment_count": post["num_comments"],
+                }
+            )
+        metrics.record("match", time.perf_counter() - started, target=f"r/{scan.subreddit}", count=len(scan.posts))
+
+    with metrics.stage("db_write"), session_scope(db_path) as session:
+        known = known_signal_ids(session, "reddit", (c["source_id"] for c in candidates))
+        rows = [c for c in candidates if c["source_id"] not in known]
+        with metrics.stage("sentiment", count=len(rows)):
+            scores = score_batch(row["content"] for row in rows)
+        for row, sentiment in zip(rows, scores):
+            row["sentiment"] = sentiment
+        new_signals = insert_signals(session, rows)
+        metrics.count("rows_inserted", new_signals)
+        metrics.count("rows_skipped", len(candidates) - new_signals)
+
+        # Cursors move with the inserts; the boundary post is re-read next run and deduped.
+        for scan in scans:
+            if scan.error is None:
+                position = max(scan.newest_ts or scan.since_ts, scan.since_ts)
+                save_cursor(session, "reddit", scan.subreddit, position=repr(position))
 
     console.print(f"[green]Reddit collector complete. Added {new_signals} signals.[/green]")
@@ -0,0 +1,161 @@
+"""
+The fetch -> parse -> hash -> snapshot pipeline shared by the page collectors
+(pricing, docs). Each collector passes its snapshot model, its `kind` in
+`latest_snapshots` and the per-company config key listing its URLs.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Type
+
+from rich.console import Console
+from sqlalchemy import select, update
+
+from ..analyzers.diff import unified_diff
+from ..config import ensure_data_dirs
+from ..db import (
+    DocumentationSnapshot,
+    LatestSnapshot,
+    PricingSnapshot,
+    add_snapshot_rollup,
+    index_snapshot_text,
+    session_scope,
+    set_latest_snapshot,
+)
+from ..utils.blobs import BlobStore, snapshot_html
+from ..utils.html import ParsedPage, hash_text, ignore_patterns_for, parse_page
+from ..utils.http import ValidatorCache, fetch_all, fetch_options
+from ..utils.metrics import current_run
+
+console = Console()
+
+SnapshotModel = Type[PricingSnapshot] | Type[DocumentationSnapshot]
+
+
+def load_validators(
+    kind: str, urls_key: str, companies: Dict[str, Any], db_path: Path | None = None
+) -> ValidatorCache:
+    """
+    Load conditional-GET validators, dropping any URL without a stored snapshot
+    so a fresh or pruned DB always gets a full body to compare against.
+    """
+    validators = ValidatorCache.load(kind)
+    with session_scope(db_path) as session:
+        known = set(
+            session.execute(
+                select(LatestSnapshot.company_id, LatestSnapshot.url).where(LatestSnapshot.kind == kind)
+            ).all()
+        )
+    for company_id, info in companies.items():
+        for url in info.get(urls_key, []):
+            if (company_id, url) not in known:
+                validators.forget(url)
+    return validators
+
+
+def collect_pages(
+    sources_config: Dict[str, Any],
+    kind: str,
+    model: SnapshotModel,
+    urls_key: str,
+    label: str,
+    db_path: Path | None = None,
+    fields: Callable[[str, ParsedPage], Dict[str, Any]] | None = None,
+):
+    """
+    Fetch every company's `urls_key` pages and store a `model` snapshot for each
+    one whose normalized text changed. `fields(company_id, page)` adds
+    collector-specific columns (timed as the "extract" stage); `label` names the
+    pages in log lines.
+    """
+    metrics = current_run()
+    ensure_data_dirs()
+    store = BlobStore()
+    companies = sources_config.get("companies", {})
+    urls = [url for info in companies.values() for url in info.get(urls_key, [])]
+    validators = load_validators(kind, urls_key, companies, db_path)
+    console.print(f"[cyan]Fetching {len(urls)} {label} pages[/cyan]")
+    results = fetch_all(urls, validators=validators, **fetch_options(sources_config))
+    for url, result in results.items():
+        metrics.fetched(url, result)
+
+    for company_id, info in companies.items():
+        for url in info.get(urls_key, []):
+            result = results[url]
+            if result.error is not None:
+                console.print(f"[red]Failed to fetch {url}: {result.error}[/red]")
+                continue
+            if result.not_modified:
+                console.print(f"[green]Not modified (304): {url}; skipping snapshot.[/green]")
+                validators.update(url, result.response)
+                metrics.count("rows_skipped")
+                continue
+            console.print(f"[cyan]Fetched {label} page for {company_id}: {url} ({result.elapsed:.2f}s)[/cyan]")
+
+            html = result.response.text
+            ignore = ignore_patterns_for(sources_config, url)
+            try:
+                with metrics.stage("parse", url):
+                    page = parse_page(html)
+                with metrics.stage("hash", url):
+                    normalized = page.normalized(ignore)
+                    content_hash = hash_text(normalized)
+            except Exception as exc:
+                # one unparseable response only costs its own URL
+                console.print(f"[red]Failed to parse {url}: {exc}[/red]")
+                metrics.count("errors")
+                continue
+
+            with metrics.stage("db_write", url), session_scope(db_path) as session:
+                prev = session.get(LatestSnapshot, (kind, company_id, url))
+                prev_text = None
+                if prev and prev.content_hash != content_hash:
+                    # Rows hashed before normalization, or under an older ignore list, are
+                    # re-normalized once and re-keyed so the next run takes the cheap path.
+                    # legacy rows without a blob keep their body in the (deferred) raw_html column
+                    source = prev if prev.blob_id else session.get(model, prev.snapshot_id)
+                    with metrics.stage("load_previous", url):
+                        prev_text = parse_page(snapshot_html(source, store)).normalized(ignore)
+                    if hash_text(prev_text) == content_hash:
+                        prev.content_hash = content_hash
+                        session.execute(
+                            update(model).where(model.id == prev.snapshot_id).values(content_hash=content_hash)
+                        )
+                if prev and prev.content_hash == content_hash:
+                    console.print("[green]No change detected; skipping snapshot.[/green]")
+                    validators.update(url, result.response)
+                    metrics.count("rows_skipped")
+                    continue
+
+                with metrics.stage("blob_write", url):
+                    blob_id = store.put(html)
+                extra: Dict[str, Any] = {}
+                if fields is not None:
+                    with metrics.stage("extract", url):
+                        extra = fields(company_id, page)
+                snap = model(
+                    company_id=company_id,
+                    url=url,
+                    content_hash=content_hash,
+                    blob_id=blob_id,
+                    is_change=prev is not None,
+                    **extra,
+                )
+
+                # If previous snapshot exists, keep a unified diff for manual review
+                if prev:
+                    with metrics.stage("diff", url):
+                        diff = unified_diff(prev_text or "", normalized)
+                    with metrics.stage("blob_write", url):
+                        snap.diff_blob_id = store.put(diff)
+                    console.print(f"[green]Stored diff {snap.diff_blob_id[:12]}[/green]")
+
+                session.add(snap)
+                set_latest_snapshot(session, kind, snap)
+                add_snapshot_rollup(session, kind, snap)
+                index_snapshot_text(session, kind, snap, normalized)
+                metrics.count("rows_inserted")
+                console.print(f"[green]Saved {label} snapshot (blob {blob_id[:12]})[/green]")
+            validators.update(url, result.response)
+
+    validators.save()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import os
 from pathlib import Path
 from typing import Any, Dict, Tuple
 
@@ -12,6 +13,16 @@ def repo_root() -> Path:
   return Path(__file__).resolve().parents[2]
 
 
+# Points data/ (DB, blobs, reports, model copies, caches) somewhere else, e.g. for benchmarks.
+DATA_DIR_ENV_VAR = "AI_SUB_MONITOR_DATA_DIR"
+
+
+def data_root() -> Path:
+  """Return the data directory: $AI_SUB_MONITOR_DATA_DIR if set, else data/ under the repo root."""
+  override = os.getenv(DATA_DIR_ENV_VAR)
+  return Path(override) if override else repo_root() / "data"
+
+
 def load_yaml(path: Path) -> Dict[str, Any]:
   with path.open("r", encoding="utf-8") as f:
     return yaml.safe_load(f) or {}
@@ -36,15 +47,14 @@ def ensure_data_dirs() -> Path:
   """
   Create data directories if they don't exist and return the data root path.
   """
-  root = repo_root()
-  data_root = root / "data"
-  for child in ["snapshots", "reports", "models"]:
-    (data_root / child).mkdir(parents=True, exist_ok=True)
-  return data_root
+  root = data_root()
+  for child in ["snapshots", "blobs", "reports", "models"]:
+    (root / child).mkdir(parents=True, exist_ok=True)
+  return root
 
 
 def default_db_path() -> Path:
-  return repo_root() / "data" / "monitor.db"
+  return data_root() / "monitor.db"
 
 
 def to_json(obj: Any) -> str:
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+import threading
 import uuid
 from contextlib import contextmanager
 from datetime import date, datetime
 from pathlib import Path
-from typing import Any, Dict, Generator, Optional
+from typing import Any, Dict, Generator, Iterable, List, Optional
 
 from sqlalchemy import (
     JSON,
@@ -12,11 +13,19 @@ from sqlalchemy import (
     Date,
     DateTime,
     DECIMAL,
+    Float,
     ForeignKey,
+    Index,
     String,
     create_engine,
+    delete,
+    event,
+    func,
+    select,
     text,
 )
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column, relationship
 
 from .config import default_db_path, ensure_data_dirs
@@ -41,6 +50,7 @@ class Company(Base):
 
 class PricingSnapshot(Base):
     __tablename__ = "pricing_snapshots"
+    __table_args__ = (Index("ix_pricing_snapshots_company_url_captured", "company_id", "url", "captured_at"),)
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     company_id: Mapped[str] = mapped_column(String, ForeignKey("companies.id"), index=True)
@@ -52,7 +62,10 @@ class PricingSnapshot(Base):
     price_annual: Mapped[float | None] = mapped_column(DECIMAL(10, 2), nullable=True)
     features: Mapped[Dict[str, Any] | None] = mapped_column(JSON, nullable=True)
     rate_limits_stated: Mapped[Dict[str, Any] | None] = mapped_column(JSON, nullable=True)
-    raw_html: Mapped[str | None] = mapped_column(String, nullable=True)
+    # legacy; bodies live in the blob store. Deferred so loading a row never pulls the page.
+    raw_html: Mapped[str | None] = mapped_column(String, nullable=True, deferred=True)
+    blob_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    diff_blob_id: Mapped[str | None] = mapped_column(String, nullable=True)
     is_change: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
 
     company: Mapped[Company] = relationship(back_populates="pricing_snapshots")
@@ -60,13 +73,17 @@ class PricingSnapshot(Base):
 
 class DocumentationSnapshot(Base):
     __tablename__ = "documentation_snapshots"
+    __table_args__ = (Index("ix_documentation_snapshots_company_url_captured", "company_id", "url", "captured_at"),)
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     company_id: Mapped[str] = mapped_column(String, ForeignKey("companies.id"), index=True)
     url: Mapped[str | None] = mapped_column(String, nullable=True)
     captured_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
     content_hash: Mapped[str | None] = mapped_column(String, nullable=True)
-    raw_html: Mapped[str | None] = mapped_column(String, nullable=True)
+    # legacy; bodies live in the blob store. Deferred so loading a row never pulls the page.
+    raw_html: Mapped[str | None] = mapped_column(String, nullable=True, deferred=True)
+    blob_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    diff_blob_id: Mapped[str | None] = mapped_column(String, nullable=True)
     is_change: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
 
     company: Mapped[Company] = relationship()
@@ -90,6 +107,7 @@ class RateLimitChange(Base):
 
 class CommunitySignal(Base):
   __tablename__ = "community_signals"
+  __table_args__ = (Index("ux_community_signals_source", "source", "source_id", unique=True),)
 
   id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
   company_id: Mapped[str] = mapped_column(String, ForeignKey("companies.id"), index=True)
@@ -100,6 +118,7 @@ class CommunitySignal(Base):
   url: Mapped[str | None] = mapped_column(String, nullable=True)
   sentiment: Mapped[float | None] = mapped_column(DECIMAL(4, 3), nullable=True)
   keywords_matched: Mapped[list[str] | None] = mapped_column(JSON, nullable=True)
+  keyword_categories: Mapped[list[str] | None] = mapped_column(JSON, nullable=True)
   score: Mapped[int | None] = mapped_column(nullable=True)
   comment_count: Mapped[int | None] = mapped_column(nullable=True)
 
@@ -137,17 +156,169 @@ class WeeklyReport(Base):
   key_events: Mapped[Dict[str, Any] | None] = mapped_column(JSON, nullable=True)
 
 
-def get_engine(db_path: Path | None = None):
-    db_path = db_path or default_db_path()
-    ensure_data_dirs()
-    url = f"sqlite:///{db_path}"
-    return create_engine(url, echo=False, future=True)
+class CollectorCursor(Base):
+  """Per-source, per-feed high-water mark so collectors resume where the last run stopped."""
+
+  __tablename__ = "collector_cursors"
+
+  source: Mapped[str] = mapped_column(String, primary_key=True)  # github | reddit | ...
+  key: Mapped[str] = mapped_column(String, primary_key=True)  # repo, subreddit, ...
+  position: Mapped[str | None] = mapped_column(String, nullable=True)
+  etag: Mapped[str | None] = mapped_column(String, nullable=True)
+  etag_position: Mapped[str | None] = mapped_column(String, nullable=True)  # position the etag was issued for
+  updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class LatestSnapshot(Base):
+  """
+  Pointer to the newest snapshot of each (kind, company, url), kept current by
+  the collectors, so change detection and latest-price lookups are a single
+  primary-key read instead of an ORDER BY over the snapshot history.
+  """
+
+  __tablename__ = "latest_snapshots"
+
+  kind: Mapped[str] = mapped_column(String, primary_key=True)  # pricing | docs
+  company_id: Mapped[str] = mapped_column(String, primary_key=True)
+  url: Mapped[str] = mapped_column(String, primary_key=True)
+  snapshot_id: Mapped[str] = mapped_column(String)
+  content_hash: Mapped[str | None] = mapped_column(String, nullable=True)
+  blob_id: Mapped[str | None] = mapped_column(String, nullable=True)
+  captured_at: Mapped[datetime] = mapped_column(DateTime)
+  # newest pricing snapshot of this url that yielded structured prices
+  priced_snapshot_id: Mapped[str | None] = mapped_column(String, nullable=True)
+
+
+class DailySignalRollup(Base):
+  """
+  Community signals pre-aggregated per day, company, source and keyword category.
+  Maintained as signals are inserted; category ALL_CATEGORIES counts every signal once.
+  """
+
+  __tablename__ = "daily_signal_rollups"
+
+  day: Mapped[date] = mapped_column(Date, primary_key=True)
+  company_id: Mapped[str] = mapped_column(String, primary_key=True)
+  source: Mapped[str] = mapped_column(String, primary_key=True)
+  category: Mapped[str] = mapped_column(String, primary_key=True)
+  signal_count: Mapped[int] = mapped_column(default=0, nullable=False)
+  sentiment_sum: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+  sentiment_count: Mapped[int] = mapped_column(default=0, nullable=False)
+
+
+class DailyChangeRollup(Base):
+  """Snapshots and detected changes per day, company and kind (pricing | docs)."""
+
+  __tablename__ = "daily_change_rollups"
+
+  day: Mapped[date] = mapped_column(Date, primary_key=True)
+  company_id: Mapped[str] = mapped_column(String, primary_key=True)
+  kind: Mapped[str] = mapped_column(String, primary_key=True)
+  snapshot_count: Mapped[int] = mapped_column(default=0, nullable=False)
+  change_count: Mapped[int] = mapped_column(default=0, nullable=False)
+
+
+class CollectorRun(Base):
+  """One collector run: outcome and totals. Per-stage timings live in collector_stage_metrics."""
+
+  __tablename__ = "collector_runs"
+  __table_args__ = (Index("ix_collector_runs_collector_started", "collector", "started_at"),)
+
+  id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+  collector: Mapped[str] = mapped_column(String)  # pricing | docs | reddit | github | plugin name
+  started_at: Mapped[datetime] = mapped_column(DateTime)
+  finished_at: Mapped[datetime] = mapped_column(DateTime)
+  duration_seconds: Mapped[float] = mapped_column(Float)
+  status: Mapped[str] = mapped_column(String)  # ok | error | skipped
+  items_fetched: Mapped[int] = mapped_column(default=0)  # pages, posts or issues read
+  rows_inserted: Mapped[int] = mapped_column(default=0)
+  rows_skipped: Mapped[int] = mapped_column(default=0)  # unchanged pages, already-known signals
+  bytes_fetched: Mapped[int] = mapped_column(default=0)
+  errors: Mapped[int] = mapped_column(default=0)
+  error: Mapped[str | None] = mapped_column(String, nullable=True)
+
+
+class CollectorStageMetric(Base):
+  """
+  Time spent in one stage of a collector run (fetch, parse, hash, diff, sentiment,
+  db_write, ...), per URL / subreddit / repo where the stage has a target. Nested
+  stages are recorded exclusively, so a run's stage seconds add up to its busy time.
+  """
+
+  __tablename__ = "collector_stage_metrics"
+
+  id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+  run_id: Mapped[str] = mapped_column(String, ForeignKey("collector_runs.id"), index=True)
+  stage: Mapped[str] = mapped_column(String)
+  target: Mapped[str | None] = mapped_column(String, nullable=True)
+  seconds: Mapped[float] = mapped_column(Float)
+  count: Mapped[int | None] = mapped_column(nullable=True)
+  bytes: Mapped[int | None] = mapped_column(nullable=True)
+  error: Mapped[str | None] = mapped_column(String, nullable=True)
+
+
+# Applied to every new SQLite connection. WAL lets report generation read while
+# collectors write; busy_timeout makes writers wait on a lock instead of failing.
+SQLITE_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # negative = KiB, so ~64 MB
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": 30000,
+}
+
+_engines: Dict[str, Engine] = {}
+_initialized: set[str] = set()
+_engines_lock = threading.Lock()
+
+
+def _apply_sqlite_pragmas(dbapi_connection, _connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def get_engine(db_path: Path | None = None) -> Engine:
+    """Return the process-wide engine for `db_path`, creating it on first use."""
+    db_path = Path(db_path or default_db_path()).resolve()
+    key = str(db_path)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            ensure_data_dirs()
+            engine = create_engine(
+                f"sqlite:///{db_path}",
+                echo=False,
+                future=True,
+                connect_args={"check_same_thread": False},
+            )
+            event.listen(engine, "connect", _apply_sqlite_pragmas)
+            _engines[key] = engine
+    return engine
+
+
+def dispose_engines():
+    """Close pooled connections for every cached engine (tests, forked workers)."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _initialized.clear()
 
 
 def init_db(db_path: Path | None = None):
+    """Create tables and run migrations once per database per process."""
     engine = get_engine(db_path)
+    key = str(engine.url.database)
+    if key in _initialized:
+        return engine
     Base.metadata.create_all(engine)
     _apply_migrations(engine)
+    _initialized.add(key)
     return engine
 
 
@@ -171,6 +342,187 @@ def _apply_migrations(engine):
         _add_column(engine, "pricing_snapshots", "content_hash TEXT")
     if _column_exists(engine, "pricing_snapshots", "is_change") is False:
         _add_column(engine, "pricing_snapshots", "is_change BOOLEAN DEFAULT 0 NOT NULL")
+    # Blob store references replace inline raw_html
+    for table in ("pricing_snapshots", "documentation_snapshots"):
+        for column in ("blob_id", "diff_blob_id"):
+            if _column_exists(engine, table, column) is False:
+                _add_column(engine, table, f"{column} TEXT")
+    if _column_exists(engine, "community_signals", "keyword_categories") is False:
+        _add_column(engine, "community_signals", "keyword_categories JSON")
+    _ensure_signal_unique_index(engine)
+    _ensure_snapshot_indexes(engine)
+    _ensure_latest_snapshots(engine)
+    _ensure_rollups(engine)
+    _ensure_search_index(engine)
+
+
+def _ensure_signal_unique_index(engine):
+    with engine.connect() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ux_community_signals_source'")
+        ).first()
+        if exists:
+            return
+        # Older databases may hold duplicates from racing runs; keep the first copy.
+        conn.execute(
+            text(
+                "DELETE FROM community_signals WHERE rowid NOT IN "
+                "(SELECT MIN(rowid) FROM community_signals GROUP BY source, source_id)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE UNIQUE INDEX ux_community_signals_source "
+                "ON community_signals (source, source_id)"
+            )
+        )
+        conn.commit()
+
+
+def _ensure_snapshot_indexes(engine):
+    # create_all only adds indexes alongside new tables
+    with engine.connect() as conn:
+        for table in ("pricing_snapshots", "documentation_snapshots"):
+            conn.execute(
+                text(f"CREATE INDEX IF NOT EXISTS ix_{table}_company_url_captured ON {table} (company_id, url, captured_at)")
+            )
+        conn.commit()
+
+
+SNAPSHOT_KINDS = {"pricing": "pricing_snapshots", "docs": "documentation_snapshots"}
+
+
+def _ensure_latest_snapshots(engine):
+    """Backfill latest_snapshots from the snapshot history the first time it is empty."""
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT 1 FROM latest_snapshots LIMIT 1")).first():
+            return
+        for kind, table in SNAPSHOT_KINDS.items():
+            conn.execute(
+                text(
+                    "INSERT INTO latest_snapshots (kind, company_id, url, snapshot_id, content_hash, blob_id, captured_at) "
+                    "SELECT :kind, company_id, url, id, content_hash, blob_id, captured_at FROM ("
+                    "  SELECT company_id, url, id, content_hash, blob_id, captured_at, ROW_NUMBER() OVER ("
+                    "    PARTITION BY company_id, url ORDER BY captured_at DESC) AS rn"
+                    f"  FROM {table} WHERE url IS NOT NULL"
+                    ") WHERE rn = 1"
+                ),
+                {"kind": kind},
+            )
+        refresh_latest_snapshots(conn)
+        conn.commit()
+
+
+def refresh_latest_snapshots(conn: Connection | Session):
+    """
+    Re-read each latest pointer's content hash, and the newest snapshot that
+    yielded prices, from the snapshot tables after they were rewritten in bulk.
+    """
+    for kind, table in SNAPSHOT_KINDS.items():
+        conn.execute(
+            text(
+                f"UPDATE latest_snapshots SET content_hash = ("
+                f"  SELECT s.content_hash FROM {table} s WHERE s.id = latest_snapshots.snapshot_id"
+                ") WHERE kind = :kind"
+            ),
+            {"kind": kind},
+        )
+    conn.execute(
+        text(
+            "UPDATE latest_snapshots SET priced_snapshot_id = ("
+            "  SELECT p.id FROM pricing_snapshots p"
+            "  WHERE p.company_id = latest_snapshots.company_id AND p.url = latest_snapshots.url"
+            "    AND json_array_length(p.features, '$.pricing') > 0"
+            "  ORDER BY p.captured_at DESC LIMIT 1"
+            ") WHERE kind = 'pricing'"
+        )
+    )
+
+
+# Full-text index over signal content and normalized snapshot text. Rows carry
+# their own copy of the text (not external content): VACUUM may renumber the
+# implicit rowids that an external-content index would point at.
+SEARCH_INDEX_DDL = (
+    "CREATE VIRTUAL TABLE search_index USING fts5("
+    "body, kind UNINDEXED, ref_id UNINDEXED, company_id UNINDEXED, source UNINDEXED, "
+    "url UNINDEXED, captured_at UNINDEXED, tokenize = 'porter unicode61')"
+)
+
+_SIGNAL_SEARCH_ROW = (
+    "INSERT INTO search_index (body, kind, ref_id, company_id, source, url, captured_at) "
+    "VALUES (new.content, 'signal', new.id, new.company_id, new.source, new.url, new.captured_at)"
+)
+
+SEARCH_TRIGGERS = {
+    "community_signals_search_insert": f"AFTER INSERT ON community_signals BEGIN {_SIGNAL_SEARCH_ROW}; END",
+    "community_signals_search_delete": (
+        "AFTER DELETE ON community_signals BEGIN "
+        "DELETE FROM search_index WHERE kind = 'signal' AND ref_id = old.id; END"
+    ),
+    "community_signals_search_update": (
+        "AFTER UPDATE OF content, company_id, source, url, captured_at ON community_signals BEGIN "
+        f"DELETE FROM search_index WHERE kind = 'signal' AND ref_id = old.id; {_SIGNAL_SEARCH_ROW}; END"
+    ),
+}
+
+
+def _ensure_search_index(engine):
+    with engine.connect() as conn:
+        created = not conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'")
+        ).first()
+        if created:
+            conn.execute(text(SEARCH_INDEX_DDL))
+            # signals already stored are indexed here; snapshot text needs `search --reindex`
+            conn.execute(
+                text(
+                    "INSERT INTO search_index (body, kind, ref_id, company_id, source, url, captured_at) "
+                    "SELECT content, 'signal', id, company_id, source, url, captured_at FROM community_signals"
+                )
+            )
+        for name, body in SEARCH_TRIGGERS.items():
+            conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {body}"))
+        conn.commit()
+
+
+def index_snapshot_text(session: Session, kind: str, snap: PricingSnapshot | DocumentationSnapshot, body: str):
+    """Add a snapshot's normalized text to the search index, in the caller's transaction."""
+    snap.id = snap.id or str(uuid.uuid4())
+    snap.captured_at = snap.captured_at or datetime.utcnow()
+    session.execute(
+        text(
+            "INSERT INTO search_index (body, kind, ref_id, company_id, source, url, captured_at) "
+            "VALUES (:body, :kind, :ref_id, :company_id, :kind, :url, :captured_at)"
+        ),
+        {
+            "body": body,
+            "kind": kind,
+            "ref_id": snap.id,
+            "company_id": snap.company_id,
+            "url": snap.url,
+            # same text form SQLAlchemy uses for DateTime columns, so date filters compare alike
+            "captured_at": snap.captured_at.strftime("%Y-%m-%d %H:%M:%S.%f"),
+        },
+    )
+
+
+def _ensure_rollups(engine):
+    # Rollups are written alongside every signal and snapshot, so empty rollup
+    # tables next to populated raw tables mean a database from before they existed.
+    with Session(engine) as session:
+        stale = (
+            session.scalar(select(DailySignalRollup.day).limit(1)) is None
+            and session.scalar(select(CommunitySignal.id).limit(1)) is not None
+        ) or (
+            session.scalar(select(DailyChangeRollup.day).limit(1)) is None
+            and (
+                session.scalar(select(PricingSnapshot.id).limit(1)) is not None
+                or session.scalar(select(DocumentationSnapshot.id).limit(1)) is not None
+            )
+        )
+        if stale:
+            rebuild_rollups(session)
+            session.commit()
 
 
 @contextmanager
@@ -185,3 +537,190 @@ def session_scope(db_path: Path | None = None) -> Generator[Session, None, None]
     raise
   finally:
     session.close()
+
+
+# Keeps each multi-row INSERT well under SQLite's bound-parameter limit.
+SIGNAL_BATCH_SIZE = 500
+
+
+def known_signal_ids(session: Session, source: str, source_ids: Iterable[str]) -> set[str]:
+    """Return which of `source_ids` are already stored for `source`, in as few queries as possible."""
+    ids = list(dict.fromkeys(source_ids))
+    known: set[str] = set()
+    for i in range(0, len(ids), SIGNAL_BATCH_SIZE):
+        chunk = ids[i : i + SIGNAL_BATCH_SIZE]
+        known.update(
+            session.scalars(
+                select(CommunitySignal.source_id).where(
+                    CommunitySignal.source == source, CommunitySignal.source_id.in_(chunk)
+                )
+            )
+        )
+    return known
+
+
+def insert_signals(session: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Insert CommunitySignal rows with multi-row INSERT ... ON CONFLICT DO NOTHING,
+    so rows already stored under (source, source_id) are skipped, and fold the
+    rows that did land into the daily rollups. Returns the number inserted.
+    """
+    inserted = 0
+    for i in range(0, len(rows), SIGNAL_BATCH_SIZE):
+        chunk = [{"id": str(uuid.uuid4()), **row} for row in rows[i : i + SIGNAL_BATCH_SIZE]]
+        stmt = (
+            sqlite_insert(CommunitySignal)
+            .values(chunk)
+            .on_conflict_do_nothing(index_elements=["source", "source_id"])
+            .returning(CommunitySignal.id)
+        )
+        landed = set(session.scalars(stmt))
+        inserted += len(landed)
+        add_signal_rollups(session, [row for row in chunk if row["id"] in landed])
+    return inserted
+
+
+# Rollup category that counts every signal, whatever keywords it matched.
+ALL_CATEGORIES = "*"
+
+
+def _day(ts: datetime | None) -> date:
+    # captured_at is UTC throughout (aware from collectors, naive from column defaults)
+    return (ts or datetime.utcnow()).date()
+
+
+def add_signal_rollups(session: Session, rows: Iterable[Dict[str, Any]]):
+    """Add freshly inserted signal rows to their daily rollups with one upsert per batch."""
+    totals: Dict[tuple, List[float]] = {}
+    for row in rows:
+        sentiment = row.get("sentiment")
+        for category in [ALL_CATEGORIES, *(row.get("keyword_categories") or [])]:
+            key = (_day(row.get("captured_at")), row["company_id"], row["source"], category)
+            acc = totals.setdefault(key, [0, 0.0, 0])
+            acc[0] += 1
+            if sentiment is not None:
+                acc[1] += float(sentiment)
+                acc[2] += 1
+    values = [
+        {
+            "day": day,
+            "company_id": company_id,
+            "source": source,
+            "category": category,
+            "signal_count": count,
+            "sentiment_sum": total,
+            "sentiment_count": scored,
+        }
+        for (day, company_id, source, category), (count, total, scored) in totals.items()
+    ]
+    for i in range(0, len(values), SIGNAL_BATCH_SIZE):
+        stmt = sqlite_insert(DailySignalRollup).values(values[i : i + SIGNAL_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "company_id", "source", "category"],
+            set_={
+                "signal_count": DailySignalRollup.signal_count + stmt.excluded.signal_count,
+                "sentiment_sum": DailySignalRollup.sentiment_sum + stmt.excluded.sentiment_sum,
+                "sentiment_count": DailySignalRollup.sentiment_count + stmt.excluded.sentiment_count,
+            },
+        )
+        session.execute(stmt)
+
+
+def add_snapshot_rollup(session: Session, kind: str, snap: PricingSnapshot | DocumentationSnapshot):
+    """Count a new pricing/docs snapshot in its day's rollup, in the caller's transaction."""
+    # stamp the time now so the row and its rollup agree on the day
+    snap.captured_at = snap.captured_at or datetime.utcnow()
+    stmt = sqlite_insert(DailyChangeRollup).values(
+        day=_day(snap.captured_at),
+        company_id=snap.company_id,
+        kind=kind,
+        snapshot_count=1,
+        change_count=int(bool(snap.is_change)),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "company_id", "kind"],
+        set_={
+            "snapshot_count": DailyChangeRollup.snapshot_count + stmt.excluded.snapshot_count,
+            "change_count": DailyChangeRollup.change_count + stmt.excluded.change_count,
+        },
+    )
+    session.execute(stmt)
+
+
+def set_latest_snapshot(session: Session, kind: str, snap: PricingSnapshot | DocumentationSnapshot):
+    """Point (kind, company, url) at a snapshot that is being added in this transaction."""
+    snap.id = snap.id or str(uuid.uuid4())
+    snap.captured_at = snap.captured_at or datetime.utcnow()
+    values = {
+        "snapshot_id": snap.id,
+        "content_hash": snap.content_hash,
+        "blob_id": snap.blob_id,
+        "captured_at": snap.captured_at,
+    }
+    if (getattr(snap, "features", None) or {}).get("pricing"):
+        values["priced_snapshot_id"] = snap.id
+    stmt = sqlite_insert(LatestSnapshot).values(kind=kind, company_id=snap.company_id, url=snap.url, **values)
+    session.execute(
+        stmt.on_conflict_do_update(index_elements=["kind", "company_id", "url"], set_=values)
+    )
+
+
+def rebuild_rollups(session: Session):
+    """
+    Recompute both rollup tables from the raw signal and snapshot tables. Only
+    needed after bulk edits outside the collectors, or to backfill old databases.
+    """
+    session.execute(delete(DailySignalRollup))
+    session.execute(delete(DailyChangeRollup))
+
+    # one pass for the all-signals bucket and one over each row's categories, both in SQL
+    rollup_columns = "day, company_id, source, category, signal_count, sentiment_sum, sentiment_count"
+    aggregates = "count(*), coalesce(sum(s.sentiment), 0), count(s.sentiment)"
+    session.execute(
+        text(
+            f"INSERT INTO daily_signal_rollups ({rollup_columns}) "
+            f"SELECT date(s.captured_at), s.company_id, s.source, :all, {aggregates} "
+            "FROM community_signals s GROUP BY 1, 2, 3"
+        ),
+        {"all": ALL_CATEGORIES},
+    )
+    session.execute(
+        text(
+            f"INSERT INTO daily_signal_rollups ({rollup_columns}) "
+            f"SELECT date(s.captured_at), s.company_id, s.source, c.value, {aggregates} "
+            "FROM community_signals s, json_each(s.keyword_categories) c "
+            "WHERE s.keyword_categories IS NOT NULL GROUP BY 1, 2, 3, 4"
+        )
+    )
+
+    for kind, model in (("pricing", PricingSnapshot), ("docs", DocumentationSnapshot)):
+        day = func.date(model.captured_at)
+        rows = session.execute(
+            select(day, model.company_id, func.count(), func.coalesce(func.sum(model.is_change), 0))
+            .group_by(day, model.company_id)
+        ).all()
+        session.add_all(
+            DailyChangeRollup(
+                day=date.fromisoformat(day_str),
+                company_id=company_id,
+                kind=kind,
+                snapshot_count=count,
+                change_count=int(changes),
+            )
+            for day_str, company_id, count, changes in rows
+        )
+    session.flush()
+
+
+def load_cursors(session: Session, source: str) -> Dict[str, CollectorCursor]:
+    return {c.key: c for c in session.scalars(select(CollectorCursor).where(CollectorCursor.source == source))}
+
+
+def save_cursor(session: Session, source: str, key: str, **fields: Any) -> CollectorCursor:
+    cursor = session.get(CollectorCursor, (source, key))
+    if cursor is None:
+        cursor = CollectorCursor(source=source, key=key)
+        session.add(cursor)
+    for name, value in fields.items():
+        setattr(cursor, name, value)
+    return cursor
@@ -1,20 +1,35 @@
 from __future__ import annotations
 
 import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from jinja2 import Environment, FileSystemLoader, select_autoescape
-from sqlalchemy import func, select
+from sqlalchemy import delete, func, select
 
+from ..analyzers.anomaly import detect_anomalies
 from ..config import ensure_data_dirs, default_db_path
-from ..db import CommunitySignal, DocumentationSnapshot, PricingSnapshot, session_scope
+from ..db import (
+    ALL_CATEGORIES,
+    DailyChangeRollup,
+    DailySignalRollup,
+    DocumentationSnapshot,
+    PricingSnapshot,
+    WeeklyReport,
+    session_scope,
+)
 
 env = Environment(
     loader=FileSystemLoader(Path(__file__).resolve().parent / "templates"),
     autoescape=select_autoescape(enabled_extensions=("md", "j2")),
 )
 
+DEFAULT_RENDER_WORKERS = 4
+# strongest anomalies listed per week under Key Events
+MAX_KEY_EVENTS = 10
+
 
 def _week_bounds(target: Optional[dt.date]) -> tuple[dt.date, dt.date]:
     if target is None:
@@ -24,89 +39,193 @@ def _week_bounds(target: Optional[dt.date]) -> tuple[dt.date, dt.date]:
     return start, end
 
 
-def _community_metrics(start_dt: dt.datetime, end_dt: dt.datetime, db_path) -> tuple[Dict[str, int], float | str]:
-    volume: Dict[str, int] = {}
-    sentiment = "n/a"
+def _weeks(first: dt.date, last: dt.date) -> List[tuple[dt.date, dt.date]]:
+    """Every Monday-to-Sunday week touching [first, last]."""
+    start, _ = _week_bounds(first)
+    weeks = []
+    while start <= last:
+        weeks.append((start, start + dt.timedelta(days=6)))
+        start += dt.timedelta(days=7)
+    return weeks
+
+
+def _week_of(day: dt.date) -> dt.date:
+    return day - dt.timedelta(days=day.weekday())
+
+
+def _community_metrics(
+    start: dt.date, end: dt.date, db_path
+) -> Dict[dt.date, tuple[Dict[str, int], float | str]]:
+    """
+    Signal volume per source and mean sentiment for each week in [start, end],
+    from one grouped query over the daily rollups.
+    """
+    totals: Dict[dt.date, Dict[str, List[float]]] = {}
     with session_scope(db_path) as session:
         rows = session.execute(
-            select(CommunitySignal.source, func.count())
+            select(
+                DailySignalRollup.day,
+                DailySignalRollup.source,
+                func.sum(DailySignalRollup.signal_count),
+                func.sum(DailySignalRollup.sentiment_sum),
+                func.sum(DailySignalRollup.sentiment_count),
+            )
             .where(
-                CommunitySignal.captured_at >= start_dt,
-                CommunitySignal.captured_at < end_dt + dt.timedelta(days=1),
+                DailySignalRollup.day >= start,
+                DailySignalRollup.day <= end,
+                DailySignalRollup.category == ALL_CATEGORIES,
             )
-            .group_by(CommunitySignal.source)
+            .group_by(DailySignalRollup.day, DailySignalRollup.source)
         ).all()
-        volume = {src: count for src, count in rows}
-
-        avg = session.scalar(
-            select(func.avg(CommunitySignal.sentiment)).where(
-                CommunitySignal.captured_at >= start_dt,
-                CommunitySignal.captured_at < end_dt + dt.timedelta(days=1),
-                CommunitySignal.sentiment.isnot(None),
-            )
-        )
-        if avg is not None:
-            sentiment = round(float(avg), 3)
-    return volume, sentiment
+    for day, source, count, total, scored in rows:
+        acc = totals.setdefault(_week_of(day), {}).setdefault(source, [0, 0.0, 0])
+        acc[0] += int(count)
+        acc[1] += total or 0.0
+        acc[2] += scored or 0
+
+    metrics: Dict[dt.date, tuple[Dict[str, int], float | str]] = {}
+    for week, by_source in totals.items():
+        volume = {source: acc[0] for source, acc in by_source.items()}
+        scored = sum(acc[2] for acc in by_source.values())
+        sentiment = round(sum(acc[1] for acc in by_source.values()) / scored, 3) if scored else "n/a"
+        metrics[week] = (volume, sentiment)
+    return metrics
+
+
+def _change_counts(start: dt.date, end: dt.date, db_path) -> Dict[dt.date, Dict[str, int]]:
+    counts: Dict[dt.date, Dict[str, int]] = {}
+    with session_scope(db_path) as session:
+        rows = session.execute(
+            select(DailyChangeRollup.day, DailyChangeRollup.kind, func.sum(DailyChangeRollup.change_count))
+            .where(DailyChangeRollup.day >= start, DailyChangeRollup.day <= end)
+            .group_by(DailyChangeRollup.day, DailyChangeRollup.kind)
+        ).all()
+    for day, kind, count in rows:
+        week = counts.setdefault(_week_of(day), {})
+        week[kind] = week.get(kind, 0) + int(count)
+    return counts
+
+
+def _key_events(start: dt.date, end: dt.date, db_path) -> Dict[dt.date, List[Dict[str, Any]]]:
+    """Volume/sentiment anomalies in [start, end], strongest first within each week."""
+    events: Dict[dt.date, List[Any]] = {}
+    for anomaly in detect_anomalies(db_path, start, end):
+        events.setdefault(_week_of(anomaly.day), []).append(anomaly)
+    return {
+        week: [a.as_event() for a in sorted(found, key=lambda a: -abs(a.score))[:MAX_KEY_EVENTS]]
+        for week, found in events.items()
+    }
 
 
 def _changes_with_details(start_dt: dt.datetime, end_dt: dt.datetime, db_path):
-    pricing_changes = []
-    doc_changes = []
+    """
+    URLs of the changes in [start_dt, end_dt], bucketed by week; counts come
+    from the rollups via `_change_counts`.
+    """
+    pricing_changes: Dict[dt.date, list] = {}
+    doc_changes: Dict[dt.date, list] = {}
     with session_scope(db_path) as session:
-        pricing_changes = session.execute(
-            select(PricingSnapshot.url, PricingSnapshot.captured_at)
-            .where(
-                PricingSnapshot.captured_at >= start_dt,
-                PricingSnapshot.captured_at < end_dt + dt.timedelta(days=1),
-                PricingSnapshot.is_change.is_(True),
-            )
-            .order_by(PricingSnapshot.captured_at.desc())
-        ).all()
-        doc_changes = session.execute(
-            select(DocumentationSnapshot.url, DocumentationSnapshot.captured_at)
-            .where(
-                DocumentationSnapshot.captured_at >= start_dt,
-                DocumentationSnapshot.captured_at < end_dt + dt.timedelta(days=1),
-                DocumentationSnapshot.is_change.is_(True),
-            )
-            .order_by(DocumentationSnapshot.captured_at.desc())
-        ).all()
+        for model, bucket in ((PricingSnapshot, pricing_changes), (DocumentationSnapshot, doc_changes)):
+            rows = session.execute(
+                select(model.url, model.captured_at)
+                .where(
+                    model.captured_at >= start_dt,
+                    model.captured_at < end_dt + dt.timedelta(days=1),
+                    model.is_change.is_(True),
+                )
+                .order_by(model.captured_at.desc())
+            ).all()
+            for url, captured_at in rows:
+                bucket.setdefault(_week_of(captured_at.date()), []).append((url, captured_at))
     return pricing_changes, doc_changes
 
 
-def generate_weekly_report(week_start: Optional[dt.date] = None, db_path=None) -> Path:
-    ensure_data_dirs()
-    start, end = _week_bounds(week_start)
-    start_dt = dt.datetime.combine(start, dt.time.min)
-    end_dt = dt.datetime.combine(end, dt.time.max)
-    template = env.get_template("weekly_report.md.j2")
+@lru_cache(maxsize=1)
+def _template():
+    return env.get_template("weekly_report.md.j2")
 
-    db = db_path or default_db_path()
-    volume, sentiment = _community_metrics(start_dt, end_dt, db)
-    pricing_changes, doc_changes = _changes_with_details(start_dt, end_dt, db)
-
-    context: Dict[str, Any] = {
-        "week_start": start.isoformat(),
-        "week_end": end.isoformat(),
-        "generated_at": dt.datetime.utcnow().isoformat() + "Z",
-        "summary": None,
-        "pricing_changes": len(pricing_changes),
-        "rate_limit_changes": len(doc_changes),
-        "pricing_change_urls": [
-            {"url": url, "captured_at": captured_at.isoformat()} for url, captured_at in pricing_changes
-        ],
-        "doc_change_urls": [
-            {"url": url, "captured_at": captured_at.isoformat()} for url, captured_at in doc_changes
-        ],
-        "community_signal_volume": volume if volume else {},
-        "sentiment_trend": sentiment,
-        "key_events": [],
-    }
 
-    content = template.render(**context)
-    reports_dir = Path("data/reports")
-    reports_dir.mkdir(parents=True, exist_ok=True)
-    outfile = reports_dir / f"weekly_{start.isoformat()}.md"
-    outfile.write_text(content, encoding="utf-8")
+def _write_report(context: Dict[str, Any], reports_dir: Path) -> Path:
+    outfile = reports_dir / f"weekly_{context['week_start']}.md"
+    outfile.write_text(_template().render(**context), encoding="utf-8")
     return outfile
+
+
+def _persist(contexts: List[Dict[str, Any]], db_path):
+    """Replace the WeeklyReport rows for these weeks with the freshly computed metrics."""
+    starts = [dt.date.fromisoformat(c["week_start"]) for c in contexts]
+    with session_scope(db_path) as session:
+        session.execute(delete(WeeklyReport).where(WeeklyReport.week_start.in_(starts)))
+        session.add_all(
+            WeeklyReport(
+                week_start=week_start,
+                week_end=dt.date.fromisoformat(c["week_end"]),
+                summary=c["summary"],
+                rate_limit_changes=c["rate_limit_changes"],
+                pricing_changes=c["pricing_changes"],
+                community_signal_volume=c["community_signal_volume"],
+                sentiment_trend=c["sentiment_trend"] if c["sentiment_trend"] != "n/a" else None,
+                key_events=c["key_events"],
+            )
+            for week_start, c in zip(starts, contexts)
+        )
+
+
+def generate_weekly_reports(
+    first: Optional[dt.date] = None,
+    last: Optional[dt.date] = None,
+    db_path=None,
+    max_workers: int = DEFAULT_RENDER_WORKERS,
+) -> List[Path]:
+    """
+    Render one report per week from `first` to `last` (inclusive, default: this
+    week). Metrics for the whole range come from a handful of grouped queries,
+    and each week is stored in `weekly_reports` as well as written to disk.
+    """
+    reports_dir = ensure_data_dirs() / "reports"
+    weeks = _weeks(first or dt.date.today(), last or first or dt.date.today())
+    range_start, range_end = weeks[0][0], weeks[-1][1]
+    db = db_path or default_db_path()
+    metrics = _community_metrics(range_start, range_end, db)
+    change_counts = _change_counts(range_start, range_end, db)
+    key_events = _key_events(range_start, range_end, db)
+    pricing_changes, doc_changes = _changes_with_details(
+        dt.datetime.combine(range_start, dt.time.min), dt.datetime.combine(range_end, dt.time.max), db
+    )
+
+    generated_at = dt.datetime.utcnow().isoformat() + "Z"
+    contexts: List[Dict[str, Any]] = []
+    for start, end in weeks:
+        volume, sentiment = metrics.get(start, ({}, "n/a"))
+        counts = change_counts.get(start, {})
+        contexts.append(
+            {
+                "week_start": start.isoformat(),
+                "week_end": end.isoformat(),
+                "generated_at": generated_at,
+                "summary": None,
+                "pricing_changes": counts.get("pricing", 0),
+                "rate_limit_changes": counts.get("docs", 0),
+                "pricing_change_urls": [
+                    {"url": url, "captured_at": captured_at.isoformat()}
+                    for url, captured_at in pricing_changes.get(start, [])
+                ],
+                "doc_change_urls": [
+                    {"url": url, "captured_at": captured_at.isoformat()}
+                    for url, captured_at in doc_changes.get(start, [])
+                ],
+                "community_signal_volume": volume,
+                "sentiment_trend": sentiment,
+                "key_events": key_events.get(start, []),
+            }
+        )
+
+    _template()  # compile once before the workers share it
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        paths = list(pool.map(lambda context: _write_report(context, reports_dir), contexts))
+    _persist(contexts, db)
+    return paths
+
+
+def generate_weekly_report(week_start: Optional[dt.date] = None, db_path=None) -> Path:
+    return generate_weekly_reports(week_start, week_start, db_path=db_path)[0]
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Iterator, List
+
+from ..config import ensure_data_dirs
+
+
+def blob_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """
+    Content-addressed, gzip-compressed text store under data/blobs/.
+    Blobs are keyed by the SHA-256 of their text, so identical pages and diffs
+    are written once no matter how many snapshot rows reference them.
+
+    A blob is stored either in full (`<key>.gz`) or, after `compact`, as a
+    delta against another blob (`<key>.delta.gz`). Keys never change, so callers
+    just `get(key)` and chains are resolved here.
+    """
+
+    def __init__(self, root: Path | None = None):
+        self.root = root or ensure_data_dirs() / "blobs"
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.gz"
+
+    def delta_path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.delta.gz"
+
+    def exists(self, key: str) -> bool:
+        return self.path_for(key).exists() or self.delta_path_for(key).exists()
+
+    def is_delta(self, key: str) -> bool:
+        return not self.path_for(key).exists() and self.delta_path_for(key).exists()
+
+    def keys(self) -> Iterator[str]:
+        for path in self.root.glob("??/*.gz"):
+            yield path.name.split(".", 1)[0]
+
+    def size(self, key: str) -> int:
+        path = self.path_for(key) if not self.is_delta(key) else self.delta_path_for(key)
+        return path.stat().st_size
+
+    def _write(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+        os.replace(tmp, path)
+
+    def put(self, text: str) -> str:
+        key = blob_key(text)
+        if self.exists(key):
+            return key
+        self._write(self.path_for(key), text.encode("utf-8"))
+        return key
+
+    def get(self, key: str) -> str:
+        path = self.path_for(key)
+        if path.exists():
+            return gzip.decompress(path.read_bytes()).decode("utf-8")
+        delta = json.loads(gzip.decompress(self.delta_path_for(key).read_bytes()))
+        return apply_delta(self.get(delta["base"]), delta["ops"], delta.get("unit", "lines"))
+
+    def base_of(self, key: str) -> str | None:
+        """The blob a delta-stored blob is expressed against, or None if stored in full."""
+        if not self.is_delta(key):
+            return None
+        return json.loads(gzip.decompress(self.delta_path_for(key).read_bytes()))["base"]
+
+    def chain(self, key: str) -> List[str]:
+        """`key` followed by every base needed to rebuild it, ending at a full blob."""
+        keys = [key]
+        while (base := self.base_of(keys[-1])) is not None:
+            keys.append(base)
+        return keys
+
+    def store_full(self, key: str):
+        """Make `key` a keyframe again (no-op if it already is)."""
+        if self.is_delta(key):
+            self._write(self.path_for(key), self.get(key).encode("utf-8"))
+            self.delta_path_for(key).unlink()
+
+    def store_delta(self, key: str, base: str) -> bool:
+        """
+        Re-store `key` as a delta against `base` if that is smaller and round-trips
+        exactly. Returns whether the blob is now a delta against `base`.
+        """
+        if key == base or key in self.chain(base):
+            return False  # would create a cycle
+        if self.base_of(key) == base:
+            return True
+        text = self.get(key)
+        ops = make_delta(self.get(base), text)
+        if apply_delta(self.get(base), ops) != text:
+            return False
+        payload = json.dumps({"base": base, "ops": ops, "unit": DELTA_UNIT}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(gzip.compress(payload, compresslevel=9, mtime=0)) >= self.size(key):
+            return False
+        self._write(self.delta_path_for(key), payload)
+        self.path_for(key).unlink(missing_ok=True)
+        return True
+
+    def delete(self, key: str):
+        self.path_for(key).unlink(missing_ok=True)
+        self.delta_path_for(key).unlink(missing_ok=True)
+
+
+# Deltas copy runs of tokens ending at a newline or a tag's `>`, so minified
+# single-line pages still share most of their tokens between versions.
+# Deltas written before this used whole lines; their payload has no "unit".
+DELTA_UNIT = "tags"
+_TOKEN_END = re.compile(r"(?<=[>\n])")
+
+
+def _tokens(text: str, unit: str = DELTA_UNIT) -> List[str]:
+    if unit == "lines":
+        return text.splitlines(keepends=True)
+    return [token for token in _TOKEN_END.split(text) if token]
+
+
+def make_delta(base: str, text: str) -> List[Any]:
+    """
+    Delta turning `base` into `text`: `[i, j]` copies base tokens i..j, a string
+    is inserted verbatim. Tokens keep their delimiters, so it round-trips exactly.
+    """
+    base_tokens = _tokens(base)
+    tokens = _tokens(text)
+    ops: List[Any] = []
+    matcher = difflib.SequenceMatcher(None, base_tokens, tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(tokens[j1:j2]))
+    return ops
+
+
+def apply_delta(base: str, ops: List[Any], unit: str = DELTA_UNIT) -> str:
+    base_tokens = _tokens(base, unit)
+    return "".join("".join(base_tokens[op[0] : op[1]]) if isinstance(op, list) else op for op in ops)
+
+
+def snapshot_html(snap: Any, store: BlobStore | None = None) -> str:
+    """Return a snapshot's page body, from the blob store or legacy `raw_html`."""
+    if getattr(snap, "blob_id", None):
+        return (store or BlobStore()).get(snap.blob_id)
+    return snap.raw_html or ""
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import bindparam, delete, select, text, update
+
+from ..config import data_root
+from ..db import DocumentationSnapshot, LatestSnapshot, PricingSnapshot, session_scope
+from .blobs import BlobStore, blob_key
+
+DEFAULT_DAILY_DAYS = 90
+DEFAULT_KEYFRAME_INTERVAL = 10
+
+SNAPSHOT_MODELS = {"pricing": PricingSnapshot, "docs": DocumentationSnapshot}
+
+
+@dataclass
+class CompactionStats:
+    legacy_rows_moved: int = 0
+    legacy_diffs_linked: int = 0
+    legacy_files_removed: int = 0
+    snapshots_pruned: int = 0
+    keyframes: int = 0
+    deltas: int = 0
+    blobs_removed: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+
+def retention_options(sources_config: Dict[str, Any]) -> Dict[str, int]:
+    opts = sources_config.get("retention", {}) or {}
+    options = {
+        "daily_days": int(opts.get("daily_days", DEFAULT_DAILY_DAYS)),
+        "keyframe_interval": int(opts.get("keyframe_interval", DEFAULT_KEYFRAME_INTERVAL)),
+    }
+    if options["daily_days"] < 0:
+        raise ValueError("retention.daily_days must be 0 or more")
+    if options["keyframe_interval"] < 1:
+        raise ValueError("retention.keyframe_interval must be at least 1")
+    return options
+
+
+def _retention_bucket(captured_at: datetime, daily_cutoff: datetime) -> Tuple[Any, ...]:
+    if captured_at >= daily_cutoff:
+        return ("day", captured_at.date())
+    year, week, _ = captured_at.isocalendar()
+    return ("week", year, week)
+
+
+def _select_survivors(
+    rows: List[Tuple[str, datetime]], daily_cutoff: datetime, pinned: Set[str]
+) -> Set[str]:
+    """
+    Keep the newest snapshot per day inside the daily window and per ISO week
+    before it. `rows` is one page's history, newest first; pinned ids always survive.
+    """
+    keep: Set[str] = set()
+    seen: Set[Tuple[Any, ...]] = set()
+    for snapshot_id, captured_at in rows:
+        bucket = _retention_bucket(captured_at, daily_cutoff)
+        if bucket not in seen or snapshot_id in pinned:
+            keep.add(snapshot_id)
+            seen.add(bucket)
+    return keep
+
+
+def _blob_bytes(store: BlobStore, keys: Iterable[str]) -> int:
+    return sum(store.size(key) for key in keys if store.exists(key))
+
+
+def _move_legacy_bodies(session, store: BlobStore, stats: CompactionStats, dry_run: bool):
+    """Move inline raw_html into the blob store, one page at a time."""
+    for model in SNAPSHOT_MODELS.values():
+        ids = session.scalars(
+            select(model.id).where(model.blob_id.is_(None), model.raw_html.is_not(None))
+        ).all()
+        for snapshot_id in ids:
+            stats.legacy_rows_moved += 1
+            if dry_run:
+                continue
+            html = session.scalar(select(model.raw_html).where(model.id == snapshot_id))
+            blob_id = store.put(html)
+            session.execute(update(model).where(model.id == snapshot_id).values(blob_id=blob_id, raw_html=None))
+            session.execute(
+                update(LatestSnapshot).where(LatestSnapshot.snapshot_id == snapshot_id).values(blob_id=blob_id)
+            )
+
+
+def _legacy_snapshot(session, key: str, stamp: str) -> Tuple[Any, str] | None:
+    """The snapshot row whose body hashes to `key` and has no diff yet, nearest the file's timestamp."""
+    try:
+        taken = datetime.strptime(stamp, "%Y%m%dT%H%M%SZ")
+    except ValueError:
+        taken = None
+    candidates = []
+    for model in SNAPSHOT_MODELS.values():
+        rows = session.execute(
+            select(model.id, model.captured_at).where(
+                (model.blob_id == key) | (model.content_hash == key), model.diff_blob_id.is_(None)
+            )
+        )
+        candidates.extend((model, snapshot_id, captured_at) for snapshot_id, captured_at in rows)
+    if not candidates:
+        return None
+    if taken is not None:
+        candidates.sort(key=lambda c: abs((c[2] - taken).total_seconds()))
+    model, snapshot_id, _ = candidates[0]
+    return model, snapshot_id
+
+
+def _import_legacy_diffs(session, store: BlobStore, stats: CompactionStats, dry_run: bool) -> Set[Path]:
+    """
+    Store each data/snapshots/*.diff as a blob and link it to its snapshot as `diff_blob_id`.
+    The snapshot is found through the sibling .html written in the same run; diffs that
+    can't be matched stay on disk. Returns the files that were (or would be) linked.
+    """
+    linked: Set[Path] = set()
+    for path in sorted((data_root() / "snapshots").glob("*.diff")):
+        page = path.with_suffix(".html")
+        if not page.exists():
+            continue
+        html = page.read_text(encoding="utf-8", errors="replace")
+        match = _legacy_snapshot(session, blob_key(html), path.stem.rsplit("_", 1)[-1])
+        if match is None:
+            continue
+        model, snapshot_id = match
+        stats.legacy_diffs_linked += 1
+        linked.add(path)
+        if dry_run:
+            continue
+        diff_blob_id = store.put(path.read_text(encoding="utf-8", errors="replace"))
+        session.execute(update(model).where(model.id == snapshot_id).values(diff_blob_id=diff_blob_id))
+    return linked
+
+
+def _remove_legacy_files(store: BlobStore, stats: CompactionStats, dry_run: bool, linked: Set[Path]):
+    """Drop pre-blob-store copies in data/snapshots/ whose content is already archived as a blob."""
+    snapshot_dir = data_root() / "snapshots"
+    for path in sorted(snapshot_dir.glob("*.html")) + sorted(snapshot_dir.glob("*.diff")):
+        text = path.read_text(encoding="utf-8", errors="replace")
+        if store.exists(blob_key(text)) or (dry_run and path in linked):
+            stats.legacy_files_removed += 1
+            if not dry_run:
+                path.unlink()
+
+
+def _plan_roles(chains: List[List[str]], keyframe_interval: int) -> Dict[str, str | None]:
+    """
+    The base every blob is stored against (None for a keyframe), over all chains at once.
+
+    A blob can sit in several chains (identical pages, a page that flips back), so
+    keyframe positions win over any delta role first. Every other blob becomes a
+    delta against the next newer version in the first chain that reaches it,
+    unless that would rebuild through more than `keyframe_interval - 1` deltas.
+    Bases are always planned before the blobs that use them, so there are no cycles.
+    """
+    roles: Dict[str, str | None] = {}
+    depth: Dict[str, int] = {}
+    for keys in chains:
+        for i, key in enumerate(keys):
+            if i % keyframe_interval == 0:
+                roles[key], depth[key] = None, 0
+    for keys in chains:
+        for i, key in enumerate(keys):
+            if key in roles:
+                continue
+            base = keys[i - 1]
+            if depth[base] + 1 < keyframe_interval:
+                roles[key], depth[key] = base, depth[base] + 1
+            else:
+                roles[key], depth[key] = None, 0
+    return roles
+
+
+def compact(
+    db_path: Path | None = None,
+    daily_days: int = DEFAULT_DAILY_DAYS,
+    keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+    dry_run: bool = False,
+    store: BlobStore | None = None,
+) -> CompactionStats:
+    """
+    Apply snapshot retention and re-store each page's history as delta chains.
+
+    1. Legacy inline `raw_html` bodies and `data/snapshots/` diffs move into the blob store
+       (diffs are linked to their snapshot); files whose content is now stored are removed.
+    2. Per (kind, company, url), only the newest snapshot per day (last `daily_days`
+       days) or per ISO week (older) is kept; the latest and latest-priced ones always are.
+    3. Surviving bodies are chained newest to oldest: every `keyframe_interval`-th
+       version is stored in full and the rest as deltas against the next newer
+       version, so the current page is always a keyframe and any version rebuilds
+       from at most `keyframe_interval - 1` deltas.
+    4. Blobs no longer referenced by a snapshot (nor needed as a delta base) are deleted,
+       so hold the `pricing` and `docs` job locks (utils/locks.py) while this runs, as the CLI does.
+
+    Pruned snapshots are already counted in the daily change rollups; the next kept
+    snapshot keeps its stored diff, which was taken against the pruned one.
+    """
+    if keyframe_interval < 1:
+        raise ValueError("keyframe_interval must be at least 1")
+    store = store or BlobStore()
+    stats = CompactionStats()
+    stats.bytes_before = _blob_bytes(store, set(store.keys()))
+    daily_cutoff = datetime.utcnow() - timedelta(days=daily_days)
+
+    with session_scope(db_path) as session:
+        _move_legacy_bodies(session, store, stats, dry_run)
+        linked = _import_legacy_diffs(session, store, stats, dry_run)
+        pinned = set(session.scalars(select(LatestSnapshot.snapshot_id)))
+        pinned.update(
+            session.scalars(
+                select(LatestSnapshot.priced_snapshot_id).where(LatestSnapshot.priced_snapshot_id.is_not(None))
+            )
+        )
+
+        chains: List[List[str]] = []
+        for kind, model in SNAPSHOT_MODELS.items():
+            history: Dict[Tuple[str, str | None], List[Tuple[str, datetime, str | None]]] = {}
+            rows = session.execute(
+                select(model.company_id, model.url, model.id, model.captured_at, model.blob_id)
+                .order_by(model.company_id, model.url, model.captured_at.desc())
+            )
+            for company_id, url, snapshot_id, captured_at, blob_id in rows:
+                history.setdefault((company_id, url), []).append((snapshot_id, captured_at, blob_id))
+
+            doomed: List[str] = []
+            for versions in history.values():
+                keep = _select_survivors([(sid, ts) for sid, ts, _ in versions], daily_cutoff, pinned)
+                doomed.extend(sid for sid, _, _ in versions if sid not in keep)
+                # distinct bodies, newest first (a page can flip back to an earlier version)
+                chains.append(list(dict.fromkeys(blob for sid, _, blob in versions if sid in keep and blob)))
+            stats.snapshots_pruned += len(doomed)
+            if not dry_run:
+                for i in range(0, len(doomed), 500):
+                    chunk = doomed[i : i + 500]
+                    session.execute(delete(model).where(model.id.in_(chunk)))
+                    session.execute(
+                        text("DELETE FROM search_index WHERE kind = :kind AND ref_id IN :ids").bindparams(
+                            bindparam("ids", expanding=True)
+                        ),
+                        {"kind": kind, "ids": chunk},
+                    )
+
+        referenced: Set[str] = set()
+        for model in SNAPSHOT_MODELS.values():
+            for blob_id, diff_blob_id in session.execute(select(model.blob_id, model.diff_blob_id)):
+                referenced.update(key for key in (blob_id, diff_blob_id) if key)
+
+    roles = _plan_roles([[key for key in keys if store.exists(key)] for keys in chains], keyframe_interval)
+    if not dry_run:
+        # undo stored deltas the plan doesn't keep first, so new ones can't form a cycle with them
+        for key, base in roles.items():
+            if store.base_of(key) != base:
+                store.store_full(key)
+    for key, base in roles.items():
+        if base is None:
+            stats.keyframes += 1
+        elif dry_run or store.store_delta(key, base):
+            stats.deltas += 1
+        else:
+            stats.keyframes += 1
+            store.store_full(key)
+
+    needed = set(referenced)
+    for key in referenced:
+        if store.exists(key):
+            needed.update(store.chain(key))
+    for key in set(store.keys()) - needed:
+        stats.blobs_removed += 1
+        if not dry_run:
+            store.delete(key)
+    _remove_legacy_files(store, stats, dry_run, linked)
+
+    stats.bytes_after = _blob_bytes(store, set(store.keys()))
+    return stats
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import JSON, Boolean, Date, DateTime, Float, Integer, String, column, text
+
+from ..db import get_engine
+
+DEFAULT_BATCH_SIZE = 50_000
+SUFFIX_FORMATS = {".parquet": "parquet", ".pq": "parquet", ".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+# Column kinds: how a value is typed in SQL, in Arrow and in the text formats.
+KINDS = {
+    "string": String(),
+    "int": Integer(),
+    "float": Float(),
+    "bool": Boolean(),
+    "timestamp": DateTime(),
+    "date": Date(),
+    "list": JSON(),  # list of strings
+    "json": JSON(),  # arbitrary JSON, exported as its text
+}
+
+
+@dataclass
+class Dataset:
+    """A SELECT over one table plus the columns it yields and which of them the predicates filter on."""
+
+    sql: str
+    columns: List[Tuple[str, str]]
+    time_column: str
+    company_column: str
+    source_column: str | None = None
+
+
+DATASETS: Dict[str, Dataset] = {
+    "signals": Dataset(
+        sql=(
+            "SELECT s.id, s.company_id, s.source, s.source_id, s.captured_at, s.url, s.sentiment, "
+            "s.keywords_matched, s.keyword_categories, s.score, s.comment_count, s.content "
+            "FROM community_signals s"
+        ),
+        columns=[
+            ("id", "string"),
+            ("company_id", "string"),
+            ("source", "string"),
+            ("source_id", "string"),
+            ("captured_at", "timestamp"),
+            ("url", "string"),
+            ("sentiment", "float"),
+            ("keywords_matched", "list"),
+            ("keyword_categories", "list"),
+            ("score", "int"),
+            ("comment_count", "int"),
+            ("content", "string"),
+        ],
+        time_column="s.captured_at",
+        company_column="s.company_id",
+        source_column="s.source",
+    ),
+    # one row per tier the extractor found in a pricing snapshot
+    "pricing": Dataset(
+        sql=(
+            "SELECT p.id AS snapshot_id, p.company_id, p.url, p.captured_at, p.is_change, "
+            "json_extract(p.features, '$.title') AS title, json_extract(t.value, '$.tier') AS tier, "
+            "json_extract(t.value, '$.price_monthly') AS price_monthly, "
+            "json_extract(t.value, '$.price_annual') AS price_annual "
+            "FROM pricing_snapshots p, json_each(p.features, '$.pricing') t"
+        ),
+        columns=[
+            ("snapshot_id", "string"),
+            ("company_id", "string"),
+            ("url", "string"),
+            ("captured_at", "timestamp"),
+            ("is_change", "bool"),
+            ("title", "string"),
+            ("tier", "string"),
+            ("price_monthly", "float"),
+            ("price_annual", "float"),
+        ],
+        time_column="p.captured_at",
+        company_column="p.company_id",
+    ),
+    "snapshots": Dataset(
+        sql=(
+            "SELECT * FROM ("
+            "  SELECT 'pricing' AS kind, id, company_id, url, captured_at, content_hash, is_change, blob_id, "
+            "  diff_blob_id FROM pricing_snapshots"
+            "  UNION ALL"
+            "  SELECT 'docs', id, company_id, url, captured_at, content_hash, is_change, blob_id, "
+            "  diff_blob_id FROM documentation_snapshots"
+            ") s"
+        ),
+        columns=[
+            ("kind", "string"),
+            ("id", "string"),
+            ("company_id", "string"),
+            ("url", "string"),
+            ("captured_at", "timestamp"),
+            ("content_hash", "string"),
+            ("is_change", "bool"),
+            ("blob_id", "string"),
+            ("diff_blob_id", "string"),
+        ],
+        time_column="s.captured_at",
+        company_column="s.company_id",
+        source_column="s.kind",
+    ),
+    "events": Dataset(
+        sql=(
+            "SELECT e.id, e.company_id, e.event_date, e.event_type, e.amount, e.valuation, e.source_url, "
+            "e.notes, e.raw_data FROM financial_events e"
+        ),
+        columns=[
+            ("id", "string"),
+            ("company_id", "string"),
+            ("event_date", "date"),
+            ("event_type", "string"),
+            ("amount", "float"),
+            ("valuation", "float"),
+            ("source_url", "string"),
+            ("notes", "string"),
+            ("raw_data", "json"),
+        ],
+        time_column="e.event_date",
+        company_column="e.company_id",
+    ),
+}
+
+
+@dataclass
+class ExportStats:
+    rows: int = 0
+    batches: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+
+def format_for(path: Path, fmt: str | None = None) -> str:
+    """The explicit format, else the one implied by the file suffix (`.gz` allowed for text formats)."""
+    if fmt:
+        return fmt
+    suffixes = [s.lower() for s in path.suffixes]
+    if suffixes and suffixes[-1] == ".gz":
+        suffixes.pop()
+    return SUFFIX_FORMATS.get(suffixes[-1] if suffixes else "", "parquet")
+
+
+def _query(
+    dataset: Dataset,
+    company: str | None,
+    source: str | None,
+    since: date | None,
+    until: date | None,
+    columns: Sequence[str] | None,
+):
+    where, params = [], {}
+    if company:
+        where.append(f"{dataset.company_column} = :company")
+        params["company"] = company
+    if source:
+        if not dataset.source_column:
+            raise ValueError("This dataset has no source column to filter on.")
+        where.append(f"{dataset.source_column} = :source")
+        params["source"] = source
+    # DateTime columns are stored as 'YYYY-MM-DD HH:MM:SS.ffffff' text, so date strings compare correctly
+    if since:
+        where.append(f"{dataset.time_column} >= :since")
+        params["since"] = since.isoformat()
+    if until:
+        where.append(f"{dataset.time_column} < :until")
+        params["until"] = until.isoformat()
+    unknown = sorted(set(columns or ()) - {name for name, _ in dataset.columns})
+    if unknown:
+        raise ValueError(f"Unknown columns {unknown}; choose from {[name for name, _ in dataset.columns]}")
+    wanted = [(name, kind) for name, kind in dataset.columns if not columns or name in columns]
+    # SQLite flattens the subquery, so columns left out are never read (content, say)
+    inner = dataset.sql + (" WHERE " + " AND ".join(where) if where else "")
+    sql = f"SELECT {', '.join(name for name, _ in wanted)} FROM ({inner}) q"
+    typed = [column(name, KINDS[kind]) for name, kind in wanted]
+    return text(sql).columns(*typed), params, [(i, name, kind) for i, (name, kind) in enumerate(wanted)]
+
+
+def _batches(db_path: Path | None, stmt, params: Dict[str, Any], batch_size: int) -> Iterator[List[Any]]:
+    with get_engine(db_path).connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt, params)
+        yield from result.partitions(batch_size)
+
+
+def _text_value(value: Any, kind: str) -> Any:
+    if value is None:
+        return None
+    if kind in ("list", "json"):
+        return json.dumps(value, ensure_ascii=False)
+    if kind in ("timestamp", "date"):
+        return value.isoformat()
+    return value
+
+
+class _ParquetWriter:
+    def __init__(self, path: Path, columns: List[Tuple[int, str, str]]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError(
+                "Parquet export needs pyarrow (pip install -e \".[export]\"); use --format csv or ndjson instead."
+            ) from exc
+        self.pa = pa
+        types = {
+            "string": pa.string(),
+            "int": pa.int64(),
+            "float": pa.float64(),
+            "bool": pa.bool_(),
+            "timestamp": pa.timestamp("us"),
+            "date": pa.date32(),
+            "list": pa.list_(pa.string()),
+            "json": pa.string(),
+        }
+        self.columns = columns
+        self.schema = pa.schema([(name, types[kind]) for _, name, kind in columns])
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows: List[Any]):
+        arrays = []
+        for (i, _, kind), field in zip(self.columns, self.schema):
+            values = [row[i] for row in rows]
+            if kind == "json":
+                values = [_text_value(value, kind) for value in values]
+            arrays.append(self.pa.array(values, type=field.type))
+        self.writer.write_batch(self.pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class _TextWriter:
+    """CSV or NDJSON, optionally gzip-compressed."""
+
+    def __init__(self, path: Path, columns: List[Tuple[int, str, str]], fmt: str, compress: bool = False):
+        self.columns = columns
+        self.fmt = fmt
+        raw = gzip.open(path, "wb") if compress else open(path, "wb")
+        self.out = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        if fmt == "csv":
+            self.csv = csv.writer(self.out)
+            self.csv.writerow([name for _, name, _ in columns])
+
+    def write(self, rows: List[Any]):
+        if self.fmt == "csv":
+            self.csv.writerows([_text_value(row[i], kind) for i, _, kind in self.columns] for row in rows)
+            return
+        for row in rows:
+            record = {name: row[i] for i, name, _ in self.columns}
+            self.out.write(json.dumps(record, ensure_ascii=False, default=_json_default) + "\n")
+
+    def close(self):
+        self.out.close()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def export(
+    dataset: str,
+    path: Path,
+    db_path: Path | None = None,
+    fmt: str | None = None,
+    company: str | None = None,
+    source: str | None = None,
+    since: date | None = None,
+    until: date | None = None,
+    columns: Sequence[str] | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> ExportStats:
+    """
+    Stream one dataset (see DATASETS) to Parquet, CSV or NDJSON.
+
+    Company, source and date predicates go into the SQL WHERE clause; `until`
+    is exclusive. Rows are read from a streaming cursor and written
+    `batch_size` at a time (one Parquet row group per batch), so memory does not
+    grow with the table. The file is written next to `path` and moved into
+    place at the end, so a failed export never leaves a truncated file behind.
+    """
+    fmt = format_for(path, fmt)
+    stmt, params, selected = _query(DATASETS[dataset], company, source, since, until, columns)
+    stats = ExportStats()
+    started = time.perf_counter()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    if fmt == "parquet":
+        writer = _ParquetWriter(tmp, selected)
+    else:
+        writer = _TextWriter(tmp, selected, fmt, compress=path.suffix.lower() == ".gz")
+    try:
+        for rows in _batches(db_path, stmt, params, batch_size):
+            writer.write(rows)
+            stats.rows += len(rows)
+            stats.batches += 1
+        if fmt == "parquet" and not stats.batches:
+            writer.write([])  # keep the schema in an empty file
+        writer.close()
+        os.replace(tmp, path)
+    except BaseException:
+        writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    stats.bytes = path.stat().st_size
+    stats.seconds = time.perf_counter() - started
+    return stats
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import os
+import re
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+# Elements whose contents never carry pricing/limits text but routinely embed
+# nonces, build IDs and bundle hashes.
+STRIP_TAGS = ("script", "style", "noscript", "template", "svg", "iframe")
+
+# Tokens that rotate between otherwise identical renders.
+VOLATILE_PATTERNS = [
+    r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b",  # UUIDs
+    r"\b\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?\b",  # ISO timestamps
+    r"\b[0-9a-fA-F]{16,}\b",  # hex digests / build IDs
+    r"\b(?=[\w-]*\d)(?=[\w-]*[A-Za-z])[\w-]{32,}",  # long mixed tokens (CSRF, base64)
+]
+_VOLATILE_RE = re.compile("|".join(f"(?:{p})" for p in VOLATILE_PATTERNS))
+
+# Set to pin a backend (e.g. "html.parser"); otherwise the fastest installed one is used.
+BACKEND_ENV_VAR = "AI_SUB_MONITOR_HTML_PARSER"
+
+# A backend turns raw HTML into (title, visible text with one text node per line).
+Backend = Callable[[str], Tuple[str | None, str]]
+
+
+def _parse_selectolax(html: str) -> Tuple[str | None, str]:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    title_node = tree.css_first("title")
+    title = title_node.text(strip=True) if title_node else None
+    tree.strip_tags(list(STRIP_TAGS))
+    return title or None, tree.root.text(separator="\n") if tree.root else ""
+
+
+def _parse_lxml(html: str) -> Tuple[str | None, str]:
+    import lxml.etree
+    import lxml.html
+
+    if not html.strip():
+        return None, ""
+    try:
+        doc = lxml.html.document_fromstring(html)
+    except lxml.etree.ParserError:  # "Document is empty": only comments or a bare doctype
+        return None, ""
+    title = (doc.findtext(".//title") or "").strip()
+    for el in doc.xpath("|".join(f"//{tag}" for tag in STRIP_TAGS) + "|//comment()"):
+        el.drop_tree()  # keeps the element's tail text
+    return title or None, "\n".join(doc.itertext())
+
+
+def _parse_html_parser(html: str) -> Tuple[str | None, str]:
+    from bs4 import BeautifulSoup, Comment
+
+    soup = BeautifulSoup(html, "html.parser")
+    title = (soup.title.get_text() if soup.title else "").strip()
+    for tag in soup(STRIP_TAGS):
+        tag.decompose()
+    for comment in soup.find_all(string=lambda s: isinstance(s, Comment)):
+        comment.extract()
+    return title or None, soup.get_text("\n")
+
+
+# name -> (module probed for availability, parse function); fastest first.
+BACKENDS: Dict[str, Tuple[str, Backend]] = {
+    "selectolax": ("selectolax.lexbor", _parse_selectolax),
+    "lxml": ("lxml.html", _parse_lxml),
+    "html.parser": ("bs4", _parse_html_parser),
+}
+
+
+def register_backend(name: str, module: str, parse: Backend, preferred: bool = False) -> None:
+    """Plug in another parser; `preferred` puts it ahead of the built-in ones."""
+    global BACKENDS
+    entry = {name: (module, parse)}
+    BACKENDS = {**entry, **BACKENDS} if preferred else {**BACKENDS, **entry}
+
+
+def available_backends() -> List[str]:
+    names = []
+    for name, (module, _) in BACKENDS.items():
+        try:
+            if importlib.util.find_spec(module) is not None:
+                names.append(name)
+        except ModuleNotFoundError:
+            continue
+    return names
+
+
+def default_backend() -> str:
+    pinned = os.getenv(BACKEND_ENV_VAR)
+    if pinned:
+        if pinned not in BACKENDS:
+            raise ValueError(f"Unknown HTML parser backend {pinned!r}; choose from {sorted(BACKENDS)}")
+        return pinned
+    available = available_backends()
+    if not available:
+        raise RuntimeError("No HTML parser installed; install beautifulsoup4, lxml or selectolax.")
+    return available[0]
+
+
+class ParsedPage:
+    """
+    A fetched document parsed exactly once. Extraction reads `text` / `title`,
+    while hashing and diffing share `normalized()`, so no stage re-parses HTML.
+    """
+
+    def __init__(self, title: str | None, text: str, backend: str):
+        self.title = title
+        self.text = text
+        self.backend = backend
+        self._normalized: Dict[Tuple[str, ...], str] = {}
+
+    def normalized(self, ignore_patterns: Iterable[str] = ()) -> str:
+        key = tuple(ignore_patterns)
+        if key not in self._normalized:
+            self._normalized[key] = normalize_text(self.text, key)
+        return self._normalized[key]
+
+
+def parse_page(html: str, backend: str | None = None) -> ParsedPage:
+    backend = backend or default_backend()
+    title, text = BACKENDS[backend][1](html)
+    return ParsedPage(title, text, backend)
+
+
+def ignore_patterns_for(sources_config: Dict[str, Any], url: str) -> List[str]:
+    """Global plus per-URL ignore regexes from the `normalization` block of sources.yaml."""
+    opts = sources_config.get("normalization", {}) or {}
+    per_url = (opts.get("urls", {}) or {}).get(url, []) or []
+    return list(opts.get("ignore_patterns", []) or []) + list(per_url)
+
+
+def normalize_html(html: str, ignore_patterns: Iterable[str] = ()) -> str:
+    """
+    Reduce a page to its visible text, one block per line, with scripts, styles,
+    comments, markup attributes and volatile tokens removed. Hashing and diffing
+    this instead of raw HTML means only real content edits count as changes.
+    """
+    return parse_page(html).normalized(ignore_patterns)
+
+
+def normalize_text(text: str, ignore_patterns: Iterable[str] = ()) -> str:
+    text = _VOLATILE_RE.sub("", text)
+    for pattern in ignore_patterns:
+        text = re.sub(pattern, "", text)
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def hash_text(normalized: str) -> str:
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, TypeVar
+
 import httpx
 
+from ..config import ensure_data_dirs
+
 DEFAULT_TIMEOUT = httpx.Timeout(20.0)
 DEFAULT_HEADERS = {
     "User-Agent": "ai-sub-monitor/0.1 (+https://github.com/paulsalama/AI-Company-Monitor)",
     "Accept-Language": "en-US,en;q=0.9",
 }
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_PER_HOST_CONCURRENCY = 2
 
 
 def get_client() -> httpx.Client:
@@ -17,6 +32,89 @@ def get_client() -> httpx.Client:
     )
 
 
+def get_async_client(max_connections: int = DEFAULT_MAX_CONCURRENCY) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=DEFAULT_TIMEOUT,
+        follow_redirects=True,
+        headers=DEFAULT_HEADERS,
+        limits=httpx.Limits(max_connections=max_connections),
+    )
+
+
+T = TypeVar("T")
+
+
+class WarmClients:
+    """
+    A private event loop on a background thread holding long-lived AsyncClients.
+    While enabled (by the daemon), collectors run their async work on this loop
+    and reuse its clients, so connection pools and TLS sessions survive between
+    runs instead of being rebuilt by every `asyncio.run`.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._thread = threading.Thread(target=self.loop.run_forever, name="warm-clients", daemon=True)
+        self._thread.start()
+
+    def client(self, name: str, max_connections: int) -> httpx.AsyncClient:
+        # only called from coroutines on self.loop, so no locking is needed
+        if name not in self._clients:
+            self._clients[name] = get_async_client(max_connections=max_connections)
+        return self._clients[name]
+
+    def run(self, coro: Awaitable[T]) -> T:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def close(self):
+        async def _close_all():
+            for client in self._clients.values():
+                await client.aclose()
+            self._clients.clear()
+
+        self.run(_close_all())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+_warm: WarmClients | None = None
+
+
+def enable_warm_clients() -> WarmClients:
+    global _warm
+    if _warm is None:
+        _warm = WarmClients()
+    return _warm
+
+
+def disable_warm_clients():
+    global _warm
+    if _warm is not None:
+        _warm.close()
+        _warm = None
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """Run a coroutine to completion: on the warm loop if enabled, else with `asyncio.run`."""
+    if _warm is not None:
+        return _warm.run(coro)
+    return asyncio.run(coro)
+
+
+@asynccontextmanager
+async def async_client(
+    name: str, max_connections: int = DEFAULT_MAX_CONCURRENCY
+) -> AsyncIterator[httpx.AsyncClient]:
+    """The shared client `name` when warm clients are enabled, else a fresh one closed on exit."""
+    if _warm is not None:
+        yield _warm.client(name, max_connections)
+        return
+    async with get_async_client(max_connections=max_connections) as client:
+        yield client
+
+
 def fetch_with_retries(
     client: httpx.Client,
     url: str,
@@ -32,7 +130,154 @@ def fetch_with_retries(
             if attempt >= max_attempts:
                 raise
         if backoff_seconds:
-            import time
-
             time.sleep(backoff_seconds * attempt)
     return None
+
+
+async def fetch_with_retries_async(
+    client: httpx.AsyncClient,
+    url: str,
+    max_attempts: int = 3,
+    backoff_seconds: float = 2.0,
+    headers: Dict[str, str] | None = None,
+) -> httpx.Response | None:
+    attempt = 0
+    while attempt < max_attempts:
+        attempt += 1
+        try:
+            return await client.get(url, headers=headers)
+        except Exception:
+            if attempt >= max_attempts:
+                raise
+        if backoff_seconds:
+            await asyncio.sleep(backoff_seconds * attempt)
+    return None
+
+
+class ValidatorCache:
+    """
+    Persistent store of ETag / Last-Modified validators per URL, used to send
+    conditional GETs. One JSON file per namespace under data/cache/.
+    """
+
+    def __init__(self, path: Path, entries: Dict[str, Dict[str, str]] | None = None):
+        self.path = path
+        self.entries: Dict[str, Dict[str, str]] = entries or {}
+
+    @classmethod
+    def load(cls, namespace: str, path: Path | None = None) -> "ValidatorCache":
+        path = path or ensure_data_dirs() / "cache" / f"validators_{namespace}.json"
+        entries: Dict[str, Dict[str, str]] = {}
+        if path.exists():
+            try:
+                entries = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError:
+                entries = {}  # corrupt cache only costs one full fetch
+        return cls(path, entries)
+
+    def headers_for(self, url: str) -> Dict[str, str]:
+        entry = self.entries.get(url, {})
+        headers: Dict[str, str] = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url: str, response: httpx.Response) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code == 304:
+            # 304s may omit validators; keep what we already have
+            entry = dict(self.entries.get(url, {}))
+            if etag:
+                entry["etag"] = etag
+            if last_modified:
+                entry["last_modified"] = last_modified
+        else:
+            entry = {k: v for k, v in (("etag", etag), ("last_modified", last_modified)) if v}
+        if entry:
+            self.entries[url] = entry
+        else:
+            self.entries.pop(url, None)
+
+    def forget(self, url: str) -> None:
+        self.entries.pop(url, None)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+@dataclass
+class FetchResult:
+    url: str
+    response: httpx.Response | None = None
+    error: Exception | None = None
+    elapsed: float = 0.0
+
+    @property
+    def not_modified(self) -> bool:
+        return self.response is not None and self.response.status_code == 304
+
+
+def fetch_options(sources_config: Dict[str, Any]) -> Dict[str, int]:
+    """Read concurrency caps from the optional `http` block of sources.yaml."""
+    opts = sources_config.get("http", {}) or {}
+    return {
+        "max_concurrency": int(opts.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)),
+        "per_host_concurrency": int(opts.get("per_host_concurrency", DEFAULT_PER_HOST_CONCURRENCY)),
+    }
+
+
+async def fetch_all_async(
+    urls: Iterable[str],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    per_host_concurrency: int = DEFAULT_PER_HOST_CONCURRENCY,
+    validators: ValidatorCache | None = None,
+) -> Dict[str, FetchResult]:
+    """
+    Fetch every URL concurrently, capped overall and per host.
+    Failures are captured on the result rather than raised so one bad page
+    doesn't abort the batch. With `validators`, requests are conditional and
+    unchanged pages come back as bodiless 304s (`FetchResult.not_modified`).
+    """
+    unique = list(dict.fromkeys(urls))
+    overall = asyncio.Semaphore(max_concurrency)
+    per_host: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_host_concurrency))
+
+    async def _one(client: httpx.AsyncClient, url: str) -> FetchResult:
+        # take the host slot first so a busy host doesn't hold global slots while waiting
+        async with per_host[httpx.URL(url).host], overall:
+            started = time.perf_counter()
+            try:
+                headers = validators.headers_for(url) if validators else None
+                resp = await fetch_with_retries_async(client, url, headers=headers)
+                if resp.status_code != 304:
+                    resp.raise_for_status()
+                return FetchResult(url, response=resp, elapsed=time.perf_counter() - started)
+            except Exception as exc:
+                return FetchResult(url, error=exc, elapsed=time.perf_counter() - started)
+
+    async with async_client("pages", max_connections=max_concurrency) as client:
+        results = await asyncio.gather(*(_one(client, url) for url in unique))
+    return {res.url: res for res in results}
+
+
+def fetch_all(
+    urls: Iterable[str],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    per_host_concurrency: int = DEFAULT_PER_HOST_CONCURRENCY,
+    validators: ValidatorCache | None = None,
+) -> Dict[str, FetchResult]:
+    """Blocking wrapper around `fetch_all_async` for the synchronous collectors."""
+    return run_async(
+        fetch_all_async(
+            urls,
+            max_concurrency=max_concurrency,
+            per_host_concurrency=per_host_concurrency,
+            validators=validators,
+        )
+    )
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+from ..config import ensure_data_dirs
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+
+def try_job_lock(name: str) -> IO[str] | None:
+    """
+    Take the exclusive, non-blocking lock on data/locks/<name>.lock.
+
+    Returns the open lock file (closing it releases the lock) or None if another
+    process holds it. The daemon and the matching CLI commands (`collect`,
+    `report`, `update-models`) share these locks, so a cron run never overlaps
+    the same job in the daemon or in another cron run. The OS drops the lock if
+    the holder dies, so there are no stale locks to clean up.
+    """
+    lock_dir = ensure_data_dirs() / "locks"
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    handle = open(lock_dir / f"{name}.lock", "w")
+    if fcntl is None:
+        return handle
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+@contextmanager
+def job_lock(name: str) -> Iterator[bool]:
+    """`with job_lock("report") as acquired:` holds the lock for the block if `acquired`."""
+    handle = try_job_lock(name)
+    try:
+        yield handle is not None
+    finally:
+        if handle is not None:
+            handle.close()
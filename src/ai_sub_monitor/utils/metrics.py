@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Generator, List
+
+from sqlalchemy import delete, func, insert, select
+
+from ..config import repo_root
+from ..db import CollectorRun, CollectorStageMetric, session_scope
+
+DEFAULT_KEEP_DAYS = 90
+PROMETHEUS_PREFIX = "ai_sub_monitor"
+COUNTERS = ("items_fetched", "rows_inserted", "rows_skipped", "bytes_fetched", "errors")
+# name (after the prefix) -> (type, help)
+PROMETHEUS_METRICS: Dict[str, tuple[str, str]] = {
+    # a gauge: the table is pruned after metrics.keep_days, so the count can go down
+    "collector_runs_recorded": ("gauge", "Collector runs still recorded (within metrics.keep_days), by outcome."),
+    "collector_last_run_timestamp_seconds": ("gauge", "Start of the latest run (Unix time, UTC)."),
+    "collector_last_run_duration_seconds": ("gauge", "Wall time of the latest run."),
+    "collector_last_run_success": ("gauge", "1 if the latest run finished without raising."),
+    "collector_last_run_items_fetched": ("gauge", "Pages, posts or issues read in the latest run."),
+    "collector_last_run_rows_inserted": ("gauge", "Snapshots or signals stored by the latest run."),
+    "collector_last_run_rows_skipped": ("gauge", "Unchanged pages or already-known signals in the latest run."),
+    "collector_last_run_bytes_fetched": ("gauge", "Response bytes read by the latest run."),
+    "collector_last_run_errors": ("gauge", "Failed fetches and other errors in the latest run."),
+    "collector_last_run_stage_seconds": ("gauge", "Seconds per stage in the latest run."),
+    "collector_last_fetch_seconds": ("gauge", "Fetch latency per URL / feed in the latest run."),
+    "collector_last_fetch_bytes": ("gauge", "Response bytes per URL / feed in the latest run."),
+}
+
+
+@dataclass
+class StageSample:
+    stage: str
+    seconds: float
+    target: str | None = None
+    count: int | None = None
+    bytes: int | None = None
+    error: str | None = None
+
+
+class RunMetrics:
+    """
+    Timings and counters for one collector run. Collectors reach the active one
+    through `current_run()`; `track_run` stores it when the run ends.
+    """
+
+    def __init__(self, collector: str):
+        self.collector = collector
+        self.started_at = datetime.utcnow()
+        self.started = time.perf_counter()
+        self.status = "ok"
+        self.error: str | None = None
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self.samples: List[StageSample] = []
+        self._lock = threading.Lock()
+        self._nesting = threading.local()
+
+    def count(self, counter: str, n: int = 1):
+        with self._lock:
+            self.counters[counter] += n
+
+    def record(
+        self,
+        stage: str,
+        seconds: float,
+        target: str | None = None,
+        count: int | None = None,
+        bytes: int | None = None,
+        error: str | None = None,
+    ):
+        with self._lock:
+            self.samples.append(StageSample(stage, seconds, target, count, bytes, error))
+
+    @contextmanager
+    def stage(self, stage: str, target: str | None = None, count: int | None = None) -> Generator[None, None, None]:
+        """Time a block. Time spent in stages nested inside it is left out of its own sample."""
+        stack = self._nesting.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.record(stage, elapsed - nested, target=target, count=count, error=error)
+
+    def fetched(self, url: str, result: Any):
+        """Record a `utils.http.FetchResult`: latency, body size and any error."""
+        response = result.response
+        size = len(response.content) if response is not None else 0
+        error = f"{type(result.error).__name__}: {result.error}" if result.error is not None else None
+        self.record("fetch", result.elapsed, target=url, bytes=size, error=error)
+        self.count("items_fetched")
+        self.count("bytes_fetched", size)
+        if error:
+            self.count("errors")
+
+
+_current: ContextVar[RunMetrics | None] = ContextVar("collector_run", default=None)
+
+
+def current_run() -> RunMetrics:
+    """The run being tracked in this context, or a throwaway one when a collector runs untracked."""
+    return _current.get() or RunMetrics("untracked")
+
+
+def metrics_options(sources_config: Dict[str, Any]) -> Dict[str, Any]:
+    opts = sources_config.get("metrics", {}) or {}
+    textfile = opts.get("textfile")
+    if textfile and not Path(textfile).is_absolute():
+        textfile = repo_root() / textfile
+    return {
+        "textfile": Path(textfile) if textfile else None,
+        "keep_days": int(opts.get("keep_days", DEFAULT_KEEP_DAYS)),
+    }
+
+
+@contextmanager
+def track_run(
+    collector: str, db_path: Path | None = None, sources_config: Dict[str, Any] | None = None
+) -> Generator[RunMetrics, None, None]:
+    """
+    Make a RunMetrics current for the block and store it when the block ends,
+    failed runs included. Runs older than `metrics.keep_days` are pruned, and
+    the Prometheus textfile is rewritten if `metrics.textfile` is set.
+    """
+    run = RunMetrics(collector)
+    token = _current.set(run)
+    try:
+        yield run
+    except Exception as exc:
+        run.status = "error"
+        run.error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+        run.count("errors")
+        raise
+    finally:
+        _current.reset(token)
+        opts = metrics_options(sources_config or {})
+        save_run(run, db_path, keep_days=opts["keep_days"])
+        if opts["textfile"]:
+            write_prometheus_textfile(opts["textfile"], db_path)
+
+
+def save_run(run: RunMetrics, db_path: Path | None = None, keep_days: int = DEFAULT_KEEP_DAYS) -> str:
+    duration = time.perf_counter() - run.started
+    row = CollectorRun(
+        collector=run.collector,
+        started_at=run.started_at,
+        finished_at=run.started_at + timedelta(seconds=duration),
+        duration_seconds=duration,
+        status=run.status,
+        error=run.error,
+        **run.counters,
+    )
+    with session_scope(db_path) as session:
+        session.add(row)
+        session.flush()
+        if run.samples:
+            session.execute(
+                insert(CollectorStageMetric),
+                [{"run_id": row.id, **sample.__dict__} for sample in run.samples],
+            )
+        if keep_days > 0:
+            expired = select(CollectorRun.id).where(
+                CollectorRun.started_at < datetime.utcnow() - timedelta(days=keep_days)
+            )
+            session.execute(delete(CollectorStageMetric).where(CollectorStageMetric.run_id.in_(expired)))
+            session.execute(delete(CollectorRun).where(CollectorRun.id.in_(expired)))
+        return row.id
+
+
+def recent_runs(db_path: Path | None = None, collector: str | None = None, limit: int = 10) -> List[CollectorRun]:
+    stmt = select(CollectorRun).order_by(CollectorRun.started_at.desc()).limit(limit)
+    if collector:
+        stmt = stmt.where(CollectorRun.collector == collector)
+    with session_scope(db_path) as session:
+        runs = list(session.scalars(stmt))
+        session.expunge_all()
+    return runs
+
+
+def stage_totals(
+    db_path: Path | None = None, since: datetime | None = None, collector: str | None = None
+) -> List[Dict[str, Any]]:
+    """Seconds per (collector, stage) over the runs started since `since`, largest first."""
+    stmt = (
+        select(
+            CollectorRun.collector,
+            CollectorStageMetric.stage,
+            func.count(func.distinct(CollectorRun.id)),
+            func.sum(CollectorStageMetric.seconds),
+            func.sum(CollectorStageMetric.count),
+        )
+        .join(CollectorRun, CollectorRun.id == CollectorStageMetric.run_id)
+        .group_by(CollectorRun.collector, CollectorStageMetric.stage)
+        .order_by(func.sum(CollectorStageMetric.seconds).desc())
+    )
+    if since:
+        stmt = stmt.where(CollectorRun.started_at >= since)
+    if collector:
+        stmt = stmt.where(CollectorRun.collector == collector)
+    with session_scope(db_path) as session:
+        rows = session.execute(stmt).all()
+    return [
+        {"collector": c, "stage": stage, "runs": runs, "seconds": seconds or 0.0, "items": items}
+        for c, stage, runs, seconds, items in rows
+    ]
+
+
+def slowest_targets(
+    db_path: Path | None = None,
+    since: datetime | None = None,
+    collector: str | None = None,
+    stage: str = "fetch",
+    limit: int = 10,
+) -> List[Dict[str, Any]]:
+    """URLs / feeds with the highest mean time in `stage`."""
+    mean = func.avg(CollectorStageMetric.seconds)
+    stmt = (
+        select(
+            CollectorRun.collector,
+            CollectorStageMetric.target,
+            func.count(),
+            mean,
+            func.max(CollectorStageMetric.seconds),
+            func.avg(CollectorStageMetric.bytes),
+            func.count(CollectorStageMetric.error),
+        )
+        .join(CollectorRun, CollectorRun.id == CollectorStageMetric.run_id)
+        .where(CollectorStageMetric.stage == stage, CollectorStageMetric.target.is_not(None))
+        .group_by(CollectorRun.collector, CollectorStageMetric.target)
+        .order_by(mean.desc())
+        .limit(limit)
+    )
+    if since:
+        stmt = stmt.where(CollectorRun.started_at >= since)
+    if collector:
+        stmt = stmt.where(CollectorRun.collector == collector)
+    with session_scope(db_path) as session:
+        rows = session.execute(stmt).all()
+    return [
+        {
+            "collector": c,
+            "target": target,
+            "samples": samples,
+            "mean_seconds": avg,
+            "max_seconds": worst,
+            "mean_bytes": avg_bytes,
+            "errors": errors,
+        }
+        for c, target, samples, avg, worst, avg_bytes, errors in rows
+    ]
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def prometheus_text(db_path: Path | None = None) -> str:
+    """
+    Render the latest run of every collector in the Prometheus text format:
+    run outcome and totals, seconds per stage, and fetch latency/bytes per target.
+    """
+    with session_scope(db_path) as session:
+        latest = (
+            select(CollectorRun.collector, func.max(CollectorRun.started_at).label("started_at"))
+            .group_by(CollectorRun.collector)
+            .subquery()
+        )
+        runs = list(
+            session.scalars(
+                select(CollectorRun).join(
+                    latest,
+                    (CollectorRun.collector == latest.c.collector) & (CollectorRun.started_at == latest.c.started_at),
+                )
+            )
+        )
+        totals = session.execute(
+            select(CollectorRun.collector, CollectorRun.status, func.count()).group_by(
+                CollectorRun.collector, CollectorRun.status
+            )
+        ).all()
+        by_run = {run.id: run.collector for run in runs}
+        samples = session.execute(
+            select(
+                CollectorStageMetric.run_id,
+                CollectorStageMetric.stage,
+                CollectorStageMetric.target,
+                CollectorStageMetric.seconds,
+                CollectorStageMetric.bytes,
+            ).where(CollectorStageMetric.run_id.in_(list(by_run)))
+        ).all()
+        session.expunge_all()
+
+    lines: Dict[str, List[str]] = {name: [] for name in PROMETHEUS_METRICS}
+
+    def add(name: str, labels: Dict[str, str], value: float):
+        rendered = ",".join(f'{key}="{_label(str(val))}"' for key, val in labels.items())
+        number = str(value) if isinstance(value, int) else repr(float(value))
+        lines[name].append(f"{PROMETHEUS_PREFIX}_{name}{{{rendered}}} {number}")
+
+    for collector, status, count in totals:
+        add("collector_runs_recorded", {"collector": collector, "status": status}, count)
+    for run in runs:
+        labels = {"collector": run.collector}
+        add("collector_last_run_timestamp_seconds", labels, (run.started_at - datetime(1970, 1, 1)).total_seconds())
+        add("collector_last_run_duration_seconds", labels, run.duration_seconds)
+        add("collector_last_run_success", labels, int(run.status != "error"))
+        for counter in COUNTERS:
+            add(f"collector_last_run_{counter}", labels, getattr(run, counter))
+
+    stage_seconds: Dict[tuple[str, str], float] = {}
+    for run_id, stage, target, seconds, size in samples:
+        collector = by_run[run_id]
+        stage_seconds[(collector, stage)] = stage_seconds.get((collector, stage), 0.0) + seconds
+        if stage == "fetch" and target:
+            add("collector_last_fetch_seconds", {"collector": collector, "target": target}, seconds)
+            add("collector_last_fetch_bytes", {"collector": collector, "target": target}, size or 0)
+    for (collector, stage), seconds in sorted(stage_seconds.items()):
+        add("collector_last_run_stage_seconds", {"collector": collector, "stage": stage}, seconds)
+
+    out: List[str] = []
+    for name, (kind, help_text) in PROMETHEUS_METRICS.items():
+        if lines[name]:
+            out += [f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}", f"# TYPE {PROMETHEUS_PREFIX}_{name} {kind}"]
+            out += lines[name]
+    return "\n".join(out) + "\n"
+
+
+def write_prometheus_textfile(path: Path, db_path: Path | None = None) -> Path:
+    """Write atomically, as node_exporter's textfile collector may read at any moment."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(prometheus_text(db_path), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
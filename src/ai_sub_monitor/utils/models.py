@@ -1,14 +1,35 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import re
 import shutil
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import List, Dict
+from typing import Any, List, Dict
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
 
 from openpyxl import load_workbook
+from openpyxl.utils.datetime import to_excel
 from sqlalchemy import select
 
-from ..config import repo_root, ensure_data_dirs, default_db_path
-from ..db import PricingSnapshot, session_scope
+from ..analyzers.sentiment import pool_context
+from ..config import data_root, repo_root, ensure_data_dirs, default_db_path
+from ..db import LatestSnapshot, PricingSnapshot, session_scope
+
+SHEET_NAME = "LatestPricing"
+HEADERS = ["Company", "Tier", "PriceMonthly", "CapturedAt", "SourceURL"]
+ROW_KEYS = ["company", "tier", "price_monthly", "captured_at", "source_url"]
+# Fingerprint of the rows last written to each workbook, plus the file's mtime/size
+# at that point, so an unchanged run (or a workbook edited by hand) is detected cheaply.
+FINGERPRINT_FILE = ".latest_pricing.json"
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
 
 
 def _ensure_model_copies() -> List[Path]:
@@ -17,7 +38,7 @@ def _ensure_model_copies() -> List[Path]:
         root / "subscription_economics.xlsx",
         root / "subscriber_mix_model.xlsx",
     ]
-    models_dir = root / "data" / "models"
+    models_dir = data_root() / "models"
     models_dir.mkdir(parents=True, exist_ok=True)
     copied: List[Path] = []
     for src in src_files:
@@ -31,24 +52,27 @@ def _ensure_model_copies() -> List[Path]:
 
 
 def _latest_pricing(db_path) -> List[Dict]:
+    """Newest extracted prices per company, via the latest-snapshot pointers (page bodies are never read)."""
     results: Dict[str, Dict] = {}
     with session_scope(db_path) as session:
-        rows = (
-            session.execute(
-                select(PricingSnapshot)
-                .where(PricingSnapshot.features.is_not(None))
-                .order_by(PricingSnapshot.captured_at.desc())
+        rows = session.execute(
+            select(
+                LatestSnapshot.company_id,
+                PricingSnapshot.captured_at,
+                PricingSnapshot.url,
+                PricingSnapshot.features,
             )
-            .scalars()
-            .all()
-        )
-        for snap in rows:
-            if snap.company_id in results:
+            .join(PricingSnapshot, PricingSnapshot.id == LatestSnapshot.priced_snapshot_id)
+            .where(LatestSnapshot.kind == "pricing")
+            .order_by(PricingSnapshot.captured_at.desc())
+        ).all()
+        for company_id, captured_at, url, features in rows:
+            if company_id in results:
                 continue
-            data = snap.features or {}
-            results[snap.company_id] = {
-                "captured_at": snap.captured_at,
-                "url": snap.url,
+            data = features or {}
+            results[company_id] = {
+                "captured_at": captured_at,
+                "url": url,
                 "pricing": data.get("pricing", []),
             }
     out = []
@@ -66,7 +90,122 @@ def _latest_pricing(db_path) -> List[Dict]:
     return out
 
 
-def update_models(db_path=None):
+def _fingerprint(rows: List[Dict]) -> str:
+    return hashlib.sha256(json.dumps(rows, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _file_stamp(path: Path) -> Dict[str, int]:
+    stat = path.stat()
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _load_fingerprints(models_dir: Path) -> Dict[str, Dict]:
+    path = models_dir / FINGERPRINT_FILE
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_fingerprints(models_dir: Path, fingerprints: Dict[str, Dict]):
+    path = models_dir / FINGERPRINT_FILE
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(fingerprints, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _sheet_part(archive: zipfile.ZipFile, sheet_name: str) -> str | None:
+    """Zip member holding `sheet_name`'s worksheet XML, or None if the workbook has no such sheet."""
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    rel_id = None
+    for sheet in workbook.iter(f"{{{_MAIN_NS}}}sheet"):
+        if sheet.get("name") == sheet_name:
+            rel_id = sheet.get(f"{{{_REL_NS}}}id")
+    if rel_id is None:
+        return None
+    rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels:
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target", "")
+            # targets are either package-absolute ("/xl/...") or relative to xl/
+            return target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+    return None
+
+
+def _inline_cell(ref: str, value: Any, date_style: str | None) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return f'<c r="{ref}" s="{date_style}" t="n"><v>{to_excel(value)}</v></c>'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c r="{ref}" t="n"><v>{value}</v></c>'
+    return f'<c r="{ref}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def _sheet_xml(rows: List[Dict], date_style: str | None) -> bytes:
+    """Worksheet XML for the LatestPricing table, in the same shape openpyxl writes it."""
+    table = [HEADERS] + [[row.get(key) for key in ROW_KEYS] for row in rows]
+    body = []
+    for r, values in enumerate(table, start=1):
+        cells = "".join(_inline_cell(f"{col}{r}", value, date_style) for col, value in zip("ABCDE", values))
+        body.append(f'<row r="{r}">{cells}</row>')
+    return (
+        f'<worksheet xmlns="{_MAIN_NS}"><dimension ref="A1:E{len(table)}"/>'
+        f"<sheetData>{''.join(body)}</sheetData></worksheet>"
+    ).encode("utf-8")
+
+
+def _rewrite_sheet(path: Path, rows: List[Dict]) -> bool:
+    """
+    Replace only the LatestPricing worksheet inside the XLSX archive; every other
+    part is copied through untouched. Returns False when the sheet or the date
+    style it needs isn't there yet, so the caller can fall back to openpyxl.
+    """
+    with zipfile.ZipFile(path) as archive:
+        part = _sheet_part(archive, SHEET_NAME)
+        if part is None or part not in archive.namelist():
+            return False
+        # reuse the date format openpyxl registered for CapturedAt on the first write
+        style = re.search(rb'<c r="D2"[^>]*?\ss="(\d+)"', archive.read(part))
+        if rows and style is None:
+            return False
+        tmp = path.with_suffix(".tmp")
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as out:
+            for item in archive.infolist():
+                if item.filename == part:
+                    out.writestr(item, _sheet_xml(rows, style.group(1).decode() if style else None))
+                else:
+                    out.writestr(item, archive.read(item.filename))
+    os.replace(tmp, path)
+    return True
+
+
+def _rebuild_sheet(path: Path, rows: List[Dict]):
+    wb = load_workbook(path)
+    if SHEET_NAME in wb.sheetnames:
+        ws = wb[SHEET_NAME]
+        wb.remove(ws)
+    ws = wb.create_sheet(SHEET_NAME)
+    ws.append(HEADERS)
+    for row in rows:
+        ws.append([row.get(key) for key in ROW_KEYS])
+    wb.save(path)
+
+
+def _update_workbook(path: Path, rows: List[Dict]) -> Path:
+    if not _rewrite_sheet(path, rows):
+        _rebuild_sheet(path, rows)
+    return path
+
+
+def update_models(db_path=None, max_workers: int | None = None) -> List[Path]:
+    """
+    Write the latest pricing into each model copy's LatestPricing sheet. Workbooks
+    whose rows and file are unchanged since the last run (per the fingerprint
+    sidecar) are skipped; the rest are updated in parallel. Returns the paths written.
+    """
     ensure_data_dirs()
     db_path = db_path or default_db_path()
     pricing_rows = _latest_pricing(db_path)
@@ -74,22 +213,25 @@ def update_models(db_path=None):
     if not model_paths:
         raise FileNotFoundError("Source XLSX files not found in repo root.")
 
-    for path in model_paths:
-        wb = load_workbook(path)
-        if "LatestPricing" in wb.sheetnames:
-            ws = wb["LatestPricing"]
-            wb.remove(ws)
-        ws = wb.create_sheet("LatestPricing")
-        headers = ["Company", "Tier", "PriceMonthly", "CapturedAt", "SourceURL"]
-        ws.append(headers)
-        for row in pricing_rows:
-            ws.append(
-                [
-                    row.get("company"),
-                    row.get("tier"),
-                    row.get("price_monthly"),
-                    row.get("captured_at"),
-                    row.get("source_url"),
-                ]
-            )
-        wb.save(path)
+    models_dir = model_paths[0].parent
+    fingerprint = _fingerprint(pricing_rows)
+    stored = _load_fingerprints(models_dir)
+    stale = [
+        path
+        for path in model_paths
+        if stored.get(path.name) != {"fingerprint": fingerprint, **_file_stamp(path)}
+    ]
+    if not stale:
+        return []
+
+    workers = min(len(stale), max_workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as pool:
+            written = list(pool.map(_update_workbook, stale, [pricing_rows] * len(stale)))
+    else:
+        written = [_update_workbook(path, pricing_rows) for path in stale]
+
+    for path in written:
+        stored[path.name] = {"fingerprint": fingerprint, **_file_stamp(path)}
+    _save_fingerprints(models_dir, stored)
+    return written
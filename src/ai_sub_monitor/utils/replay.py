@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Set
+
+from sqlalchemy import null, select, text, update
+
+from ..analyzers.diff import unified_diff
+from ..analyzers.sentiment import pool_context
+from ..collectors.pricing import _extract_structured_pricing
+from ..config import data_root
+from ..db import rebuild_rollups, refresh_latest_snapshots, session_scope
+from .blobs import BlobStore, blob_key
+from .compaction import SNAPSHOT_MODELS
+from .html import hash_text, ignore_patterns_for, parse_page
+
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_BATCH_SIZE = 500
+
+
+@dataclass
+class ReplayStats:
+    snapshots: int = 0
+    pages: int = 0
+    missing: int = 0
+    hashes_changed: int = 0
+    features_changed: int = 0
+    changes_flipped: int = 0
+    diffs_changed: int = 0
+    rows_updated: int = 0
+    seconds: float = 0.0
+
+    def add(self, other: "ReplayStats"):
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+@dataclass
+class _Version:
+    snapshot_id: str
+    content_hash: str | None
+    is_change: bool
+    diff_blob_id: str | None
+    features: Dict[str, Any] | None = None
+    blob_id: str | None = None
+    raw_html: str | None = None  # legacy row whose body never moved to the blob store
+    legacy_path: str | None = None  # pre-blob-store copy in data/snapshots/
+
+
+@dataclass
+class _Chunk:
+    """
+    A run of consecutive versions of one page. `previous` is the version just
+    before the run; it is diffed against but not rewritten.
+    """
+
+    kind: str
+    company_id: str
+    url: str | None
+    ignore: List[str]
+    versions: List[_Version]
+    previous: _Version | None = None
+
+
+@dataclass
+class _ChunkResult:
+    updates: List[Dict[str, Any]] = field(default_factory=list)
+    reindex: List[Dict[str, Any]] = field(default_factory=list)
+    stats: ReplayStats = field(default_factory=ReplayStats)
+
+
+def _body(version: _Version, store: BlobStore) -> str | None:
+    if version.blob_id:
+        try:
+            return store.get(version.blob_id)
+        except FileNotFoundError:
+            return None
+    if version.raw_html is not None:
+        return version.raw_html
+    if version.legacy_path:
+        return Path(version.legacy_path).read_text(encoding="utf-8", errors="replace")
+    return None
+
+
+def _replay_chunk(chunk: _Chunk, blob_root: str, write_blobs: bool) -> _ChunkResult:
+    """
+    Parse, normalize, hash, extract and diff one chunk. Runs in a worker process;
+    it reads and writes blobs but never touches the database.
+    """
+    store = BlobStore(Path(blob_root))
+    result = _ChunkResult()
+    stats = result.stats
+    prev_text = None
+    if chunk.previous is not None:
+        html = _body(chunk.previous, store)
+        prev_text = parse_page(html).normalized(chunk.ignore) if html is not None else None
+    prev_hash = hash_text(prev_text) if prev_text is not None else None
+
+    for version in chunk.versions:
+        stats.snapshots += 1
+        html = _body(version, store)
+        if html is None:
+            stats.missing += 1
+            continue
+        page = parse_page(html)
+        normalized = page.normalized(chunk.ignore)
+        values: Dict[str, Any] = {"content_hash": hash_text(normalized), "blob_id": version.blob_id}
+        if version.legacy_path and write_blobs:
+            # the file is only found by the raw-HTML hash about to be replaced, so archive it as a blob
+            values["blob_id"] = store.put(html)
+        if prev_hash is None:
+            # first known version: nothing to diff against, keep what the collector recorded
+            values["is_change"], values["diff_blob_id"] = version.is_change, version.diff_blob_id
+        elif values["content_hash"] == prev_hash:
+            values["is_change"], values["diff_blob_id"] = False, None
+        else:
+            diff = unified_diff(prev_text, normalized)
+            values["is_change"], values["diff_blob_id"] = True, blob_key(diff)
+            if write_blobs and values["diff_blob_id"] != version.diff_blob_id:
+                store.put(diff)
+        if chunk.kind == "pricing":
+            values["features"] = _extract_structured_pricing(chunk.company_id, page)
+            stats.features_changed += values["features"] != version.features
+
+        stats.hashes_changed += values["content_hash"] != version.content_hash
+        stats.changes_flipped += values["is_change"] != version.is_change
+        stats.diffs_changed += values["diff_blob_id"] != version.diff_blob_id
+        if any(values[name] != getattr(version, name) for name in values):
+            result.updates.append({"id": version.snapshot_id, **values})
+        if values["content_hash"] != version.content_hash:
+            result.reindex.append({"id": version.snapshot_id, "body": normalized})
+        prev_text, prev_hash = normalized, values["content_hash"]
+    return result
+
+
+class _LegacyFiles:
+    """data/snapshots/*.html keyed by the raw-HTML hash legacy rows stored, read on first use."""
+
+    def __init__(self):
+        self._paths: Dict[str, str] | None = None
+
+    def get(self, content_hash: str | None) -> str | None:
+        if self._paths is None:
+            self._paths = {}
+            for path in sorted((data_root() / "snapshots").glob("*.html")):
+                self._paths[blob_key(path.read_text(encoding="utf-8", errors="replace"))] = str(path)
+        return self._paths.get(content_hash or "")
+
+
+def _chunks(
+    session,
+    kind: str,
+    sources_config: Dict[str, Any],
+    company: str | None,
+    since: datetime | None,
+    until: datetime | None,
+    chunk_size: int,
+    stats: ReplayStats,
+) -> Iterator[_Chunk]:
+    """Stream each page's history oldest first, cut into chunks of `chunk_size` versions."""
+    model = SNAPSHOT_MODELS[kind]
+    features = model.features if kind == "pricing" else null()
+    query = select(
+        model.company_id,
+        model.url,
+        model.captured_at,
+        model.id,
+        model.content_hash,
+        model.is_change,
+        model.diff_blob_id,
+        features,
+        model.blob_id,
+    ).order_by(model.company_id, model.url, model.captured_at)
+    if company:
+        query = query.where(model.company_id == company)
+    if until:
+        query = query.where(model.captured_at < until)
+    legacy = _LegacyFiles()
+
+    def version(row) -> _Version:
+        v = _Version(*row[3:])
+        if not v.blob_id:
+            v.raw_html = session.scalar(select(model.raw_html).where(model.id == v.snapshot_id))
+            if v.raw_html is None:
+                v.legacy_path = legacy.get(v.content_hash)
+        return v
+
+    rows = session.execute(query.execution_options(yield_per=1000))
+    for (company_id, url), history in groupby(rows, key=lambda row: (row.company_id, row.url)):
+        previous, pending = None, []
+        for row in history:
+            if since and row.captured_at < since:
+                previous = row
+                continue
+            pending.append(row)
+        if not pending:
+            continue
+        stats.pages += 1
+        ignore = ignore_patterns_for(sources_config, url)
+        previous = version(previous) if previous is not None else None
+        for start in range(0, len(pending), chunk_size):
+            versions = [version(row) for row in pending[start : start + chunk_size]]
+            yield _Chunk(kind, company_id, url, ignore, versions, previous)
+            previous = versions[-1]
+
+
+def _run_chunks(chunks: Iterable[_Chunk], workers: int, blob_root: str, write_blobs: bool) -> Iterator[_ChunkResult]:
+    """Replay chunks on a process pool, keeping only a few per worker in flight."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield _replay_chunk(chunk, blob_root, write_blobs)
+        return
+    # not forked: the parent holds an open session and a yield_per cursor
+    with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as pool:
+        pending: Set[Future] = set()
+        for chunk in chunks:
+            pending.add(pool.submit(_replay_chunk, chunk, blob_root, write_blobs))
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def _write_back(db_path: Path | None, kind: str, updates: List[Dict[str, Any]], reindex: List[Dict[str, Any]]):
+    """Apply one batch of rewritten snapshot rows and refresh their search-index text."""
+    model = SNAPSHOT_MODELS[kind]
+    with session_scope(db_path) as session:
+        if updates:
+            session.execute(update(model), updates)
+        if reindex:
+            session.execute(
+                text("DELETE FROM search_index WHERE kind = :kind AND ref_id = :id"),
+                [{"kind": kind, "id": row["id"]} for row in reindex],
+            )
+            session.execute(
+                text(
+                    "INSERT INTO search_index (body, kind, ref_id, company_id, source, url, captured_at) "
+                    f"SELECT :body, :kind, id, company_id, :kind, url, captured_at FROM {model.__tablename__} "
+                    "WHERE id = :id"
+                ),
+                [{"kind": kind, **row} for row in reindex],
+            )
+
+
+def replay(
+    sources_config: Dict[str, Any],
+    db_path: Path | None = None,
+    kinds: Iterable[str] = ("pricing", "docs"),
+    company: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+    store: BlobStore | None = None,
+) -> ReplayStats:
+    """
+    Re-derive stored snapshot fields from the archived page bodies, offline.
+
+    Every snapshot in range is parsed, normalized (with the current ignore
+    patterns), hashed, run through the price extractor (pricing only) and diffed
+    against the version before it. Pages are cut into chunks of `chunk_size`
+    versions that run on `workers` processes; rows whose content hash, features,
+    change flag or diff differ are written back `batch_size` at a time.
+
+    Afterwards the latest-snapshot pointers are refreshed and, if any change flag
+    flipped, the rollups are rebuilt. The first stored version of a page keeps its
+    change flag and diff since there is nothing left to compare it with.
+    """
+    store = store or BlobStore()
+    workers = workers or os.cpu_count() or 1
+    stats = ReplayStats()
+    started = time.perf_counter()
+    for kind in kinds:
+        updates: List[Dict[str, Any]] = []
+        reindex: List[Dict[str, Any]] = []
+        with session_scope(db_path) as session:
+            chunks = _chunks(session, kind, sources_config, company, since, until, chunk_size, stats)
+            for result in _run_chunks(chunks, workers, str(store.root), write_blobs=not dry_run):
+                stats.add(result.stats)
+                updates.extend(result.updates)
+                reindex.extend(result.reindex)
+                if len(updates) >= batch_size or len(reindex) >= batch_size:
+                    stats.rows_updated += len(updates)
+                    if not dry_run:
+                        _write_back(db_path, kind, updates, reindex)
+                    updates, reindex = [], []
+        stats.rows_updated += len(updates)
+        if not dry_run:
+            _write_back(db_path, kind, updates, reindex)
+
+    if not dry_run and stats.rows_updated:
+        with session_scope(db_path) as session:
+            refresh_latest_snapshots(session)
+            if stats.changes_flipped:
+                rebuild_rollups(session)
+    stats.seconds = time.perf_counter() - started
+    return stats
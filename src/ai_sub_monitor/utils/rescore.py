@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from rich.console import Console
+from sqlalchemy import Float, delete, select, type_coerce, update
+
+from ..analyzers.keywords import KeywordMatcher
+from ..analyzers.sentiment import get_analyzer, score_batch, scoring_pool
+from ..db import CollectorCursor, CommunitySignal, rebuild_rollups, save_cursor, session_scope
+
+console = Console()
+
+CHECKPOINT_SOURCE = "rescore"
+DEFAULT_CHUNK_SIZE = 5000
+
+
+@dataclass
+class RescoreStats:
+    scanned: int = 0
+    sentiment_changed: int = 0
+    keywords_changed: int = 0
+    rows_updated: int = 0
+    resumed: bool = False
+    seconds: float = 0.0
+
+
+def _checkpoint_key(sentiment: bool, keywords: bool, company: str | None, source: str | None, since, until) -> str:
+    parts = [
+        "sentiment" if sentiment else "",
+        "keywords" if keywords else "",
+        company or "*",
+        source or "*",
+        since.date().isoformat() if since else "*",
+        until.date().isoformat() if until else "*",
+    ]
+    return "|".join(parts)
+
+
+def _config_fingerprint(keywords_config: Dict[str, Any]) -> str:
+    # a checkpoint taken under another keyword list would leave the rescored rows inconsistent
+    blob = json.dumps(keywords_config, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+def rescore(
+    keywords_config: Dict[str, Any],
+    db_path: Path | None = None,
+    sentiment: bool = True,
+    keywords: bool = True,
+    company: str | None = None,
+    source: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int | None = None,
+    restart: bool = False,
+    dry_run: bool = False,
+) -> RescoreStats:
+    """
+    Recompute sentiment and/or keyword matches for stored community signals.
+
+    Signals are read in primary-key order, `chunk_size` rows at a time (keyset
+    paging, so memory stays flat and each chunk is its own transaction). Each
+    chunk is scored with `score_batch` on one process pool kept for the run and
+    re-matched against the current keyword config. Changed rows go back as one
+    executemany UPDATE. The chunk's last id is saved in `collector_cursors`
+    (source "rescore") in the same transaction, so an interrupted run resumes
+    where it stopped. The checkpoint is dropped when the run completes. Rollups
+    are rebuilt at the end.
+
+    Keywords are matched on the stored `content`, which collectors cap at 10k
+    characters, so very long posts can lose matches beyond that point.
+    """
+    matcher = KeywordMatcher.from_config(keywords_config)
+    key = _checkpoint_key(sentiment, keywords, company, source, since, until)
+    fingerprint = _config_fingerprint(keywords_config)
+    stats = RescoreStats()
+    started = time.perf_counter()
+    if sentiment:
+        get_analyzer()  # load the lexicon up front; chunks too small for the pool are scored here
+
+    last_id = ""
+    with session_scope(db_path) as session:
+        checkpoint = session.get(CollectorCursor, (CHECKPOINT_SOURCE, key))
+        if checkpoint and not restart and checkpoint.etag == fingerprint and checkpoint.position:
+            last_id, stats.resumed = checkpoint.position, True
+
+    old_sentiment = type_coerce(CommunitySignal.sentiment, Float)  # raw value, not a rounded Decimal
+    query = select(
+        CommunitySignal.id,
+        CommunitySignal.content,
+        old_sentiment,
+        CommunitySignal.keywords_matched,
+        CommunitySignal.keyword_categories,
+    )
+    if company:
+        query = query.where(CommunitySignal.company_id == company)
+    if source:
+        query = query.where(CommunitySignal.source == source)
+    if since:
+        query = query.where(CommunitySignal.captured_at >= since)
+    if until:
+        query = query.where(CommunitySignal.captured_at < until)
+    query = query.order_by(CommunitySignal.id).limit(chunk_size)
+
+    # one pool for the whole run: workers start and load VADER once, not once per chunk
+    pool = scoring_pool(workers) if sentiment else None
+    with pool or nullcontext():
+        while True:
+            with session_scope(db_path) as session:
+                rows = session.execute(query.where(CommunitySignal.id > last_id)).all()
+                if not rows:
+                    break
+                scores: List[float | None] = []
+                if sentiment:
+                    scores = score_batch((row.content or "" for row in rows), workers=workers, executor=pool)
+                updates: List[Dict[str, Any]] = []
+                for n, row in enumerate(rows):
+                    values: Dict[str, Any] = {}
+                    if sentiment and scores[n] != row.sentiment:
+                        values["sentiment"] = scores[n]
+                        stats.sentiment_changed += 1
+                    if keywords:
+                        hits = matcher.match(row.content or "")
+                        categories = matcher.categories(hits)
+                        if hits != (row.keywords_matched or []) or categories != (row.keyword_categories or []):
+                            values["keywords_matched"], values["keyword_categories"] = hits, categories
+                            stats.keywords_changed += 1
+                    if values:
+                        # every row in an executemany needs the same columns
+                        if sentiment:
+                            values.setdefault("sentiment", scores[n])
+                        if keywords:
+                            values.setdefault("keywords_matched", row.keywords_matched)
+                            values.setdefault("keyword_categories", row.keyword_categories)
+                        updates.append({"id": row.id, **values})
+                stats.scanned += len(rows)
+                stats.rows_updated += len(updates)
+                last_id = rows[-1].id
+                if dry_run:
+                    session.rollback()
+                else:
+                    if updates:
+                        session.execute(update(CommunitySignal), updates)
+                    save_cursor(session, CHECKPOINT_SOURCE, key, position=last_id, etag=fingerprint)
+            console.print(f"[cyan]Rescored {stats.scanned} signals, {stats.rows_updated} changed[/cyan]")
+
+    if not dry_run:
+        with session_scope(db_path) as session:
+            session.execute(
+                delete(CollectorCursor).where(CollectorCursor.source == CHECKPOINT_SOURCE, CollectorCursor.key == key)
+            )
+            if stats.rows_updated or stats.resumed:
+                rebuild_rollups(session)
+    stats.seconds = time.perf_counter() - started
+    return stats
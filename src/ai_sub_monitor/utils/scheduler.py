@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from rich.console import Console
+
+from ..config import load_sources_and_keywords
+from .locks import try_job_lock
+
+console = Console()
+
+DEFAULT_JITTER_SECONDS = 60
+DEFAULT_MAX_CONCURRENT = 2
+# Cadences used when sources.yaml has no `schedule.jobs` block.
+DEFAULT_CADENCES = {
+    "reddit": "1h",
+    "github": "1h",
+    "pricing": "1d",
+    "docs": "1d",
+    "update-models": "1d",
+    "report": "7d",
+}
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_interval(value: Any) -> float:
+    """Seconds from `3600`, `"90s"`, `"30m"`, `"1h"`, `"1d"` or `"1w"`."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw])\s*", str(value))
+    if not match:
+        raise ValueError(f"Invalid interval {value!r}; use e.g. 30m, 1h, 1d")
+    return float(match.group(1)) * _UNITS[match.group(2)]
+
+
+def _job_runners(db_path: Path | None) -> Dict[str, Callable[[Dict[str, Any], Dict[str, Any]], Any]]:
+    # imported here (as is ..db in the methods) so the scheduler module stays cheap to import
+    from ..collectors import available_collectors, run_collector
+    from ..reporters.weekly import generate_weekly_report
+    from .models import update_models
+
+    def collector(name: str) -> Callable[[Dict[str, Any], Dict[str, Any]], Any]:
+        return lambda sources, keywords: run_collector(name, sources, keywords, db_path=db_path)
+
+    runners = {name: collector(name) for name in available_collectors()}
+    runners["update-models"] = lambda sources, keywords: update_models(db_path=db_path)
+    runners["report"] = lambda sources, keywords: generate_weekly_report(date.today(), db_path=db_path)
+    return runners
+
+
+@dataclass
+class Job:
+    name: str
+    interval: float
+    group: str
+    run: Callable[[Dict[str, Any], Dict[str, Any]], Any]
+    due: float = 0.0  # the slot on the job's grid; next_run adds this slot's jitter
+    next_run: float = 0.0
+    future: Future | None = None
+    lock_file: Any = field(default=None, repr=False)
+
+    @property
+    def running(self) -> bool:
+        return self.future is not None and not self.future.done()
+
+
+class Scheduler:
+    """
+    Runs each job on its own cadence inside one long-lived process.
+
+    Jobs sharing a `group` never overlap: one that comes due while another job
+    of its group runs starts once that finishes. A job that comes due while its
+    own previous run is still going is skipped until its next slot.
+    A per-job file lock under data/locks/ (shared with the `collect`, `report`
+    and `update-models` commands) extends that to cron runs or a second daemon.
+    Last run times are kept in `collector_cursors` (source "schedule"), so a
+    restart doesn't re-run everything at once.
+    """
+
+    def __init__(
+        self,
+        jobs: List[Job],
+        db_path: Path | None = None,
+        jitter_seconds: float = DEFAULT_JITTER_SECONDS,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+    ):
+        self.jobs = jobs
+        self.db_path = db_path
+        self.jitter_seconds = jitter_seconds
+        self.max_concurrent = max_concurrent
+        self.stop_event = threading.Event()
+
+    @classmethod
+    def from_config(cls, sources_config: Dict[str, Any], db_path: Path | None = None) -> "Scheduler":
+        opts = sources_config.get("schedule", {}) or {}
+        runners = _job_runners(db_path)
+        jobs = []
+        for name, spec in (opts.get("jobs") or DEFAULT_CADENCES).items():
+            if name not in runners:
+                raise ValueError(f"Unknown scheduled job {name!r}; choose from {sorted(runners)}")
+            spec = spec if isinstance(spec, dict) else {"every": spec}
+            if spec.get("enabled", True) is False:
+                continue
+            jobs.append(
+                Job(
+                    name=name,
+                    interval=parse_interval(spec.get("every", DEFAULT_CADENCES.get(name, "1d"))),
+                    group=str(spec.get("group", name)),
+                    run=runners[name],
+                )
+            )
+        return cls(
+            jobs,
+            db_path=db_path,
+            jitter_seconds=float(opts.get("jitter_seconds", DEFAULT_JITTER_SECONDS)),
+            max_concurrent=int(opts.get("max_concurrent", DEFAULT_MAX_CONCURRENT)),
+        )
+
+    def _jitter(self) -> float:
+        return random.uniform(0, self.jitter_seconds) if self.jitter_seconds > 0 else 0.0
+
+    def _plan_first_runs(self):
+        from ..db import load_cursors, session_scope
+
+        with session_scope(self.db_path) as session:
+            last_runs = {key: c.position for key, c in load_cursors(session, "schedule").items()}
+        now = time.time()
+        for job in self.jobs:
+            last = float(last_runs[job.name]) if last_runs.get(job.name) else None
+            job.due = now if last is None else max(now, last + job.interval)
+            job.next_run = job.due + self._jitter()
+
+    def _try_lock(self, job: Job) -> bool:
+        job.lock_file = try_job_lock(job.name)
+        return job.lock_file is not None
+
+    def _execute(self, job: Job):
+        from ..db import save_cursor, session_scope
+
+        started = time.time()
+        console.print(f"[cyan]{datetime.now(timezone.utc):%H:%M:%S} starting {job.name}[/cyan]")
+        try:
+            # config is re-read per run so edits to sources/keywords apply without a restart
+            sources, keywords = load_sources_and_keywords()
+            job.run(sources, keywords)
+            with session_scope(self.db_path) as session:
+                save_cursor(session, "schedule", job.name, position=repr(started))
+            console.print(f"[green]{job.name} finished in {time.time() - started:.1f}s[/green]")
+        except Exception as exc:
+            console.print(f"[red]{job.name} failed after {time.time() - started:.1f}s: {exc}[/red]")
+        finally:
+            if job.lock_file is not None:
+                job.lock_file.close()
+                job.lock_file = None
+
+    def _dispatch(self, pool: ThreadPoolExecutor, now: float):
+        busy_groups = {job.group for job in self.jobs if job.running}
+        for job in sorted(self.jobs, key=lambda j: j.next_run):
+            if job.next_run > now:
+                continue
+            if job.group in busy_groups and not job.running:
+                continue  # another job of the group holds it; run as soon as it's free
+            # the next slot is counted from this one's unjittered time, so neither a slow run
+            # nor the jitter shifts the cadence; slots missed while busy or asleep are dropped
+            job.due += job.interval
+            if job.due <= now:
+                job.due += (now - job.due) // job.interval * job.interval + job.interval
+            job.next_run = job.due + self._jitter()
+            if job.running:
+                console.print(f"[yellow]Skipping {job.name}: previous run still going[/yellow]")
+                continue
+            if not self._try_lock(job):
+                console.print(f"[yellow]Skipping {job.name}: locked by another process[/yellow]")
+                continue
+            busy_groups.add(job.group)
+            job.future = pool.submit(self._execute, job)
+
+    def run(self, until: float | None = None):
+        """Loop until `stop()` is called (or the `until` timestamp passes)."""
+        self._plan_first_runs()
+        with ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="job") as pool:
+            while not self.stop_event.is_set() and (until is None or time.time() < until):
+                self._dispatch(pool, time.time())
+                wake = min(job.next_run for job in self.jobs) if self.jobs else time.time() + 60
+                if until is not None:
+                    wake = min(wake, until)
+                self.stop_event.wait(max(0.5, min(wake - time.time(), 60)))
+            console.print("[cyan]Waiting for running jobs to finish...[/cyan]")
+
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+
+from ..db import DocumentationSnapshot, PricingSnapshot, index_snapshot_text, session_scope
+from .blobs import BlobStore, snapshot_html
+from .html import ignore_patterns_for, parse_page
+
+# Markers around matched terms in snippets; control characters never occur in indexed text.
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+
+
+@dataclass
+class SearchHit:
+    kind: str  # signal | pricing | docs
+    ref_id: str
+    company_id: str
+    source: str
+    url: str | None
+    captured_at: str
+    snippet: str
+    rank: float
+
+
+def _quote_terms(query: str) -> str:
+    """Turn free text into an FTS5 query of quoted terms, so punctuation can't break the syntax."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in re.findall(r"[\w'-]+", query))
+
+
+def search(
+    query: str,
+    db_path: Path | None = None,
+    company: str | None = None,
+    source: str | None = None,
+    since: date | None = None,
+    until: date | None = None,
+    limit: int = 20,
+) -> List[SearchHit]:
+    """
+    Rank signals and snapshot text matching `query` by BM25. The query may use FTS5
+    syntax ("usage limit", rate NEAR limit, claude AND NOT api); if it doesn't parse
+    it is retried as plain terms.
+    """
+    where = ["search_index MATCH :query"]
+    params: Dict[str, Any] = {"limit": limit}
+    if company:
+        where.append("company_id = :company")
+        params["company"] = company
+    if source:
+        where.append("source = :source")
+        params["source"] = source
+    if since:
+        where.append("captured_at >= :since")
+        params["since"] = since.isoformat()
+    if until:
+        where.append("captured_at < :until")
+        params["until"] = (until + timedelta(days=1)).isoformat()
+    sql = text(
+        "SELECT kind, ref_id, company_id, source, url, captured_at, "
+        f"snippet(search_index, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', 16), bm25(search_index) "
+        f"FROM search_index WHERE {' AND '.join(where)} ORDER BY bm25(search_index) LIMIT :limit"
+    )
+    with session_scope(db_path) as session:
+        try:
+            rows = session.execute(sql, {**params, "query": query}).all()
+        except OperationalError:
+            session.rollback()
+            plain = _quote_terms(query)
+            if not plain:
+                return []
+            rows = session.execute(sql, {**params, "query": plain}).all()
+    return [SearchHit(*row) for row in rows]
+
+
+def rebuild_search_index(sources_config: Dict[str, Any], db_path: Path | None = None) -> int:
+    """
+    Re-index every signal and snapshot from scratch. Snapshot pages are parsed and
+    normalized the way the collectors do it; returns the number of rows indexed.
+    """
+    store = BlobStore()
+    with session_scope(db_path) as session:
+        session.execute(text("DELETE FROM search_index"))
+        indexed = session.execute(
+            text(
+                "INSERT INTO search_index (body, kind, ref_id, company_id, source, url, captured_at) "
+                "SELECT content, 'signal', id, company_id, source, url, captured_at FROM community_signals"
+            )
+        ).rowcount
+        for kind, model in (("pricing", PricingSnapshot), ("docs", DocumentationSnapshot)):
+            for snap in session.scalars(select(model).execution_options(yield_per=100)):
+                body = parse_page(snapshot_html(snap, store)).normalized(ignore_patterns_for(sources_config, snap.url))
+                index_snapshot_text(session, kind, snap, body)
+                indexed += 1
+    return indexed
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from ai_sub_monitor.db import Company, PricingSnapshot, init_db, session_scope, set_latest_snapshot
+from ai_sub_monitor.utils.blobs import BlobStore, apply_delta, make_delta
+from ai_sub_monitor.utils.compaction import _plan_roles, _select_survivors, compact
+
+WORDS = ["plan", "usage", "limit", "team", "seat", "model", "tokens", "month", "annual", "support"]
+
+
+def page(version: int, minified: bool = True) -> str:
+    """A pricing page whose Pro price and one paragraph change with `version`."""
+    rng = random.Random(7)
+    parts = [f"<tr><td>Pro</td><td>${20 + version}/month</td></tr>"]
+    for i in range(80):
+        text = " ".join(rng.choice(WORDS) for _ in range(12))
+        parts.append(f"<p>{'Updated ' if i == version % 80 else ''}{text}</p>")
+    return "<html><body><table>" + ("" if minified else "\n").join(parts) + "</table></body></html>"
+
+
+@pytest.mark.parametrize(
+    "base, text",
+    [
+        (page(0), page(1)),
+        (page(0, minified=False), page(3, minified=False)),
+        ("", page(0)),
+        (page(0), ""),
+        (page(2), page(2)),
+        ("<p>a</p>\r\n<p>b</p>", "<p>a</p>\r\n<p>ü</p>\r\n"),
+        ("no tags at all", "no tags at all, edited"),
+    ],
+)
+def test_delta_round_trips(base, text):
+    assert apply_delta(base, make_delta(base, text)) == text
+
+
+def test_minified_page_delta_copies_most_of_the_base():
+    ops = make_delta(page(0), page(1))
+    inserted = sum(len(op) for op in ops if isinstance(op, str))
+    assert inserted < len(page(1)) / 10
+
+
+def test_line_deltas_written_before_tag_units_still_apply():
+    base, text = "a\nb\nc\n", "a\nB\nc\n"
+    assert apply_delta(base, [[0, 1], "B\n", [2, 3]], unit="lines") == text
+
+
+def test_select_survivors_keeps_newest_per_day_then_per_week():
+    now = datetime(2024, 6, 28, 12)
+    cutoff = now - timedelta(days=7)
+    rows = [
+        ("today-late", now),
+        ("today-early", now - timedelta(hours=3)),
+        ("yesterday", now - timedelta(days=1)),
+        ("old-fri", datetime(2024, 6, 14, 9)),
+        ("old-mon", datetime(2024, 6, 10, 9)),  # same ISO week as old-fri
+        ("older", datetime(2024, 6, 3, 9)),
+    ]
+    assert _select_survivors(rows, cutoff, pinned=set()) == {"today-late", "yesterday", "old-fri", "older"}
+    assert "old-mon" in _select_survivors(rows, cutoff, pinned={"old-mon"})
+
+
+def test_plan_roles_prefers_keyframes_for_shared_blobs():
+    # "b" is a keyframe in the second chain, so the first chain must not delta it
+    roles = _plan_roles([["a", "b", "c"], ["b", "d"]], keyframe_interval=3)
+    assert roles["a"] is None and roles["b"] is None
+    assert roles["c"] == "b" and roles["d"] == "b"
+
+
+def test_plan_roles_caps_chain_length():
+    roles = _plan_roles([["a", "b", "c"], ["x", "c", "d", "e"]], keyframe_interval=3)
+
+    def depth(key):
+        return 0 if roles[key] is None else 1 + depth(roles[key])
+
+    assert max(depth(key) for key in roles) <= 2
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    """A database holding two pages' histories (sharing some bodies) and a blob store."""
+    monkeypatch.setenv("AI_SUB_MONITOR_DATA_DIR", str(tmp_path))
+    db_path = tmp_path / "monitor.db"
+    init_db(db_path)
+    store = BlobStore(tmp_path / "blobs")
+    now = datetime.utcnow()
+    histories = {
+        "https://a.example/pricing": [0, 1, 2, 3, 4, 5, 6],
+        "https://b.example/pricing": [0, 1, 0, 1, 7],  # flips back to bodies page a also had
+    }
+    expected = {}
+    with session_scope(db_path) as session:
+        session.add(Company(id="acme", name="Acme"))
+        for url, versions in histories.items():
+            for n, version in enumerate(versions):
+                html = page(version, minified=url.startswith("https://a"))
+                captured = now - timedelta(days=len(versions) - n)
+                snap = PricingSnapshot(
+                    company_id="acme",
+                    url=url,
+                    captured_at=captured,
+                    content_hash=str(version),
+                    tier_name="unknown",
+                    blob_id=store.put(html),
+                    is_change=n > 0,
+                )
+                session.add(snap)
+                set_latest_snapshot(session, "pricing", snap)
+                expected[snap.id] = html
+            # an extra capture earlier the same day as the newest one is pruned by retention
+            session.add(
+                PricingSnapshot(
+                    company_id="acme",
+                    url=url,
+                    captured_at=captured - timedelta(minutes=5),
+                    tier_name="unknown",
+                    blob_id=store.put(html + "<!-- pruned -->"),
+                )
+            )
+    return db_path, store, expected
+
+
+def _assert_rebuildable(db_path, store, expected, keyframe_interval):
+    with session_scope(db_path) as session:
+        rows = session.query(PricingSnapshot).all()
+        assert {row.id for row in rows} == set(expected)
+        for row in rows:
+            assert store.get(row.blob_id) == expected[row.id]
+            assert len(store.chain(row.blob_id)) <= keyframe_interval
+
+
+def test_compact_keeps_every_survivor_rebuildable(archive):
+    db_path, store, expected = archive
+    stats = compact(db_path, keyframe_interval=3, store=store)
+    assert stats.snapshots_pruned == 2
+    assert stats.deltas > 0
+    assert stats.bytes_after < stats.bytes_before
+    _assert_rebuildable(db_path, store, expected, keyframe_interval=3)
+
+    with session_scope(db_path) as session:
+        newest = session.query(PricingSnapshot).order_by(PricingSnapshot.captured_at.desc()).first()
+        assert not store.is_delta(newest.blob_id)
+
+    again = compact(db_path, keyframe_interval=3, store=store)
+    assert (again.keyframes, again.deltas, again.snapshots_pruned) == (stats.keyframes, stats.deltas, 0)
+    assert again.bytes_after == stats.bytes_after
+    _assert_rebuildable(db_path, store, expected, keyframe_interval=3)
+
+
+def test_compact_with_a_new_interval_rewrites_chains_safely(archive):
+    db_path, store, expected = archive
+    compact(db_path, keyframe_interval=4, store=store)
+    compact(db_path, keyframe_interval=2, store=store)
+    _assert_rebuildable(db_path, store, expected, keyframe_interval=2)
+
+
+def test_compact_dry_run_changes_nothing(archive):
+    db_path, store, expected = archive
+    before = {key: store.is_delta(key) for key in store.keys()}
+    stats = compact(db_path, keyframe_interval=3, dry_run=True, store=store)
+    assert stats.snapshots_pruned == 2
+    assert {key: store.is_delta(key) for key in store.keys()} == before
+    with session_scope(db_path) as session:
+        assert session.query(PricingSnapshot).count() == len(expected) + 2
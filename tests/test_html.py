@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+import pytest
+
+from ai_sub_monitor.utils.html import available_backends, parse_page
+
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("html", ["", "   \n", "<!-- only a comment -->", "<!DOCTYPE html>"])
+def test_empty_documents_parse_to_no_text(backend, html):
+    page = parse_page(html, backend)
+    assert page.title is None
+    assert page.normalized() == ""
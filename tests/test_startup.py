@@ -0,0 +1,64 @@
+"""CLI startup must not pull in heavy dependencies (see benchmarks/startup.py for timings)."""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = [
+    "sqlalchemy",
+    "ai_sub_monitor.db",
+    "ai_sub_monitor.collectors",
+    "ai_sub_monitor.collectors.pricing",
+    "ai_sub_monitor.collectors.reddit",
+    "ai_sub_monitor.collectors.github",
+    "ai_sub_monitor.collectors.docs",
+    "ai_sub_monitor.collectors.snapshots",
+    "ai_sub_monitor.reporters.weekly",
+    "ai_sub_monitor.analyzers.anomaly",
+    "praw",
+    "httpx",
+    "bs4",
+    "openpyxl",
+    "jinja2",
+    "vaderSentiment",
+    "numpy",
+    "pyarrow",
+]
+
+PROBE = """
+import contextlib, io, json, sys
+import ai_sub_monitor.cli
+args = sys.argv[1:]
+if args:
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            ai_sub_monitor.cli.cli(args, standalone_mode=False)
+        except SystemExit:
+            pass
+print(json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))
+"""
+
+
+def _imported(args):
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT / "src"), os.getenv("PYTHONPATH")]))}
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES), *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=ROOT,
+        check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("args", [[], ["--version"], ["--help"], ["sources"]], ids=lambda a: " ".join(a) or "import")
+def test_cli_startup_skips_heavy_imports(args):
+    assert _imported(args) == []